@@ -1,15 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 from enum import Enum
+import asyncio
 import pickle
 import numpy as np
 from typing import Optional
 import uvicorn
 import os
 from fastapi.middleware.cors import CORSMiddleware
+from debug_tools import MAX_PROFILE_SECONDS, collapsed_text, debug_token_matches, sample_stacks
+from ip_screen import RELOAD_INTERVAL, IPBlocklist
 
 # Model will be loaded here
 model = None
+ip_blocklist = None
+
+# Blocklist of IP addresses and CIDR blocks; requests from a listed ipAddress are flagged as fraud
+# without being scored (unset disables screening)
+IP_BLOCKLIST_PATH = os.getenv("IP_BLOCKLIST_PATH")
+
+# Enables the sampling profiler at /debug/profile and is required to call it
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
 
 # Define the risk levels as an enum
 class RiskLevel(str, Enum):
@@ -31,6 +43,7 @@ class FraudDetectionResponse(BaseModel):
     is_fraud: bool
     confidence: float = Field(..., ge=0, le=1)
     risk_level: RiskLevel
+    blocked: Optional[str] = None
 
 app = FastAPI(title="Fraud Detection Model API")
 
@@ -45,7 +58,10 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    global model
+    global model, ip_blocklist
+    if IP_BLOCKLIST_PATH:
+        ip_blocklist = IPBlocklist(IP_BLOCKLIST_PATH, float(os.getenv("IP_BLOCKLIST_RELOAD_INTERVAL", RELOAD_INTERVAL)))
+        ip_blocklist.start_watcher()
     try:
         # Try to load the model if it exists
         model_path = os.getenv("MODEL_PATH", "fraud_model.pkl")
@@ -95,9 +111,13 @@ def get_risk_level(confidence: float) -> RiskLevel:
 async def root():
     return {"message": "Fraud Detection Model API", "status": "active"}
 
-@app.post("/predict", response_model=FraudDetectionResponse)
+@app.post("/predict", response_model=FraudDetectionResponse, response_model_exclude_none=True)
 async def predict(request: FraudDetectionRequest):
     try:
+        # Known-bad addresses are answered before any feature mapping
+        if ip_blocklist is not None and ip_blocklist.contains(request.ipAddress):
+            return {"is_fraud": True, "confidence": 1.0, "risk_level": RiskLevel.high, "blocked": "ip_blocklist"}
+        
         # Preprocess the input
         features = preprocess_input(request)
         
@@ -141,6 +161,22 @@ async def predict(request: FraudDetectionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
+if DEBUG_TOKEN:
+    @app.get("/debug/profile", response_class=PlainTextResponse)
+    async def debug_profile(seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+                            authorization: Optional[str] = Header(None),
+                            x_debug_token: Optional[str] = Header(None)):
+        """Sample all threads for ?seconds=N and return collapsed stacks"""
+        if not debug_token_matches(authorization or x_debug_token, DEBUG_TOKEN):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        # Sample from a worker thread so the event loop keeps serving the requests being profiled
+        result = await asyncio.to_thread(sample_stacks, seconds)
+        if result is None:
+            raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+        stacks, rounds = result
+        return PlainTextResponse(collapsed_text(stacks),
+                                 headers={"X-Profile-Seconds": str(seconds), "X-Profile-Samples": str(rounds)})
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8001))
     uvicorn.run(app, host="0.0.0.0", port=port)
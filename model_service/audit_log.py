@@ -0,0 +1,190 @@
+"""
+Asynchronous audit log of scoring decisions.
+
+Request threads only append a tuple to a bounded in-memory queue; everything
+else (feature reconstruction, JSON encoding, compression and file I/O) runs on
+one background writer thread, so logging never blocks scoring:
+
+- The queue is a collections.deque. Appends and pops are atomic in CPython, so
+  the hot path takes no lock. When the queue already holds AUDIT_QUEUE_SIZE
+  records, new records are dropped and counted instead of waiting.
+- Every FLUSH_INTERVAL the writer drains the queue in batches of up to
+  BATCH_SIZE records. Each batch becomes one gzip member of JSON lines,
+  appended to the current segment file and fsynced. Concatenated gzip
+  members form a valid gzip file (zcat reads it whole), and a crash loses at
+  most the batch being written.
+- Segments rotate when they reach AUDIT_SEGMENT_MB or SEGMENT_SECONDS. File
+  names carry the start time and process id, so several workers can share a
+  directory:
+
+      audit-20250402T123456-4711-000003.jsonl.gz
+
+read_audit_log() iterates over the records of one or more segments.
+"""
+import atexit
+import collections
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+FLUSH_INTERVAL = 0.2
+BATCH_SIZE = 2000
+SEGMENT_SECONDS = 3600
+
+class AuditLog:
+    def __init__(self, directory, describe, max_queue=100000, segment_bytes=64 * 1024 * 1024,
+                 segment_seconds=SEGMENT_SECONDS, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        """
+        `describe(record)` turns a queued record into the JSON-serializable dict that is
+        written; it runs on the writer thread.
+        """
+        self.directory = directory
+        self.describe = describe
+        self.max_queue = max_queue
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        os.makedirs(directory, exist_ok=True)
+
+        self.queue = collections.deque()
+        self.written = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.segments = 0
+        self.write_errors = 0
+        self.last_error = None
+        self._dropped = 0
+        self._drop_lock = threading.Lock()
+        self._segment = None
+        self._segment_path = None
+        self._segment_started = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, *record):
+        """
+        Queue one decision. Never blocks; returns False if the record was dropped.
+        """
+        # len() and append() are each atomic; a burst may overshoot max_queue by a few records
+        if len(self.queue) >= self.max_queue:
+            with self._drop_lock:
+                self._dropped += 1
+            return False
+        self.queue.append(record)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+        self._close_segment()
+
+    def _drain(self):
+        while self.queue:
+            batch = []
+            while self.queue and len(batch) < self.batch_size:
+                batch.append(self.queue.popleft())
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Keep the writer alive; the batch is counted as failed
+                self.write_errors += len(batch)
+                self.last_error = str(e)
+                print(f"Audit log write error: {e}")
+                self._close_segment()
+
+    def _write_batch(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(self.describe(record), default=str))
+            except Exception as e:
+                self.write_errors += 1
+                self.last_error = str(e)
+        if not lines:
+            return
+        member = gzip.compress(("\n".join(lines) + "\n").encode(), compresslevel=6)
+
+        now = time.time()
+        if (self._segment is None or self._segment.tell() >= self.segment_bytes
+                or now - self._segment_started >= self.segment_seconds):
+            self._open_segment(now)
+        self._segment.write(member)
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+        self.written += len(lines)
+        self.batches += 1
+        self.bytes_written += len(member)
+
+    def _open_segment(self, now):
+        self._close_segment()
+        stamp = datetime.fromtimestamp(now, timezone.utc).strftime('%Y%m%dT%H%M%S')
+        self.segments += 1
+        self._segment_path = os.path.join(self.directory, f"audit-{stamp}-{os.getpid()}-{self.segments:06d}.jsonl.gz")
+        self._segment = open(self._segment_path, 'ab')
+        self._segment_started = now
+
+    def _close_segment(self):
+        if self._segment is not None:
+            try:
+                self._segment.close()
+            except OSError:
+                pass
+            self._segment = None
+
+    def close(self, timeout=5.0):
+        """
+        Write out everything still queued and stop the writer.
+        """
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._drop_lock:
+            dropped = self._dropped
+        return {
+            "queued": len(self.queue),
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "dropped": dropped,
+            "write_errors": self.write_errors,
+            "last_error": self.last_error,
+            "batches": self.batches,
+            "bytes_written": self.bytes_written,
+            "segments": self.segments,
+            "current_segment": os.path.basename(self._segment_path) if self._segment_path else None,
+            "writer_alive": self._thread.is_alive(),
+        }
+
+def read_audit_log(paths):
+    """
+    Yield audit records from segment files (paths or glob patterns), in file name order.
+    Stops cleanly at a batch cut off by a crash.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = sorted(f for pattern in paths for f in (glob.glob(pattern) or [pattern]))
+    for path in files:
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Decompress member by member so a truncated last member doesn't hide the complete ones
+        while data:
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            try:
+                chunk = decompressor.decompress(data)
+            except zlib.error:
+                break
+            if not decompressor.eof:
+                break
+            for line in chunk.splitlines():
+                if line:
+                    yield json.loads(line)
+            data = decompressor.unused_data
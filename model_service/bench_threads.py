@@ -0,0 +1,154 @@
+"""
+Benchmark tail latency of concurrent inference workers with and without thread pinning.
+
+Starts --workers scoring processes at once, the way several API workers share
+a host, and has each score a mix of batch sizes in a closed loop. Reports
+p50/p99 latency per batch size for each mode:
+
+- default: native thread pools and the model's own n_jobs left as they are
+- pinned:  inference_threads.configure_worker() with CPU_AFFINITY=auto, n_jobs=1,
+           and large batches split across the worker's own CPUs
+
+    python bench_threads.py --model credit_card_model.pkl --workers 4 --duration 10
+    python bench_threads.py --model rf_model.pkl --model-n-jobs -1 --output threads.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+MODES = ('default', 'pinned')
+# Mostly single transactions with occasional bulk batches, like /predict next to /predict/batch
+DEFAULT_BATCH_MIX = [1, 1, 1, 1, 1, 1, 1, 1, 64, 4096]
+
+def _run_worker(mode, worker_index, n_workers, model_path, model_n_jobs, batch_mix, duration, output_path):
+    """
+    Child-process entry point: score batches in a closed loop and write latencies per batch size.
+    """
+    sys.path.insert(0, SERVICE_DIR)
+    import joblib
+    import numpy as np
+    import inference_threads
+
+    bundle = joblib.load(model_path)
+    model, scaler, features = bundle['model'], bundle['scaler'], bundle['selected_features']
+    if model_n_jobs is not None and hasattr(model, 'n_jobs'):
+        model.n_jobs = model_n_jobs
+
+    if mode == 'pinned':
+        inference_threads.configure_worker(worker_index, n_workers)
+        inference_threads.pin_model_threads(model)
+        predict = inference_threads.predict_proba
+    else:
+        predict = lambda m, X: m.predict_proba(X)
+
+    rng = np.random.default_rng(worker_index)
+    pool = scaler.transform(rng.normal(size=(max(batch_mix), len(features))))
+    latencies = {str(size): [] for size in set(batch_mix)}
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        size = batch_mix[i % len(batch_mix)]
+        i += 1
+        X = pool[:size]
+        start = time.perf_counter()
+        predict(model, X)
+        latencies[str(size)].append((time.perf_counter() - start) * 1000)
+
+    with open(output_path, 'w') as f:
+        json.dump(latencies, f)
+
+def run_mode(mode, args, batch_mix):
+    """
+    Run all workers for one mode concurrently and merge their latencies.
+    """
+    env = dict(os.environ)
+    if mode == 'pinned':
+        # Must be in place before the workers import NumPy
+        sys.path.insert(0, SERVICE_DIR)
+        from inference_threads import native_thread_env
+        env.update(native_thread_env())
+        env['CPU_AFFINITY'] = 'auto'
+
+    with tempfile.TemporaryDirectory() as workdir:
+        processes, outputs = [], []
+        for worker_index in range(args.workers):
+            output_path = os.path.join(workdir, f'worker{worker_index}.json')
+            command = [sys.executable, os.path.abspath(__file__), '--worker', mode, str(worker_index),
+                       output_path, '--workers', str(args.workers), '--model', args.model,
+                       '--duration', str(args.duration), '--batch-mix', *map(str, batch_mix)]
+            if args.model_n_jobs is not None:
+                command += ['--model-n-jobs', str(args.model_n_jobs)]
+            processes.append(subprocess.Popen(command, env=env, cwd=SERVICE_DIR))
+            outputs.append(output_path)
+        for process in processes:
+            process.wait()
+
+        merged = {}
+        for output_path in outputs:
+            if not os.path.exists(output_path):
+                continue
+            with open(output_path) as f:
+                for size, values in json.load(f).items():
+                    merged.setdefault(size, []).extend(values)
+    return merged
+
+def summarize(mode, latencies):
+    import numpy as np
+    rows = []
+    for size in sorted(latencies, key=int):
+        values = np.asarray(latencies[size])
+        if not len(values):
+            continue
+        rows.append({
+            'mode': mode,
+            'batch_size': int(size),
+            'calls': int(len(values)),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p99_ms': float(np.percentile(values, 99)),
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference tail latency with and without thread pinning")
+    parser.add_argument('--worker', nargs=3, metavar=('MODE', 'INDEX', 'OUTPUT'), help=argparse.SUPPRESS)
+    parser.add_argument('--model', default=os.path.join(SERVICE_DIR, 'credit_card_model.pkl'),
+                        help="Model bundle with model, scaler and selected_features")
+    parser.add_argument('--model-n-jobs', type=int, default=None,
+                        help="Override the model's n_jobs in default mode (e.g. -1 for a forest trained that way)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Concurrent worker processes")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument('--batch-mix', nargs='*', type=int, default=DEFAULT_BATCH_MIX,
+                        help="Batch sizes scored in rotation by every worker")
+    parser.add_argument('--modes', nargs='*', default=list(MODES), choices=MODES)
+    parser.add_argument('--output', default=None, help="Optional JSON results file")
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, worker_index, output_path = args.worker
+        _run_worker(mode, int(worker_index), args.workers, args.model, args.model_n_jobs,
+                    args.batch_mix, args.duration, output_path)
+        return
+
+    results = []
+    for mode in args.modes:
+        print(f"Running {args.workers} workers in {mode} mode for {args.duration:.0f}s...")
+        results += summarize(mode, run_mode(mode, args, args.batch_mix))
+
+    print("{:<10} {:<8} {:<10} {:<12} {:<12}".format("Mode", "Batch", "Calls", "p50(ms)", "p99(ms)"))
+    print("-" * 54)
+    for row in results:
+        print("{:<10} {:<8} {:<10} {:<12.3f} {:<12.3f}".format(
+            row['mode'], row['batch_size'], row['calls'], row['p50_ms'], row['p99_ms']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'workers': args.workers, 'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
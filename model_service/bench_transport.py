@@ -0,0 +1,147 @@
+"""
+Benchmark HTTP /predict against the Unix domain socket transport.
+
+Starts flask_api.py with both listeners enabled (or uses already running ones
+given with --url/--socket) and reports per-request latency percentiles and
+throughput for:
+
+- HTTP, one JSON request at a time (what modelService.ts does today)
+- Unix socket, one request at a time on a persistent connection
+- Unix socket, pipelined windows of requests on a persistent connection
+
+    python bench_transport.py --requests 5000 --window 64
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+import numpy as np
+
+from run import check_ready
+from socket_server import SocketScoringClient
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def sample_transactions(n, seed=42):
+    rng = random.Random(seed)
+    return [{
+        'amount': round(rng.expovariate(1 / 300), 2),
+        'merchantCategory': rng.choice(['retail', 'ecommerce', 'travel', 'electronics']),
+        'cardEntryMethod': rng.choice(['chip', 'online', 'manual', 'contactless']),
+        'location': rng.choice(['normal', 'normal', 'abnormal']),
+        'timestamp': f"2025-04-0{rng.randint(1, 7)}T{rng.randint(0, 23):02d}:15:00Z",
+    } for _ in range(n)]
+
+def summarize(name, latencies_us, total_seconds, n):
+    latencies = np.asarray(latencies_us)
+    return {
+        'transport': name,
+        'requests': n,
+        'throughput_rps': n / total_seconds,
+        'p50_us': float(np.percentile(latencies, 50)),
+        'p99_us': float(np.percentile(latencies, 99)),
+    }
+
+def bench_http(url, transactions):
+    parsed = urllib.parse.urlparse(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port)
+    headers = {'Content-Type': 'application/json'}
+    latencies = []
+    start = time.perf_counter()
+    for transaction in transactions:
+        t0 = time.perf_counter()
+        try:
+            connection.request('POST', '/predict', json.dumps(transaction), headers)
+            response = connection.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # The development server closes connections after each response
+            connection.close()
+            connection = http.client.HTTPConnection(parsed.hostname, parsed.port)
+            connection.request('POST', '/predict', json.dumps(transaction), headers)
+            response = connection.getresponse()
+        json.loads(response.read())
+        if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+            connection.close()
+        latencies.append((time.perf_counter() - t0) * 1e6)
+    return summarize('http', latencies, time.perf_counter() - start, len(transactions))
+
+def bench_socket(path, transactions, window):
+    client = SocketScoringClient(path)
+    latencies = []
+    start = time.perf_counter()
+    for transaction in transactions:
+        t0 = time.perf_counter()
+        client.score(transaction)
+        latencies.append((time.perf_counter() - t0) * 1e6)
+    sequential = summarize('unix_socket', latencies, time.perf_counter() - start, len(transactions))
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(transactions), window):
+        chunk = transactions[i:i + window]
+        t0 = time.perf_counter()
+        client.score_many(chunk, window=window)
+        # Every request in the window waits for the whole window
+        latencies.extend([(time.perf_counter() - t0) * 1e6] * len(chunk))
+    pipelined = summarize(f'unix_socket_pipelined_{window}', latencies, time.perf_counter() - start, len(transactions))
+    client.close()
+    return [sequential, pipelined]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP vs Unix socket scoring transports")
+    parser.add_argument('--url', default=None, help="Running API base URL (default: start one)")
+    parser.add_argument('--socket', default=None, help="Running API socket path (default: start one)")
+    parser.add_argument('--port', type=int, default=8011, help="Port for the API started by the benchmark")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--window', type=int, default=64, help="Pipelined requests in flight")
+    parser.add_argument('--output', default=None, help="Optional JSON results file")
+    args = parser.parse_args()
+
+    process = None
+    url, socket_path = args.url, args.socket
+    if url is None or socket_path is None:
+        url = f"http://127.0.0.1:{args.port}"
+        socket_path = os.path.join(tempfile.mkdtemp(), 'fraud-model.sock')
+        env = dict(os.environ, PORT=str(args.port), MODEL_SOCKET_PATH=socket_path)
+        process = subprocess.Popen([sys.executable, os.path.join(SERVICE_DIR, 'flask_api.py')], cwd=SERVICE_DIR,
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   start_new_session=True)
+        deadline = time.monotonic() + 60
+        while not (check_ready(f"{url}/ready") and os.path.exists(socket_path)):
+            if time.monotonic() > deadline or process.poll() is not None:
+                os.killpg(process.pid, signal.SIGTERM)
+                sys.exit("Model service did not start")
+            time.sleep(0.25)
+
+    try:
+        transactions = sample_transactions(args.requests)
+        # Warm up both paths
+        bench_http(url, transactions[:50])
+        bench_socket(socket_path, transactions[:50], args.window)
+
+        results = [bench_http(url, transactions)] + bench_socket(socket_path, transactions, args.window)
+    finally:
+        if process is not None:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait()
+
+    print("{:<28} {:<14} {:<12} {:<12}".format("Transport", "Req/s", "p50(us)", "p99(us)"))
+    print("-" * 66)
+    for result in results:
+        print("{:<28} {:<14.0f} {:<12.0f} {:<12.0f}".format(
+            result['transport'], result['throughput_rps'], result['p50_us'], result['p99_us']))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Training pipeline benchmark suite.
+
+Runs create_model.py, create_cc_model.py and generate_model.py at increasing
+dataset sizes, each in a fresh child process, and records wall time, peak RSS
+and model artifact size. Results are written as JSON so a later run can be
+compared against a saved baseline:
+
+    python benchmark_training.py --output bench.json
+    python benchmark_training.py --output new.json --baseline bench.json --tolerance 0.25
+
+The comparison exits with status 1 when any metric regresses by more than the
+tolerance, so it can gate CI when training code changes.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Synthetic sample counts for create_model.py
+DEFAULT_SYNTHETIC_SIZES = [2000, 20000, 200000, 1000000]
+# Legitimate rows kept from creditcard.csv by create_cc_model.py. The full file has ~284k, and
+# larger values are capped to that, so every size stays below it to measure a distinct case
+DEFAULT_CREDITCARD_SIZES = [10000, 50000, 100000, 250000]
+
+METRICS = ('wall_seconds', 'peak_rss_mb', 'artifact_bytes')
+
+def _run_pipeline(pipeline, size, output_path, data_path):
+    """
+    Child-process entry point: train one pipeline and print its in-process timing.
+    """
+    sys.path.insert(0, SERVICE_DIR)
+    if pipeline == 'create_model':
+        import create_model
+        start = time.perf_counter()
+        create_model.main(n_samples=size, model_path=output_path)
+    elif pipeline == 'create_cc_model':
+        import create_cc_model
+        start = time.perf_counter()
+        create_cc_model.main(path=data_path, output_path=output_path, n_non_fraud=size)
+    else:
+        raise ValueError(f"Unknown pipeline: {pipeline}")
+    print(json.dumps({'train_seconds': time.perf_counter() - start}))
+
+def _peak_rss_mb(rusage):
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    if sys.platform == 'darwin':
+        return rusage.ru_maxrss / (1024 * 1024)
+    return rusage.ru_maxrss / 1024
+
+def run_case(pipeline, size, workdir, data_path=None):
+    """
+    Run one (pipeline, size) case in a child process and collect its measurements.
+    """
+    if pipeline == 'generate_model':
+        # generate_model.py pickles a class defined in __main__, so it has to run as a
+        # script; it writes model_service/fraud_model.pkl relative to its working directory
+        os.makedirs(os.path.join(workdir, 'model_service'), exist_ok=True)
+        artifact = os.path.join(workdir, 'model_service', 'fraud_model.pkl')
+        command = [sys.executable, os.path.join(SERVICE_DIR, 'generate_model.py')]
+    else:
+        artifact = os.path.join(workdir, f"{pipeline}_{size}.pkl")
+        command = [sys.executable, os.path.abspath(__file__), '--run', pipeline, str(size), artifact]
+        if data_path:
+            command += ['--data-path', data_path]
+
+    with tempfile.TemporaryFile('w+') as stdout, tempfile.TemporaryFile('w+') as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workdir, stdout=stdout, stderr=stderr, text=True)
+        # Reap the child with wait4 to get its own peak RSS; RUSAGE_CHILDREN would report
+        # the maximum over every child so far and hide small runs behind earlier large ones
+        _, status, rusage = os.wait4(process.pid, 0)
+        wall_seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stdout.seek(0)
+        stderr.seek(0)
+        stdout, stderr = stdout.read(), stderr.read()
+
+    result = {
+        'pipeline': pipeline,
+        'size': size,
+        'wall_seconds': wall_seconds,
+        'train_seconds': None,
+        'peak_rss_mb': _peak_rss_mb(rusage),
+        'artifact_bytes': os.path.getsize(artifact) if os.path.exists(artifact) else None,
+        'returncode': process.returncode,
+    }
+    for line in reversed(stdout.strip().splitlines()):
+        if line.startswith('{'):
+            result['train_seconds'] = json.loads(line).get('train_seconds')
+            break
+    if process.returncode != 0:
+        result['error'] = stderr.strip().splitlines()[-1] if stderr.strip() else 'unknown error'
+    return result
+
+def compare_reports(current, baseline, tolerance):
+    """
+    Compare two reports and return a list of regression messages.
+
+    A case that succeeded in the baseline but now fails, or no longer reports a
+    metric it used to, counts as a regression.
+    """
+    previous = {(r['pipeline'], r['size']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get((result['pipeline'], result['size']))
+        if not old:
+            continue
+        label = f"{result['pipeline']}[{result['size']}]"
+        if old.get('returncode') == 0 and result.get('returncode') != 0:
+            regressions.append(f"{label} failed (exit code {result.get('returncode')}): "
+                               f"{result.get('error', 'unknown error')}")
+            continue
+        for metric in METRICS:
+            new_value, old_value = result.get(metric), old.get(metric)
+            if not old_value:
+                continue
+            if new_value is None:
+                regressions.append(f"{label} {metric}: {old_value:.2f} -> missing")
+                continue
+            change = (new_value - old_value) / old_value
+            if change > tolerance:
+                regressions.append(f"{label} {metric}: {old_value:.2f} -> {new_value:.2f} (+{change:.0%})")
+    return regressions
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SERVICE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the model training pipelines")
+    parser.add_argument('--run', nargs=3, metavar=('PIPELINE', 'SIZE', 'OUTPUT'), help=argparse.SUPPRESS)
+    parser.add_argument('--pipelines', nargs='*', default=['create_model', 'create_cc_model', 'generate_model'])
+    parser.add_argument('--synthetic-sizes', nargs='*', type=int, default=DEFAULT_SYNTHETIC_SIZES)
+    parser.add_argument('--creditcard-sizes', nargs='*', type=int, default=DEFAULT_CREDITCARD_SIZES)
+    parser.add_argument('--data-path', default=os.path.join(SERVICE_DIR, '..', 'data', 'creditcard.csv'))
+    parser.add_argument('--output', default='training_benchmark.json')
+    parser.add_argument('--baseline', default=None, help="Previous report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    if args.run:
+        pipeline, size, output_path = args.run
+        _run_pipeline(pipeline, int(size), output_path, os.path.abspath(args.data_path))
+        return
+
+    cases = []
+    for pipeline in args.pipelines:
+        if pipeline == 'create_model':
+            cases += [(pipeline, size) for size in args.synthetic_sizes]
+        elif pipeline == 'create_cc_model':
+            if os.path.exists(args.data_path):
+                cases += [(pipeline, size) for size in args.creditcard_sizes]
+            else:
+                print(f"Skipping create_cc_model: {args.data_path} not found")
+        elif pipeline == 'generate_model':
+            # generate_model.py fits on fixed dummy data, so it has a single size
+            cases.append((pipeline, None))
+
+    results = []
+    print("{:<18} {:<10} {:<10} {:<10} {:<12} {}".format("Pipeline", "Size", "Wall(s)", "Train(s)", "PeakRSS(MB)", "Artifact(KB)"))
+    print("-" * 80)
+    for pipeline, size in cases:
+        with tempfile.TemporaryDirectory() as workdir:
+            result = run_case(pipeline, size, workdir, os.path.abspath(args.data_path))
+        results.append(result)
+        print("{:<18} {:<10} {:<10.2f} {:<10} {:<12} {}".format(
+            pipeline, str(size), result['wall_seconds'],
+            f"{result['train_seconds']:.2f}" if result['train_seconds'] is not None else '-',
+            f"{result['peak_rss_mb']:.1f}" if result['peak_rss_mb'] is not None else '-',
+            f"{result['artifact_bytes'] / 1024:.1f}" if result['artifact_bytes'] is not None else '-'))
+        if result.get('error'):
+            print(f"  failed: {result['error']}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%}:")
+            for message in regressions:
+                print(f"- {message}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
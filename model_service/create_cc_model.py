@@ -2,63 +2,288 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report, accuracy_score
+import argparse
+import copy
 import joblib
 import os
+from drift import build_reference_distributions
+from similarity import MAX_INDEXED_FRAUDS, build_fraud_index
 
 # Set paths
 data_path = '../data/creditcard.csv'
 model_output_path = 'credit_card_model.pkl'
 
-print(f"Loading data from {data_path}")
-# Load the data
-credit_card_data = pd.read_csv(data_path)
+# Select important features (based on domain knowledge)
+# V1, V2, V3, V4, V10, V11, V14, and Amount are often important features in fraud detection
+selected_features = ['V1', 'V2', 'V3', 'V4', 'V10', 'V11', 'V14', 'Amount']
 
-print("Data shape:", credit_card_data.shape)
-print("Class distribution:")
-print(credit_card_data['Class'].value_counts())
+# Rows of the full dataset sampled for the drift reference distributions
+REFERENCE_SAMPLE_ROWS = 50000
 
-# For faster training, use a subset of the data
-# Take all fraud cases (minority class) but only a fraction of non-fraud cases
-fraud_cases = credit_card_data[credit_card_data['Class'] == 1]
-non_fraud_cases = credit_card_data[credit_card_data['Class'] == 0].sample(n=10000, random_state=42)
-credit_card_data_balanced = pd.concat([fraud_cases, non_fraud_cases]).reset_index(drop=True)
+def load_data(path=data_path):
+    """
+    Load the full credit card dataset.
+    """
+    print(f"Loading data from {path}")
+    # Load the data
+    credit_card_data = pd.read_csv(path)
 
-print("Balanced dataset shape:", credit_card_data_balanced.shape)
-print("Balanced class distribution:")
-print(credit_card_data_balanced['Class'].value_counts())
+    print("Data shape:", credit_card_data.shape)
+    print("Class distribution:")
+    print(credit_card_data['Class'].value_counts())
+    return credit_card_data
 
-# Select important features (based on domain knowledge)
-# V1, V2, V3, V4, V10, V11, V14, and Amount are often important features in fraud detection
-selected_features = ['V1', 'V2', 'V3', 'V4', 'V10', 'V11', 'V14', 'Amount']
-X = credit_card_data_balanced[selected_features]
-y = credit_card_data_balanced['Class']
-
-# Split the data
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-
-# Scale the features
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-print("Training Logistic Regression model...")
-# Use logistic regression (faster than Random Forest)
-model = LogisticRegression(max_iter=1000, random_state=42)
-model.fit(X_train_scaled, y_train)
-
-# Evaluate the model
-y_pred = model.predict(X_test_scaled)
-print("Model Accuracy:", accuracy_score(y_test, y_pred))
-print("\nClassification Report:")
-print(classification_report(y_test, y_pred))
-
-# Save model and scaler
-print(f"Saving model to {model_output_path}")
-joblib.dump({
-    'model': model, 
-    'scaler': scaler,
-    'selected_features': selected_features
-}, model_output_path)
-print("Model saved successfully!")
\ No newline at end of file
+def undersample(credit_card_data, n_non_fraud=10000, random_state=42):
+    """
+    Keep all fraud cases (minority class) but only `n_non_fraud` non-fraud cases
+    for faster training.
+    """
+    fraud_cases = credit_card_data[credit_card_data['Class'] == 1]
+    non_fraud_cases = credit_card_data[credit_card_data['Class'] == 0]
+    non_fraud_cases = non_fraud_cases.sample(n=min(n_non_fraud, len(non_fraud_cases)), random_state=random_state)
+    credit_card_data_balanced = pd.concat([fraud_cases, non_fraud_cases]).reset_index(drop=True)
+
+    print("Balanced dataset shape:", credit_card_data_balanced.shape)
+    print("Balanced class distribution:")
+    print(credit_card_data_balanced['Class'].value_counts())
+
+    return credit_card_data_balanced
+
+def load_balanced_data(path=data_path, n_non_fraud=10000, random_state=42):
+    """
+    Load the credit card dataset and undersample the legitimate transactions.
+    """
+    return undersample(load_data(path), n_non_fraud, random_state)
+
+def reference_sample(credit_card_data, n_rows=REFERENCE_SAMPLE_ROWS, random_state=42):
+    """
+    Uniform sample of the full dataset for the drift reference distributions.
+
+    Unlike the undersampled training data it keeps the class mix and feature
+    distributions that live traffic has, so drift is measured against them.
+    """
+    return credit_card_data.sample(n=min(n_rows, len(credit_card_data)), random_state=random_state)
+
+def save_model_bundle(model, scaler, features=selected_features, path=model_output_path,
+                      reference_distributions=None, fraud_index=None):
+    """
+    Save the model, scaler and feature list in the bundle format flask_api.load_model expects.
+
+    `reference_distributions` (see drift.build_reference_distributions) lets the API
+    report feature and score drift against the training data, and `fraud_index`
+    (see similarity.build_fraud_index) lets it return distances to known frauds.
+    """
+    print(f"Saving model to {path}")
+    bundle = {
+        'model': model,
+        'scaler': scaler,
+        'selected_features': list(features)
+    }
+    if reference_distributions is not None:
+        bundle['reference_distributions'] = reference_distributions
+    if fraud_index is not None:
+        bundle['fraud_index'] = fraud_index
+    joblib.dump(bundle, path)
+    print("Model saved successfully!")
+
+def main(path=data_path, output_path=model_output_path, n_non_fraud=10000):
+    credit_card_data = load_data(path)
+    credit_card_data_balanced = undersample(credit_card_data, n_non_fraud)
+    X_reference = reference_sample(credit_card_data)[selected_features]
+    del credit_card_data
+
+    X = credit_card_data_balanced[selected_features]
+    y = credit_card_data_balanced['Class']
+
+    # Split the data
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    # Scale the features
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    print("Training Logistic Regression model...")
+    # Use logistic regression (faster than Random Forest)
+    model = LogisticRegression(max_iter=1000, random_state=42)
+    model.fit(X_train_scaled, y_train)
+
+    # Evaluate the model
+    y_pred = model.predict(X_test_scaled)
+    print("Model Accuracy:", accuracy_score(y_test, y_pred))
+    print("\nClassification Report:")
+    print(classification_report(y_test, y_pred))
+
+    # Capture distributions of the raw features and scores on unsampled data for drift monitoring
+    reference_distributions = build_reference_distributions(
+        X_reference.to_numpy(), selected_features,
+        scores=model.predict_proba(scaler.transform(X_reference))[:, 1])
+
+    # Index the scaled training frauds for nearest-fraud similarity
+    fraud_index = build_fraud_index(X_train_scaled[y_train.to_numpy() == 1])
+    print(f"Indexed {int((y_train == 1).sum())} training frauds for similarity scoring")
+
+    # Save model and scaler
+    save_model_bundle(model, scaler, selected_features, output_path, reference_distributions, fraud_index)
+
+def iter_chunks(path=data_path, chunksize=100000):
+    """
+    Stream (global row offset, features, labels) chunks of the dataset without loading it all.
+    """
+    offset = 0
+    for chunk in pd.read_csv(path, usecols=selected_features + ['Class'], chunksize=chunksize):
+        yield offset, chunk[selected_features].to_numpy(dtype=float), chunk['Class'].to_numpy()
+        offset += len(chunk)
+
+def holdout_mask(row_ids, holdout_fraction):
+    """
+    Deterministic hash-based holdout split on global row numbers, identical in every pass.
+    """
+    hashed = (np.asarray(row_ids, dtype=np.uint64) * np.uint64(2654435761)) % np.uint64(1 << 32)
+    return hashed < np.uint64(holdout_fraction * (1 << 32))
+
+class Reservoir:
+    """
+    Fixed-size uniform sample of the rows seen so far (Algorithm R, vectorized per chunk).
+    """
+    def __init__(self, size, n_columns, rng):
+        self.size = size
+        self.rows = np.empty((size, n_columns))
+        self.seen = 0
+        self.rng = rng
+
+    def add(self, X):
+        n = len(X)
+        fill = max(0, min(self.size - self.seen, n))
+        self.rows[self.seen:self.seen + fill] = X[:fill]
+        if fill < n:
+            positions = self.seen + np.arange(fill, n)
+            slots = (self.rng.random(n - fill) * (positions + 1)).astype(np.int64)
+            keep = slots < self.size
+            self.rows[slots[keep]] = X[fill:][keep]
+        self.seen += n
+
+    def sample(self):
+        return self.rows[:min(self.seen, self.size)]
+
+class ScoreHistogram:
+    """
+    Per-class histograms of predicted probabilities, enough for PR-AUC and threshold metrics
+    over a holdout set of any size.
+    """
+    def __init__(self, n_bins=10000):
+        self.n_bins = n_bins
+        self.counts = np.zeros((2, n_bins), dtype=np.int64)
+
+    def add(self, y_true, y_prob):
+        bins = np.minimum((np.asarray(y_prob) * self.n_bins).astype(np.int64), self.n_bins - 1)
+        for label in (0, 1):
+            self.counts[label] += np.bincount(bins[y_true == label], minlength=self.n_bins)
+
+    def average_precision(self):
+        # Sweep thresholds from the highest score bin down, as average_precision_score does
+        tp = np.cumsum(self.counts[1][::-1])
+        fp = np.cumsum(self.counts[0][::-1])
+        if tp[-1] == 0:
+            return 0.0
+        precision = tp / np.maximum(tp + fp, 1)
+        recall = tp / tp[-1]
+        return float(np.sum(np.diff(np.concatenate([[0.0], recall])) * precision))
+
+    def confusion(self, threshold=0.5):
+        cut = int(threshold * self.n_bins)
+        tn, fn = self.counts[0][:cut].sum(), self.counts[1][:cut].sum()
+        fp, tp = self.counts[0][cut:].sum(), self.counts[1][cut:].sum()
+        return int(tn), int(fp), int(fn), int(tp)
+
+def train_out_of_core(path=data_path, output_path=model_output_path, chunksize=100000, epochs=5,
+                      holdout_fraction=0.2, reservoir_size=50000, random_state=42):
+    """
+    Train on the full dataset in chunks with bounded memory and save the usual model bundle.
+
+    Pass 1 fits the scaler with partial_fit, counts classes for balanced class
+    weights and reservoir-samples rows for the drift reference and training
+    frauds for the similarity index. Every epoch then
+    streams the file again and updates a log-loss SGDClassifier chunk by chunk;
+    the epoch with the best holdout PR-AUC is kept. Memory use depends on
+    `chunksize` and `reservoir_size`, not on the size of the dataset.
+    """
+    if epochs < 1:
+        raise ValueError(f"epochs must be at least 1, got {epochs}")
+    rng = np.random.default_rng(random_state)
+    scaler = StandardScaler()
+    class_counts = np.zeros(2, dtype=np.int64)
+    train_reservoir = Reservoir(reservoir_size, len(selected_features), rng)
+    holdout_reservoir = Reservoir(reservoir_size, len(selected_features), rng)
+    # Frauds are rare, but sample them too so the similarity index stays bounded
+    fraud_reservoir = Reservoir(MAX_INDEXED_FRAUDS, len(selected_features), rng)
+
+    print(f"Pass 1: fitting scaler on {path} in chunks of {chunksize}")
+    for offset, X, y in iter_chunks(path, chunksize):
+        holdout = holdout_mask(np.arange(offset, offset + len(y)), holdout_fraction)
+        scaler.partial_fit(X[~holdout])
+        class_counts += np.bincount(y[~holdout], minlength=2)
+        train_reservoir.add(X[~holdout])
+        holdout_reservoir.add(X[holdout])
+        fraud_reservoir.add(X[~holdout & (y == 1)])
+    print(f"Training rows: {class_counts.sum()} ({class_counts[1]} fraud), "
+          f"holdout rows: {holdout_reservoir.seen}")
+
+    # Balanced class weights, as class_weight='balanced' would compute them on the full training set
+    class_weight = {label: class_counts.sum() / (2 * max(count, 1)) for label, count in enumerate(class_counts)}
+    model = SGDClassifier(loss='log_loss', alpha=1e-5, class_weight=class_weight, random_state=random_state)
+
+    best_model, best_score = None, -1.0
+    for epoch in range(epochs):
+        for offset, X, y in iter_chunks(path, chunksize):
+            train = ~holdout_mask(np.arange(offset, offset + len(y)), holdout_fraction)
+            X, y = scaler.transform(X[train]), y[train]
+            # The file is ordered by time, so shuffle within each chunk
+            order = rng.permutation(len(y))
+            model.partial_fit(X[order], y[order], classes=[0, 1])
+
+        histogram = ScoreHistogram()
+        for offset, X, y in iter_chunks(path, chunksize):
+            holdout = holdout_mask(np.arange(offset, offset + len(y)), holdout_fraction)
+            histogram.add(y[holdout], model.predict_proba(scaler.transform(X[holdout]))[:, 1])
+        score = histogram.average_precision()
+        print(f"Epoch {epoch + 1}/{epochs}: holdout PR-AUC {score:.4f}")
+        if score > best_score:
+            best_model, best_score, best_histogram = copy.deepcopy(model), score, histogram
+
+    tn, fp, fn, tp = best_histogram.confusion()
+    print(f"Best holdout PR-AUC: {best_score:.4f}")
+    print(f"Holdout at threshold 0.5: precision {tp / max(tp + fp, 1):.4f}, recall {tp / max(tp + fn, 1):.4f}, "
+          f"accuracy {(tp + tn) / max(tp + tn + fp + fn, 1):.4f}")
+
+    # Drift references from the sampled training rows and the scores of sampled holdout rows
+    reference_distributions = build_reference_distributions(
+        train_reservoir.sample(), selected_features,
+        scores=best_model.predict_proba(scaler.transform(holdout_reservoir.sample()))[:, 1])
+    if fraud_reservoir.seen:
+        fraud_index = build_fraud_index(scaler.transform(fraud_reservoir.sample()))
+    else:
+        print("Warning: no frauds in the training rows; saving the bundle without a similarity index")
+        fraud_index = None
+    save_model_bundle(best_model, scaler, selected_features, output_path, reference_distributions, fraud_index)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the credit card fraud model")
+    parser.add_argument('--data-path', default=data_path)
+    parser.add_argument('--output', default=model_output_path)
+    parser.add_argument('--non-fraud-samples', type=int, default=10000,
+                        help="Legitimate rows kept by the default undersampled training")
+    parser.add_argument('--out-of-core', action='store_true',
+                        help="Stream the full dataset in chunks and train an SGD model with bounded memory")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--holdout', type=float, default=0.2, help="Fraction of rows held out for evaluation")
+    args = parser.parse_args()
+
+    if args.out_of_core:
+        train_out_of_core(args.data_path, args.output, chunksize=args.chunksize, epochs=args.epochs,
+                          holdout_fraction=args.holdout)
+    else:
+        main(args.data_path, args.output, n_non_fraud=args.non_fraud_samples)
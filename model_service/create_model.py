@@ -73,43 +73,52 @@ def generate_training_data(n_samples=2000):
     
     return df
 
-# Generate data
-print("Generating synthetic training data...")
-data = generate_training_data()
+def build_model():
+    """
+    Create the scaler + random forest pipeline used for the dashboard model.
+    """
+    return Pipeline([
+        ('scaler', StandardScaler()),
+        ('classifier', RandomForestClassifier(
+            n_estimators=20,
+            max_depth=5,
+            min_samples_split=10,
+            class_weight='balanced',
+            random_state=42
+        ))
+    ])
+
+def main(n_samples=2000, model_path='model_service/fraud_model.pkl'):
+    # Generate data
+    print("Generating synthetic training data...")
+    data = generate_training_data(n_samples)
+
+    # Print data summary
+    print(f"Generated {len(data)} transaction records")
+    print(f"Fraud rate: {data['is_fraud'].mean():.2%}")
 
-# Print data summary
-print(f"Generated {len(data)} transaction records")
-print(f"Fraud rate: {data['is_fraud'].mean():.2%}")
+    # Split features and target
+    X = data.drop('is_fraud', axis=1)
+    y = data['is_fraud']
 
-# Split features and target
-X = data.drop('is_fraud', axis=1)
-y = data['is_fraud']
+    # Create a pipeline with preprocessing and model
+    print("Training fraud detection model...")
+    model = build_model()
 
-# Create a pipeline with preprocessing and model
-print("Training fraud detection model...")
-model = Pipeline([
-    ('scaler', StandardScaler()),
-    ('classifier', RandomForestClassifier(
-        n_estimators=20,
-        max_depth=5,
-        min_samples_split=10,
-        class_weight='balanced',
-        random_state=42
-    ))
-])
+    # Train the model
+    model.fit(X, y)
 
-# Train the model
-model.fit(X, y)
+    # Save the model
+    print(f"Saving model to {model_path}...")
+    joblib.dump(model, model_path)
 
-# Save the model
-model_path = 'model_service/fraud_model.pkl'
-print(f"Saving model to {model_path}...")
-joblib.dump(model, model_path)
+    print("Feature importances:")
+    feature_importances = model.named_steps['classifier'].feature_importances_
+    for feature, importance in zip(X.columns, feature_importances):
+        print(f"- {feature}: {importance:.4f}")
 
-print("Feature importances:")
-feature_importances = model.named_steps['classifier'].feature_importances_
-for feature, importance in zip(X.columns, feature_importances):
-    print(f"- {feature}: {importance:.4f}")
+    print("\nModel training complete!")
+    print(f"Model saved to {model_path}")
 
-print("\nModel training complete!")
-print(f"Model saved to {model_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
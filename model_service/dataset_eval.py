@@ -0,0 +1,136 @@
+"""
+Full-dataset evaluation for the dashboard's Model Performance page.
+
+The loaded model scores a labeled CSV (creditcard.csv or an uploaded file) on a
+background thread, reading CHUNK_ROWS rows at a time with one vectorized
+predict_proba call per chunk, and reports its progress as it goes. Only the
+labels and fraud probabilities are kept (5 bytes per row), so memory stays
+small whatever the file size.
+
+The scores are cached on disk as .npz files keyed by the model file hash and
+the SHA-256 of the data, so later visits (and other dashboard sessions) load
+them instead of scoring again. Metrics are recomputed from the cached scores,
+which takes milliseconds even for the full dataset.
+"""
+import hashlib
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference_threads import predict_proba
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.eval_cache')
+CHUNK_ROWS = 50000
+# Label column names tried in order: creditcard.csv, then the dashboard's synthetic data
+LABEL_COLUMNS = ('Class', 'is_fraud')
+
+def data_sha256(data):
+    """
+    SHA-256 of a CSV given as a path or as bytes.
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, (bytes, bytearray)):
+        digest.update(data)
+    else:
+        with open(data, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _open(data):
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else open(data, 'rb')
+
+def bundle_scorer(loaded, default_features):
+    """
+    Return (feature columns, score function) for a loaded model file: a bundle
+    ({'model', 'scaler', 'selected_features'}) or a bare estimator over `default_features`.
+    The score function maps a DataFrame of those columns to fraud probabilities.
+    """
+    if isinstance(loaded, dict) and 'model' in loaded:
+        estimator, scaler = loaded['model'], loaded.get('scaler')
+        features = list(loaded.get('selected_features') or default_features)
+
+        def score(frame):
+            X = frame.to_numpy(dtype=np.float64)
+            return predict_proba(estimator, scaler.transform(X) if scaler is not None else X)[:, 1]
+        return features, score
+    # Large chunks are split across threads with np.array_split, which needs an array, not a DataFrame
+    return list(default_features), lambda frame: predict_proba(loaded, frame.to_numpy(dtype=np.float64))[:, 1]
+
+def check_columns(data, features):
+    """
+    Read the header only. Return (missing feature columns, label column or None).
+    """
+    with _open(data) as f:
+        columns = list(pd.read_csv(f, nrows=0).columns)
+    label = next((name for name in LABEL_COLUMNS if name in columns), None)
+    return [feature for feature in features if feature not in columns], label
+
+def cache_path(model_hash, data_hash, cache_dir=DEFAULT_CACHE_DIR):
+    return os.path.join(cache_dir, f"{model_hash[:16]}-{data_hash[:16]}.npz")
+
+def load_cached_scores(path):
+    """
+    Return (y_true, y_prob) from a cache file, or None if there is none.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as cached:
+        return cached['y_true'], cached['y_prob']
+
+class EvaluationJob:
+    """
+    Scores one dataset on a background thread. Poll `progress` (0 to 1) and `rows`,
+    wait on `done`, then read `result` ((y_true, y_prob)) or `error`.
+    """
+    def __init__(self, data, features, label, score, cache_file, chunk_rows=CHUNK_ROWS):
+        self.data = data
+        self.features = features
+        self.label = label
+        self.score = score
+        self.cache_file = cache_file
+        self.chunk_rows = chunk_rows
+        self.progress = 0.0
+        self.rows = 0
+        self.seconds = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dataset-evaluation", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            size = len(self.data) if isinstance(self.data, (bytes, bytearray)) else os.path.getsize(self.data)
+            labels, scores = [], []
+            with _open(self.data) as f:
+                for chunk in pd.read_csv(f, usecols=self.features + [self.label], chunksize=self.chunk_rows):
+                    scores.append(np.asarray(self.score(chunk[self.features]), dtype=np.float32))
+                    labels.append(chunk[self.label].to_numpy(dtype=np.int8))
+                    self.rows += len(chunk)
+                    # The parser reads ahead, so this is approximate
+                    self.progress = min(f.tell() / size, 1.0) if size else 1.0
+            y_true = np.concatenate(labels) if labels else np.zeros(0, dtype=np.int8)
+            y_prob = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            # Write under a temporary name first so an interrupted run never leaves a partial cache
+            np.savez(self.cache_file + '.tmp.npz', y_true=y_true, y_prob=y_prob)
+            os.replace(self.cache_file + '.tmp.npz', self.cache_file)
+            self.result = (y_true, y_prob)
+            self.progress = 1.0
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.seconds = time.perf_counter() - start
+            # The job object outlives the run in Streamlit's resource cache; don't keep an upload alive
+            self.data = None
+            self.done.set()
@@ -0,0 +1,219 @@
+"""
+Memory and CPU introspection for the model service's opt-in /debug endpoints.
+
+- deep_sizeof() estimates the memory held by an object graph (model arrays,
+  scaler statistics, caches), counting NumPy buffers by nbytes and shared
+  objects only once.
+- process_memory() reports the current and peak resident set size.
+- AllocationTracker wraps tracemalloc: tracing starts on the first snapshot
+  and every later snapshot returns the top allocation sites that grew or
+  shrank since the previous one.
+- sample_stacks() is a statistical profiler: it samples the Python stack of
+  every other thread with sys._current_frames() for a fixed window and returns
+  collapsed stacks ("thread;outer;...;inner count" lines) that flamegraph.pl,
+  speedscope and similar tools read directly.
+
+Nothing here runs unless the service enables its debug endpoints, and
+tracemalloc (which slows every allocation) only runs between the first
+snapshot and stop().
+"""
+import hmac
+import os
+import re
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+
+# Longest accepted profiling window; keeps a profile request well inside worker timeouts
+MAX_PROFILE_SECONDS = 30
+# Default time between stack samples (100 Hz)
+PROFILE_INTERVAL = 0.01
+
+_profile_lock = threading.Lock()
+
+def debug_token_matches(provided, expected):
+    """
+    Constant-time comparison of a debug token taken from `Authorization: Bearer <token>`
+    or `X-Debug-Token`.
+    """
+    if not provided or not expected:
+        return False
+    if provided.startswith('Bearer '):
+        provided = provided[len('Bearer '):]
+    return hmac.compare_digest(provided.strip().encode(), expected.encode())
+
+def deep_sizeof(obj, seen=None):
+    """
+    Approximate bytes held by `obj` and everything it references.
+
+    Pass the same `seen` dict across calls to count objects shared between
+    components only once (under the first component that reaches them).
+    """
+    if seen is None:
+        seen = {}
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, type):
+            continue
+        # Keep visited objects alive: temporaries such as __getstate__() results
+        # would otherwise be freed and their ids reused by later ones
+        seen[id(current)] = current
+
+        if isinstance(current, np.ndarray):
+            if isinstance(current.base, np.ndarray):
+                # A view: count the array that owns the buffer (once) instead of the view
+                total += sys.getsizeof(current)
+                stack.append(current.base)
+            else:
+                total += current.nbytes + sys.getsizeof(current[:0])
+            if current.dtype == object:
+                stack.extend(current.ravel())
+            continue
+        total += sys.getsizeof(current)
+        if isinstance(current, (str, bytes, bytearray, int, float, bool)) or current is None:
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__'):
+            stack.append(current.__dict__)
+        elif hasattr(current, '__getstate__'):
+            # Extension types such as sklearn's Tree keep their arrays outside __dict__
+            try:
+                state = current.__getstate__()
+            except Exception:
+                continue
+            if state is not None and not isinstance(state, type(current)):
+                stack.append(state)
+        if hasattr(current, '__slots__'):
+            stack.extend(getattr(current, name) for name in current.__slots__ if hasattr(current, name))
+    return total
+
+def component_sizes(components):
+    """
+    Bytes held by each named component, in order, with shared objects attributed to the first.
+    """
+    seen = {}
+    return {name: deep_sizeof(component, seen) for name, component in components.items()}
+
+def process_memory():
+    """
+    Current and peak resident set size of this process in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = peak if sys.platform == 'darwin' else peak * 1024
+    rss = None
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+class AllocationTracker:
+    """
+    tracemalloc snapshots diffed against the previous snapshot.
+    """
+    def __init__(self, frames=10):
+        self.frames = frames
+        self.previous = None
+        self._lock = threading.Lock()
+
+    def snapshot(self, top=20):
+        """
+        Take a snapshot. The first call starts tracing and returns no diff; later calls
+        return the `top` allocation sites by size change since the previous snapshot.
+        """
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self.previous = tracemalloc.take_snapshot()
+                return {"tracing": True, "baseline": True, "top_allocations": []}
+
+            current = tracemalloc.take_snapshot()
+            stats = current.compare_to(self.previous, 'lineno') if self.previous else []
+            self.previous = current
+            traced, peak = tracemalloc.get_traced_memory()
+            return {
+                "tracing": True,
+                "baseline": False,
+                "traced_bytes": traced,
+                "traced_peak_bytes": peak,
+                "top_allocations": [{
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_bytes": stat.size,
+                    "size_diff_bytes": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                } for stat in stats[:top]],
+            }
+
+    def stop(self):
+        with self._lock:
+            was_tracing = tracemalloc.is_tracing()
+            tracemalloc.stop()
+            self.previous = None
+            return {"tracing": False, "was_tracing": was_tracing}
+
+    def status(self):
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        traced, peak = tracemalloc.get_traced_memory()
+        return {"tracing": True, "traced_bytes": traced, "traced_peak_bytes": peak,
+                "overhead_bytes": tracemalloc.get_tracemalloc_memory()}
+
+def _frame_label(code):
+    # The function's first line rather than the current line, so samples of one function merge
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def sample_stacks(seconds, interval=PROFILE_INTERVAL):
+    """
+    Sample the stacks of all other threads every `interval` seconds for `seconds`.
+
+    Returns (collapsed stack counts, number of sampling rounds), or None when another
+    profile is already running in this process.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        own_thread = threading.get_ident()
+        stacks = Counter()
+        rounds = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            # Drop per-thread counters ("Thread-42 (process_request_thread)") so short-lived
+            # request threads merge into one root
+            names = {thread.ident: re.sub(r'-\d+', '', thread.name) for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+            rounds += 1
+            time.sleep(interval)
+        return stacks, rounds
+    finally:
+        _profile_lock.release()
+
+def collapsed_text(stacks):
+    """
+    Render stack counts in the collapsed format read by flamegraph tools, hottest first.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
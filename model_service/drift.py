@@ -0,0 +1,225 @@
+"""
+Constant-memory drift monitoring for model inputs and scores.
+
+Reference distributions are captured at training time as fixed-bin histograms
+whose edges are the training deciles. At serving time every observed value is
+added to a histogram with the same edges and to a few P-square quantile
+estimators, both O(1) per value and fixed in size no matter how much traffic
+is seen. PSI and a binned Kolmogorov-Smirnov statistic are computed from the
+histograms only when a report is requested.
+"""
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+# Quantiles tracked by the streaming sketches
+TRACKED_QUANTILES = (0.05, 0.5, 0.95)
+# Most values per variable fed to the quantile sketches from one batch; larger batches are
+# subsampled with a fixed stride (histograms, and so PSI/KS, still count every value)
+QUANTILE_SAMPLE_PER_BATCH = 32
+
+# Conventional PSI thresholds: < 0.1 stable, < 0.25 moderate shift, otherwise significant
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+class P2Quantile:
+    """
+    P-square streaming quantile estimator (Jain & Chlamtac, 1985).
+
+    Tracks a single quantile with five markers, so memory and per-update cost
+    are constant.
+    """
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect_right(q, x) - 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # Piecewise-parabolic prediction, falling back to linear if it leaves the bracket
+                candidate = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def value(self):
+        if not self.heights:
+            return None
+        if self.count <= 5:
+            return float(np.percentile(self.heights, self.p * 100))
+        return float(self.heights[2])
+
+class FixedBinHistogram:
+    """
+    Histogram over fixed interior edges; bin i holds values in [edges[i-1], edges[i]).
+    """
+    def __init__(self, edges, counts=None):
+        self.edges = list(edges)
+        self.counts = list(counts) if counts is not None else [0] * (len(self.edges) + 1)
+
+    def add(self, value):
+        self.counts[bisect_right(self.edges, value)] += 1
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+def build_reference(values, n_bins=10):
+    """
+    Build a reference distribution (decile edges, bin counts, quantiles) from training values.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    return {
+        'edges': edges.tolist(),
+        'counts': counts.tolist(),
+        'quantiles': {str(q): float(np.quantile(values, q)) for q in TRACKED_QUANTILES},
+    }
+
+def build_reference_distributions(X, feature_names, scores=None, n_bins=10):
+    """
+    Build reference distributions for every feature column of X and, optionally, the model scores.
+
+    The result is stored in the model bundle under 'reference_distributions'.
+    """
+    X = np.asarray(X, dtype=float)
+    reference = {name: build_reference(X[:, i], n_bins) for i, name in enumerate(feature_names)}
+    if scores is not None:
+        reference['confidence'] = build_reference(scores, n_bins)
+    return reference
+
+def population_stability_index(expected_counts, actual_counts, epsilon=1e-4):
+    expected = np.asarray(expected_counts, dtype=float)
+    actual = np.asarray(actual_counts, dtype=float)
+    expected = np.clip(expected / max(expected.sum(), 1), epsilon, None)
+    actual = np.clip(actual / max(actual.sum(), 1), epsilon, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def binned_ks_statistic(expected_counts, actual_counts):
+    """
+    Kolmogorov-Smirnov statistic evaluated at the shared bin edges.
+
+    This is a lower bound on the exact two-sample statistic, tight when the bins are fine.
+    """
+    expected = np.cumsum(expected_counts, dtype=float)
+    actual = np.cumsum(actual_counts, dtype=float)
+    if expected[-1] == 0 or actual[-1] == 0:
+        return 0.0
+    return float(np.max(np.abs(expected / expected[-1] - actual / actual[-1])))
+
+class DriftMonitor:
+    """
+    Live histograms and quantile sketches for every variable with a reference distribution.
+    """
+    def __init__(self, reference):
+        self.reference = reference
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {name: FixedBinHistogram(ref['edges']) for name, ref in self.reference.items()}
+            self.quantiles = {name: [P2Quantile(q) for q in TRACKED_QUANTILES] for name in self.reference}
+            self.observations = 0
+
+    def observe(self, values):
+        """
+        Add one observation; `values` maps variable names (features, 'confidence') to numbers.
+        """
+        with self._lock:
+            self.observations += 1
+            for name, histogram in self.histograms.items():
+                value = values.get(name)
+                if value is None:
+                    continue
+                value = float(value)
+                histogram.add(value)
+                for sketch in self.quantiles[name]:
+                    sketch.add(value)
+
+    def observe_batch(self, columns):
+        """
+        Add a batch of observations; `columns` maps variable names to equal-length sequences.
+        """
+        columns = {name: np.asarray(values, dtype=float) for name, values in columns.items()
+                   if name in self.histograms}
+        if not columns:
+            return
+        n = len(next(iter(columns.values())))
+        stride = max(1, -(-n // QUANTILE_SAMPLE_PER_BATCH))
+        with self._lock:
+            self.observations += n
+            for name, values in columns.items():
+                histogram = self.histograms[name]
+                bins = np.bincount(np.searchsorted(histogram.edges, values, side='right'),
+                                   minlength=len(histogram.counts))
+                histogram.counts = [c + int(b) for c, b in zip(histogram.counts, bins)]
+                for value in values[::stride].tolist():
+                    for sketch in self.quantiles[name]:
+                        sketch.add(value)
+
+    def report(self):
+        """
+        Compute PSI and KS for every monitored variable against its reference.
+        """
+        with self._lock:
+            snapshot = {name: (list(h.counts), [s.value() for s in self.quantiles[name]])
+                        for name, h in self.histograms.items()}
+            observations = self.observations
+
+        variables = {}
+        for name, (counts, live_quantiles) in snapshot.items():
+            reference = self.reference[name]
+            count = sum(counts)
+            psi = population_stability_index(reference['counts'], counts) if count else None
+            if psi is None:
+                status = 'no_data'
+            elif psi < PSI_MODERATE:
+                status = 'stable'
+            elif psi < PSI_SIGNIFICANT:
+                status = 'moderate'
+            else:
+                status = 'significant'
+            variables[name] = {
+                'count': count,
+                'psi': psi,
+                'ks': binned_ks_statistic(reference['counts'], counts) if count else None,
+                'status': status,
+                'quantiles': {str(q): v for q, v in zip(TRACKED_QUANTILES, live_quantiles)},
+                'reference_quantiles': reference.get('quantiles', {}),
+            }
+        return {'observations': observations, 'variables': variables}
@@ -1,17 +1,105 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+import io
 import joblib
+import json
 import numpy as np
 import os
+import random
+import threading
+import time
 from enum import Enum
 from typing import Dict, Any, Optional
 import pandas as pd
 from datetime import datetime
+from drift import DriftMonitor
+from explain import build_explainer, top_contributions
+from score_table import build_score_table, covers, flag_combinations
+from inference_threads import configure_worker, pin_model_threads, predict_proba
+from traffic_capture import TrafficRecorder
+from model_registry import FeatureSchema, ModelLoadError, ModelRegistry, file_version
+from load_shedding import AdmissionController, queue_delay_ms
+from audit_log import AuditLog
+from similarity import DEFAULT_K, nearest_fraud_distances
+from ip_screen import RELOAD_INTERVAL, IPBlocklist
+from jobs import JobManager, csv_lines, iter_lines, json_lines
+from debug_tools import (AllocationTracker, MAX_PROFILE_SECONDS, collapsed_text, component_sizes,
+                         debug_token_matches, process_memory, sample_stacks)
 
 # Model components will be loaded here
 model_data = None
 model = None
 scaler = None
 selected_features = None
+drift_monitor = None
+explainer = None
+score_table = None
+model_version = None
+fraud_index = None
+
+# Number of feature contributions returned per explained prediction
+EXPLAIN_TOP_K = int(os.getenv("EXPLAIN_TOP_K", 5))
+# Number of nearest known frauds whose distances are returned with similarity=true
+SIMILARITY_K = int(os.getenv("SIMILARITY_K", DEFAULT_K))
+# Reasons returned in place of the distances when similarity=true cannot be served
+NO_FRAUD_INDEX = "fraud index unavailable: the model bundle was trained without one"
+SHED_NO_SIMILARITY = "not computed: scored by the rule-based fallback while shedding load"
+# Score from precomputed per-flag-combination tables when the model allows it
+USE_SCORE_TABLE = os.getenv("SCORE_TABLE", "true").lower() in ("true", "1", "yes")
+# Seconds between background self-tests; probes return the latest result
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 30))
+# Synthetic batch sizes scored at startup so the first real requests don't pay lazy initialization
+WARM_UP_BATCH_SIZES = (1, 8, 64, 512)
+# Transactions scored per micro-batch by /predict/stream, and the longest accepted NDJSON line
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 256))
+MAX_STREAM_LINE_BYTES = 64 * 1024
+
+# Opt-in capture of /predict payloads for replay_traffic.py
+CAPTURE_PATH = os.getenv("CAPTURE_PATH")
+traffic_recorder = TrafficRecorder(CAPTURE_PATH) if CAPTURE_PATH else None
+
+# Optional JSON config of additional named models, routed to by a "model" request field
+MODEL_REGISTRY_PATH = os.getenv("MODEL_REGISTRY_PATH")
+model_registry = None
+
+# Latency SLO for /predict in milliseconds; requests predicted to miss it are scored by the
+# rule-based fallback instead of the model (0 disables load shedding)
+LOAD_SHED_SLO_MS = float(os.getenv("LOAD_SHED_SLO_MS", 0))
+admission_controller = AdmissionController(LOAD_SHED_SLO_MS) if LOAD_SHED_SLO_MS > 0 else None
+
+# `python flask_api.py` runs with the debug reloader, which imports this module twice: in a
+# file-watching parent that never serves requests, and in the serving child (WERKZEUG_RUN_MAIN).
+# Threads that write shared on-disk state (audit log, jobs) are only started in a serving process.
+SERVING_PROCESS = __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+# Directory for the audit log of every scoring decision (unset disables it)
+AUDIT_LOG_DIR = os.getenv("AUDIT_LOG_DIR")
+audit_log = None
+
+# Blocklist of IP addresses and CIDR blocks, reloaded when the file changes; transactions from a
+# listed ipAddress are flagged as fraud without being scored (unset disables screening)
+IP_BLOCKLIST_PATH = os.getenv("IP_BLOCKLIST_PATH")
+ip_blocklist = (IPBlocklist(IP_BLOCKLIST_PATH, float(os.getenv("IP_BLOCKLIST_RELOAD_INTERVAL", RELOAD_INTERVAL)))
+                .start_watcher() if IP_BLOCKLIST_PATH else None)
+
+# Directory for asynchronous scoring jobs and their SQLite state (unset disables the /jobs API)
+JOBS_DIR = os.getenv("JOBS_DIR")
+job_manager = None
+
+# Enables the sampling profiler at /debug/profile; every /debug endpoint requires it
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+# Opt-in /debug memory endpoints; when disabled, or without DEBUG_TOKEN, they are not registered at all
+DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "false").lower() in ("true", "1", "yes")
+if DEBUG_ENDPOINTS and not DEBUG_TOKEN:
+    # Unauthenticated clients could start tracemalloc and slow down the whole worker
+    print("DEBUG_ENDPOINTS ignored: set DEBUG_TOKEN to enable the /debug endpoints")
+    DEBUG_ENDPOINTS = False
+allocation_tracker = AllocationTracker() if DEBUG_ENDPOINTS else None
+
+# Latest self-test result, replaced as a whole by the self-test thread
+health_cache = {"status": "starting", "model_status": "unknown"}
+warmed_up = threading.Event()
+# Set if warm-up raised; the service still starts, but reports degraded and never ready
+warm_up_error = None
 
 # Define the risk levels
 class RiskLevel(str, Enum):
@@ -23,26 +111,40 @@ app = Flask(__name__)
 
 # Load the model on startup
 def load_model():
-    global model_data, model, scaler, selected_features
+    global model_data, model, scaler, selected_features, drift_monitor, explainer, score_table, model_version, fraud_index
     try:
         # Try to load the model if it exists
         model_path = os.getenv("MODEL_PATH", "credit_card_model.pkl")
         if os.path.exists(model_path):
             model_data = joblib.load(model_path)
-            model = model_data.get('model')
+            # Keep estimators from starting their own joblib pools; large batches are split by predict_proba
+            model = pin_model_threads(model_data.get('model'))
             scaler = model_data.get('scaler')
             selected_features = model_data.get('selected_features', ['V1', 'V2', 'V3', 'V4', 'V10', 'V11', 'V14', 'Amount'])
-            print(f"Model loaded successfully from {model_path}")
+            model_version = file_version(model_path)
+            print(f"Model loaded successfully from {model_path} (version {model_version})")
             print(f"Selected features: {selected_features}")
+            # Track live feature/score distributions if the bundle captured training references
+            reference = model_data.get('reference_distributions')
+            drift_monitor = DriftMonitor(reference) if reference else None
+            if drift_monitor is None:
+                print("Model bundle has no reference distributions; drift monitoring disabled")
+            # KD-tree of scaled known frauds for similarity=true, if the bundle has one
+            fraud_index = model_data.get('fraud_index')
+            explainer = build_explainer(model, selected_features)
+            if explainer is None:
+                print(f"No exact explainer for {type(model).__name__}; explain=true will be ignored")
+            score_table = None
+            if USE_SCORE_TABLE:
+                score_table = build_score_table(model, scaler, selected_features, FLAG_SPACE, features_from_flags)
+                if score_table is not None:
+                    print(f"Scoring from a precomputed {score_table.kind} table over {len(FLAG_SPACE)} flag combinations")
         else:
             print(f"Model file not found at {model_path}. Using fallback logic.")
     except Exception as e:
         print(f"Error loading model: {e}")
         print("Using fallback logic instead")
 
-# Load model at startup
-load_model()
-
 def map_transaction_to_features(request_data):
     """
     Maps the transaction data from the API request to a feature vector compatible with our model.
@@ -56,8 +158,45 @@ def map_transaction_to_features(request_data):
     
     For our demo, we'll approximate V1-V28 based on transaction properties.
     """
-    # Extract basic transaction properties
     amount = float(request_data.get("amount", 0))
+    return features_from_flags(transaction_flags(request_data, amount), amount)
+
+# Values each categorical flag can take; see transaction_flags
+CARD_ENTRY_FLAGS = ("manual", "online", "other")
+FLAG_SPACE = flag_combinations(CARD_ENTRY_FLAGS, *[(False, True)] * 5)
+
+def transaction_flags(request_data, amount):
+    """
+    Reduce a transaction to the categorical flags its features depend on:
+    (card entry, is_ecommerce, is_abnormal_location, is_high_amount, is_night, is_weekend).
+    """
+    card_entry = request_data.get("cardEntryMethod")
+    if card_entry not in ("manual", "online"):
+        card_entry = "other"
+    
+    is_night = is_weekend = False
+    if "timestamp" in request_data and request_data["timestamp"]:
+        try:
+            dt = datetime.fromisoformat(request_data["timestamp"].replace('Z', '+00:00'))
+            # Late night transactions might be riskier
+            is_night = dt.hour >= 22 or dt.hour <= 5
+            # Weekend transactions
+            is_weekend = dt.weekday() >= 5  # 5=Saturday, 6=Sunday
+        except:
+            pass
+    
+    return (card_entry,
+            request_data.get("merchantCategory") == "ecommerce",
+            request_data.get("location") == "abnormal",
+            amount > 1000,
+            is_night,
+            is_weekend)
+
+def features_from_flags(flags, amount):
+    """
+    Build the feature dictionary for a transaction from its flags and amount.
+    """
+    card_entry, is_ecommerce, is_abnormal, is_high_amount, is_night, is_weekend = flags
     
     # Generate a feature dictionary with default values
     features = {
@@ -75,51 +214,172 @@ def map_transaction_to_features(request_data):
     # Modify features based on transaction properties
     
     # Amount (higher amounts might be more suspicious)
-    if amount > 1000:
+    if is_high_amount:
         features['V2'] = -0.5  # Negative values in V2 often correlate with fraud
     
     # Card entry method
-    if request_data.get("cardEntryMethod") == "manual":
+    if card_entry == "manual":
         features['V4'] = -0.8  # Manual entry is riskier
         features['V10'] = -0.6
-    elif request_data.get("cardEntryMethod") == "online":
+    elif card_entry == "online":
         features['V3'] = -0.7  # Online transactions have certain patterns
         features['V11'] = -0.4
     
     # Merchant category
-    if request_data.get("merchantCategory") == "ecommerce":
+    if is_ecommerce:
         features['V1'] = -0.9  # E-commerce has specific patterns
         features['V3'] -= 0.3
     
     # Location (abnormal location is a strong fraud indicator)
-    if request_data.get("location") == "abnormal":
+    if is_abnormal:
         features['V1'] -= 1.0
         features['V4'] -= 0.9
         features['V14'] -= 0.8
     
     # Time-based features
-    if "timestamp" in request_data and request_data["timestamp"]:
-        try:
-            dt = datetime.fromisoformat(request_data["timestamp"].replace('Z', '+00:00'))
-            # Late night transactions might be riskier
-            if dt.hour >= 22 or dt.hour <= 5:
-                features['V11'] -= 0.5
-                features['V14'] -= 0.3
-            # Weekend transactions
-            if dt.weekday() >= 5:  # 5=Saturday, 6=Sunday
-                features['V1'] -= 0.2
-                features['V14'] -= 0.4
-        except:
-            pass
+    if is_night:
+        features['V11'] -= 0.5
+        features['V14'] -= 0.3
+    if is_weekend:
+        features['V1'] -= 0.2
+        features['V14'] -= 0.4
     
     return features
 
-def preprocess_input(request_data):
+def transaction_hour(request_data, default=12):
+    """
+    Hour of day of the transaction timestamp, or `default` when it is missing or malformed.
+    """
+    try:
+        return datetime.fromisoformat(request_data["timestamp"].replace('Z', '+00:00')).hour
+    except (KeyError, AttributeError, TypeError, ValueError):
+        return default
+
+class TransactionInputs:
+    """
+    Per-transaction inputs of a request batch, shared by every model that scores part of it.
+    Amounts and flags are computed up front; derived columns on first use, once per batch.
+    """
+    def __init__(self, transactions):
+        self.transactions = transactions
+        self.amounts = [float(t.get("amount", 0)) for t in transactions]
+        self.flags_list = [transaction_flags(t, amount) for t, amount in zip(transactions, self.amounts)]
+        self._columns = {}
+    
+    # Simple-schema columns that are one of the transaction flags (see transaction_flags)
+    FLAG_COLUMNS = {"is_ecommerce": 1, "location_mismatch": 2, "is_weekend": 5}
+    
+    def column(self, name):
+        if name not in self._columns:
+            if name == "amount":
+                values = self.amounts
+            elif name in ("is_online", "is_manual"):
+                values = [flags[0] == name[len("is_"):] for flags in self.flags_list]
+            elif name in self.FLAG_COLUMNS:
+                values = [flags[self.FLAG_COLUMNS[name]] for flags in self.flags_list]
+            elif name == "hour_of_day":
+                values = [transaction_hour(t) for t in self.transactions]
+            else:
+                raise ValueError(f"No input column for feature {name!r}")
+            self._columns[name] = np.asarray(values, dtype=float)
+        return self._columns[name]
+    
+    def credit_card_features(self):
+        if "creditcard" not in self._columns:
+            self._columns["creditcard"] = [features_from_flags(flags, amount)
+                                           for flags, amount in zip(self.flags_list, self.amounts)]
+        return self._columns["creditcard"]
+
+def credit_card_matrix(feature_names, inputs, rows):
+    features_list = inputs.credit_card_features()
+    return np.array([[features_list[i][f] for f in feature_names] for i in rows])
+
+def column_matrix(feature_names, inputs, rows):
+    return np.column_stack([inputs.column(f)[rows] for f in feature_names])
+
+# Feature layouts served through the model registry: this service's credit card model,
+# the 4-feature model of app.py and the 7-feature dashboard pipeline of streamlit_app.py
+FEATURE_SCHEMAS = {
+    "creditcard": FeatureSchema("creditcard", ['V1', 'V2', 'V3', 'V4', 'V10', 'V11', 'V14', 'Amount'], credit_card_matrix),
+    "basic4": FeatureSchema("basic4", ['amount', 'is_online', 'is_manual', 'is_ecommerce'], column_matrix),
+    "synthetic7": FeatureSchema("synthetic7", ['amount', 'is_online', 'is_manual', 'is_ecommerce',
+                                               'hour_of_day', 'is_weekend', 'location_mismatch'], column_matrix),
+}
+
+# Pin native thread pools (and CPU affinity if configured) before any scoring
+print(f"Inference threads: {configure_worker()}")
+
+# Load model at startup (after the feature mapping, which the score table is built from)
+load_model()
+
+def audit_features(transaction, model_name=None):
+    """
+    Unscaled feature vector a transaction was scored on. Recomputed from the
+    transaction on the audit writer thread instead of being kept by the request.
+    """
+    if model_name and model_registry is not None and model_name in model_registry:
+        schema = FEATURE_SCHEMAS[model_registry.specs[model_name]["schema"]]
+        matrix = schema.build(schema.feature_names, TransactionInputs([transaction]), [0])
+        return dict(zip(schema.feature_names, matrix[0].tolist()))
+    features = map_transaction_to_features(transaction)
+    return {feature: features[feature] for feature in (selected_features or features)}
+
+def describe_decision(record):
+    """
+    Audit log entry for a queued (time, endpoint, transaction, result, latency, version) record.
+    """
+    decided_at, endpoint, transaction, result, latency_ms, version = record
+    model_name = result.get("model")
+    if result.get("blocked"):
+        scoring = result["blocked"]
+    elif result.get("degraded") or (model is None and not model_name):
+        scoring = "rules"
+    else:
+        scoring = "model"
+    return {
+        "time": datetime.fromtimestamp(decided_at).isoformat(),
+        "endpoint": endpoint,
+        "input": transaction,
+        # Blocked transactions are decided before any feature mapping
+        "features": audit_features(transaction, model_name) if not result.get("blocked") else None,
+        "confidence": result["confidence"],
+        "is_fraud": result["is_fraud"],
+        "risk_level": result["risk_level"],
+        "model": model_name,
+        "model_version": result.get("model_version", version) if scoring == "model" else None,
+        "scoring": scoring,
+        "latency_ms": round(latency_ms, 3),
+    }
+
+def audit_decisions(endpoint, transactions, results, started):
+    """
+    Queue the decisions of one request (or stream micro-batch) for the audit log.
+    """
+    decided_at = time.time()
+    latency_ms = (decided_at - started) * 1000
+    for transaction, result in zip(transactions, results):
+        if "error" not in result:
+            audit_log.record(decided_at, endpoint, transaction, result, latency_ms, model_version)
+
+if AUDIT_LOG_DIR and SERVING_PROCESS:
+    audit_log = AuditLog(AUDIT_LOG_DIR, describe_decision,
+                         max_queue=int(os.getenv("AUDIT_QUEUE_SIZE", 100000)),
+                         segment_bytes=int(float(os.getenv("AUDIT_SEGMENT_MB", 64)) * 1024 * 1024))
+    print(f"Audit log: {AUDIT_LOG_DIR}")
+
+if MODEL_REGISTRY_PATH:
+    model_registry = ModelRegistry.from_config(MODEL_REGISTRY_PATH, FEATURE_SCHEMAS)
+    model_registry.preload()
+    print(f"Model registry: {', '.join(model_registry.names())}")
+
+def preprocess_input(request_data, features=None):
     """
     Preprocess the input data for the model.
+    Pass `features` if they were already mapped for this request.
     """
     # Map transaction data to features
-    features = map_transaction_to_features(request_data)
+    if features is None:
+        features = map_transaction_to_features(request_data)
     
     # Create a feature vector keeping only the selected features in the correct order
     feature_vector = np.array([[features[feature] for feature in selected_features]])
@@ -141,27 +401,300 @@ def get_risk_level(confidence: float) -> RiskLevel:
     else:
         return RiskLevel.low
 
+def rule_based_score(features):
+    """
+    Simple rule-based fallback score based on transaction properties.
+    """
+    prediction = 0.1  # Default low probability
+    
+    # Rule 1: High amounts are suspicious
+    amount = features["Amount"]
+    if amount > 2000:
+        prediction += 0.5
+    elif amount > 1000:
+        prediction += 0.3
+    
+    # Rule 2: Negative values in important V features often indicate fraud
+    fraud_signals = 0
+    for v_feature in ['V1', 'V2', 'V3', 'V4', 'V10', 'V11', 'V14']:
+        if v_feature in features and features[v_feature] < -0.5:
+            fraud_signals += 1
+    
+    # Add risk based on number of fraud signals
+    prediction += 0.1 * fraud_signals
+    
+    # Cap at 1.0
+    return min(prediction, 1.0)
+
+def explain_rules(features):
+    """
+    Exact contributions of the rule-based fallback score, in probability points.
+    """
+    contributions = []
+    amount = features["Amount"]
+    if amount > 2000:
+        contributions.append({"feature": "Amount", "value": amount, "contribution": 0.5})
+    elif amount > 1000:
+        contributions.append({"feature": "Amount", "value": amount, "contribution": 0.3})
+    for v_feature in ['V1', 'V2', 'V3', 'V4', 'V10', 'V11', 'V14']:
+        if v_feature in features and features[v_feature] < -0.5:
+            contributions.append({"feature": v_feature, "value": features[v_feature], "contribution": 0.1})
+    return {"method": "rules", "space": "probability", "base_value": 0.1, "contributions": contributions}
+
+def observe_drift(raw_matrix, predictions):
+    """
+    Add a scored batch (unscaled selected features and fraud probabilities) to the drift monitor.
+    """
+    columns = {feature: raw_matrix[:, i] for i, feature in enumerate(selected_features)}
+    columns["confidence"] = predictions
+    drift_monitor.observe_batch(columns)
+
+def score_batch(transactions, explain=False, amounts=None, flags_list=None, similarity=False):
+    """
+    Score a list of transactions with one vectorized model call and build their responses.
+    With `explain`, each response also carries its top feature contributions, and with
+    `similarity` the distances to the nearest known frauds (if the bundle has an index).
+    Pass `amounts` and `flags_list` if they were already computed for these transactions.
+    """
+    if amounts is None:
+        amounts = [float(t.get("amount", 0)) for t in transactions]
+        flags_list = [transaction_flags(t, amount) for t, amount in zip(transactions, amounts)]
+    explanations = distances = similarity_unavailable = None
+    if similarity and fraud_index is None:
+        similarity, similarity_unavailable = False, NO_FRAUD_INDEX
+    
+    if score_table is not None and not explain and not similarity and covers(amounts):
+        # One table lookup plus an amount term per transaction
+        predictions = score_table.score(flags_list, amounts)
+        
+        if drift_monitor is not None:
+            features_list = [features_from_flags(flags, amount) for flags, amount in zip(flags_list, amounts)]
+            observe_drift(np.array([[features[f] for f in selected_features] for features in features_list]),
+                          predictions)
+        return build_responses(predictions, similarity_unavailable=similarity_unavailable)
+    
+    features_list = [features_from_flags(flags, amount) for flags, amount in zip(flags_list, amounts)]
+    
+    # Use the model if it's loaded, otherwise use fallback logic
+    if model is not None and scaler is not None:
+        # Build the feature matrix keeping only the selected features in the correct order
+        raw_matrix = np.array([[features[feature] for feature in selected_features] for features in features_list])
+        feature_matrix = scaler.transform(raw_matrix)
+        
+        # Get predictions from model
+        predictions = predict_proba(model, feature_matrix)[:, 1]  # Probability of class 1 (fraud)
+        
+        # Update drift sketches (constant time per transaction)
+        if drift_monitor is not None:
+            observe_drift(raw_matrix, predictions)
+        
+        if explain and explainer is not None:
+            explanations = top_contributions(explainer, feature_matrix, raw_matrix, EXPLAIN_TOP_K)
+        if similarity:
+            distances = nearest_fraud_distances(fraud_index, feature_matrix, SIMILARITY_K)
+    else:
+        # Fallback logic when model isn't available
+        predictions = [rule_based_score(features) for features in features_list]
+        if explain:
+            explanations = [explain_rules(features) for features in features_list]
+    
+    return build_responses(predictions, explanations, distances, similarity_unavailable)
+
+def build_responses(predictions, explanations=None, distances=None, similarity_unavailable=None):
+    """
+    Turn fraud probabilities (and optional explanations and nearest-fraud distances) into prediction responses.
+    When similarity was requested but no distances could be computed, `similarity_unavailable`
+    gives the reason, returned in place of the distances.
+    """
+    results = []
+    for i, prediction in enumerate(predictions):
+        result = {
+            "is_fraud": bool(prediction > 0.5),
+            "confidence": float(prediction),  # Convert numpy types to Python float if needed
+            "risk_level": get_risk_level(prediction).value  # Need to extract string value from enum
+        }
+        if explanations is not None:
+            result["explanation"] = explanations[i]
+        if distances is not None:
+            result["similarity"] = {"nearest_fraud_distances": distances[i].tolist()}
+        elif similarity_unavailable is not None:
+            result["similarity"] = {"nearest_fraud_distances": None, "unavailable": similarity_unavailable}
+        results.append(result)
+    return results
+
+class UnknownModelError(ValueError):
+    pass
+
+def check_models(names):
+    """
+    Raise UnknownModelError if any non-empty name is not a registry model.
+    """
+    unknown = {name for name in names if name and (model_registry is None or name not in model_registry)}
+    if unknown:
+        available = ', '.join(model_registry.names()) if model_registry is not None else 'none configured'
+        raise UnknownModelError(f"Unknown model {', '.join(sorted(unknown))} (available: {available})")
+
+def blocked_result():
+    """
+    Response for a transaction from a blocklisted IP address.
+    """
+    return {"is_fraud": True, "confidence": 1.0, "risk_level": RiskLevel.high.value, "blocked": "ip_blocklist"}
+
+def is_blocked(request_data):
+    return ip_blocklist is not None and ip_blocklist.contains(request_data.get("ipAddress"))
+
+def score_requests(transactions, explain=False, default_model=None, similarity=False, screen=True):
+    """
+    Score transactions, routing each to the registry model named by its "model" field
+    (or `default_model`); transactions without one use the service's own model.
+    With `screen`, transactions from blocklisted IP addresses are answered first and never scored.
+    """
+    if screen and ip_blocklist is not None:
+        blocked = [is_blocked(t) for t in transactions]
+        if any(blocked):
+            rows = [i for i, is_listed in enumerate(blocked) if not is_listed]
+            scored = score_requests([transactions[i] for i in rows], explain, default_model, similarity,
+                                    screen=False) if rows else []
+            results = [blocked_result() if is_listed else None for is_listed in blocked]
+            for i, result in zip(rows, scored):
+                results[i] = result
+            return results
+    
+    names = [t.get("model", default_model) for t in transactions]
+    if not any(names):
+        return score_batch(transactions, explain, similarity=similarity)
+    check_models(names)
+    
+    inputs = TransactionInputs(transactions)
+    groups = {}
+    for i, name in enumerate(names):
+        groups.setdefault(name, []).append(i)
+    
+    results = [None] * len(transactions)
+    for name, rows in groups.items():
+        if not name:
+            group_results = score_batch([transactions[i] for i in rows], explain,
+                                        [inputs.amounts[i] for i in rows], [inputs.flags_list[i] for i in rows],
+                                        similarity)
+        else:
+            entry = model_registry.get(name)
+            raw_matrix, feature_matrix, predictions = entry.predict(inputs, rows)
+            explanations = distances = similarity_unavailable = None
+            if explain and entry.explainer is not None:
+                explanations = top_contributions(entry.explainer, feature_matrix, raw_matrix, EXPLAIN_TOP_K)
+            if similarity and entry.fraud_index is not None:
+                distances = nearest_fraud_distances(entry.fraud_index, feature_matrix, SIMILARITY_K)
+            elif similarity:
+                similarity_unavailable = NO_FRAUD_INDEX
+            group_results = build_responses(predictions, explanations, distances, similarity_unavailable)
+            for result in group_results:
+                result["model"] = name
+                result["model_version"] = entry.version
+        for i, result in zip(rows, group_results):
+            results[i] = result
+    return results
+
+def score_transaction(request_data, explain=False, model_name=None, similarity=False, screen=True):
+    """
+    Score a single transaction and build the prediction response.
+    Shared by the HTTP endpoint and the Unix socket listener.
+    """
+    return score_requests([request_data], explain, model_name, similarity, screen)[0]
+
+def score_socket_transaction(request_data):
+    """
+    Score one transaction received over the Unix socket, audited like /predict.
+    """
+    started = time.time()
+    result = score_transaction(request_data)
+    if audit_log is not None:
+        audit_decisions('/socket', [request_data], [result], started)
+    return result
+
+def score_with_rules(transactions, explain=False, similarity=False):
+    """
+    Score transactions with the rule-based fallback only, flagged as degraded.
+    Used instead of the model while shedding load.
+    """
+    features_list = [map_transaction_to_features(t) for t in transactions]
+    explanations = [explain_rules(features) for features in features_list] if explain else None
+    results = build_responses([rule_based_score(features) for features in features_list], explanations,
+                              similarity_unavailable=SHED_NO_SIMILARITY if similarity else None)
+    for result in results:
+        result["degraded"] = True
+    return results
+
+def requested_model(request_data=None):
+    """
+    Default model name for a request: the ?model= query parameter or a top-level "model" field.
+    """
+    if isinstance(request_data, dict) and request_data.get('model'):
+        return request_data['model']
+    return request.args.get('model')
+
+def request_flag(request_data, name):
+    """
+    A boolean option such as explain=true, passed as a query parameter or a JSON body field.
+    """
+    value = request.args.get(name, request_data.get(name) if isinstance(request_data, dict) else None)
+    return str(value).lower() in ('true', '1', 'yes')
+
+def wants_explanation(request_data):
+    return request_flag(request_data, 'explain')
+
+def wants_similarity(request_data):
+    return request_flag(request_data, 'similarity')
+
 @app.route('/')
 def root():
     return jsonify({"message": "Credit Card Fraud Detection API", "status": "active"})
 
-@app.route('/health')
-def health():
-    """Health check endpoint for monitoring"""
+def warm_up():
+    """
+    Score synthetic batches of representative sizes through every scoring path
+    (table, full model, explainer) before the service reports ready.
+    """
+    rng = random.Random(0)
+    start = time.perf_counter()
+    try:
+        for size in WARM_UP_BATCH_SIZES:
+            transactions = [{
+                "amount": round(rng.expovariate(1 / 500), 2),
+                "merchantCategory": rng.choice(["retail", "ecommerce", "travel", "electronics"]),
+                "cardEntryMethod": rng.choice(["chip", "online", "manual", "contactless"]),
+                "location": rng.choice(["normal", "abnormal"]),
+                "timestamp": f"2025-04-0{rng.randint(1, 7)}T{rng.randint(0, 23):02d}:15:00Z",
+            } for _ in range(size)]
+            score_batch(transactions)
+            score_batch(transactions, explain=True)
+    finally:
+        # Synthetic traffic must not count towards drift, even if warm-up stopped part way
+        if drift_monitor is not None:
+            drift_monitor.reset()
+    warmed_up.set()
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+def run_self_test():
+    """
+    Check that the model can make a basic prediction and cache the result for health probes.
+    """
+    global health_cache
     health_status = {
         "status": "ok",
-        "timestamp": datetime.now().isoformat(),
         "version": "1.0.0",
-        "model_loaded": model is not None
+        "model_loaded": model is not None,
+        "score_table": score_table.kind if score_table is not None else None
     }
     
-    # Check if the model can make a basic prediction
+    start = time.perf_counter()
     if model is not None:
         try:
             # Create a test feature vector with the correct number of features
             if selected_features:
                 test_features = np.zeros((1, len(selected_features)))
                 model.predict_proba(test_features)
+                if score_table is not None:
+                    score_table.score(FLAG_SPACE[:1], [0.0])
                 health_status["model_status"] = "ok"
             else:
                 health_status["model_status"] = "error"
@@ -175,11 +708,82 @@ def health():
         health_status["model_status"] = "not_loaded"
         health_status["status"] = "degraded"
     
+    if warm_up_error is not None:
+        health_status["warm_up_error"] = warm_up_error
+        health_status["status"] = "degraded"
+    
+    health_status["self_test_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    health_status["checked_at"] = datetime.now().isoformat()
+    health_cache = health_status
+
+def self_test_loop():
+    while True:
+        time.sleep(HEALTH_CHECK_INTERVAL)
+        run_self_test()
+
+@app.route('/health')
+def health():
+    """Health check endpoint for monitoring (returns the latest background self-test)"""
+    health_status = dict(health_cache, timestamp=datetime.now().isoformat(), warmed_up=warmed_up.is_set())
+    if admission_controller is not None:
+        health_status["load_shedding"] = admission_controller.status()
+    if ip_blocklist is not None:
+        health_status["ip_blocklist"] = ip_blocklist.stats()
+    if job_manager is not None:
+        health_status["jobs"] = job_manager.stats()
     status_code = 200 if health_status["status"] == "ok" else 500
     return jsonify(health_status), status_code
 
+@app.route('/live')
+def live():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({"status": "alive", "timestamp": datetime.now().isoformat()})
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: warm-up is done and the latest self-test passed"""
+    is_ready = warmed_up.is_set() and health_cache["status"] == "ok"
+    return jsonify({
+        "status": "ready" if is_ready else "not_ready",
+        "warmed_up": warmed_up.is_set(),
+        "model_status": health_cache["model_status"],
+        "checked_at": health_cache.get("checked_at"),
+    }), 200 if is_ready else 503
+
+@app.route('/models')
+def models():
+    """List the registry models with their load state, version, size and usage"""
+    if model_registry is None:
+        return jsonify({"error": "Model registry not configured (set MODEL_REGISTRY_PATH)"}), 404
+    return jsonify(model_registry.status())
+
+@app.route('/audit/stats')
+def audit_stats():
+    """Audit log queue depth, written/dropped counts and segment files"""
+    if audit_log is None:
+        return jsonify({"error": "Audit log disabled (set AUDIT_LOG_DIR)"}), 404
+    return jsonify(audit_log.stats())
+
+@app.route('/drift')
+def drift():
+    """Report PSI/KS drift of live features and scores against the training distributions"""
+    if drift_monitor is None:
+        return jsonify({"error": "Drift monitoring unavailable: model bundle has no reference distributions"}), 404
+    report = drift_monitor.report()
+    report["timestamp"] = datetime.now().isoformat()
+    return jsonify(report)
+
+@app.route('/drift/reset', methods=['POST'])
+def drift_reset():
+    """Start a new live window for drift monitoring"""
+    if drift_monitor is None:
+        return jsonify({"error": "Drift monitoring unavailable: model bundle has no reference distributions"}), 404
+    drift_monitor.reset()
+    return jsonify({"status": "reset", "timestamp": datetime.now().isoformat()})
+
 @app.route('/predict', methods=['POST'])
 def predict():
+    arrival_time = time.time()
     try:
         # Get request data
         request_data = request.get_json()
@@ -188,53 +792,362 @@ def predict():
         if not request_data or 'amount' not in request_data:
             return jsonify({"error": "Invalid request data"}), 400
         
-        # Use the model if it's loaded, otherwise use fallback logic
-        if model is not None and scaler is not None:
-            # Preprocess the input and get feature vector
-            feature_vector = preprocess_input(request_data)
-            
-            # Get prediction from model
-            prediction = model.predict_proba(feature_vector)[0][1]  # Probability of class 1 (fraud)
-            is_fraud = prediction > 0.5
+        if traffic_recorder is not None:
+            try:
+                # The raw query bytes, so non-ASCII values replay exactly as they were sent
+                request_path = request.path.encode('utf-8')
+                if request.query_string:
+                    request_path += b"?" + request.query_string
+                traffic_recorder.record(arrival_time, request_path, request.get_data())
+            except (OSError, ValueError) as e:
+                print(f"Traffic capture error: {e}")
+        
+        explain, model_name = wants_explanation(request_data), requested_model(request_data)
+        similarity = wants_similarity(request_data)
+        if is_blocked(request_data):
+            # Known-bad addresses are answered before admission control and feature mapping
+            result = blocked_result()
+        elif admission_controller is None:
+            result = score_transaction(request_data, explain, model_name, similarity, screen=False)
         else:
-            # Fallback logic when model isn't available
-            features = map_transaction_to_features(request_data)
-            
-            # Simple rule-based fallback based on transaction properties
-            prediction = 0.1  # Default low probability
-            
-            # Rule 1: High amounts are suspicious
-            amount = features["Amount"]
-            if amount > 2000:
-                prediction += 0.5
-            elif amount > 1000:
-                prediction += 0.3
-            
-            # Rule 2: Negative values in important V features often indicate fraud
-            fraud_signals = 0
-            for v_feature in ['V1', 'V2', 'V3', 'V4', 'V10', 'V11', 'V14']:
-                if v_feature in features and features[v_feature] < -0.5:
-                    fraud_signals += 1
-            
-            # Add risk based on number of fraud signals
-            prediction += 0.1 * fraud_signals
-            
-            # Cap at 1.0
-            prediction = min(prediction, 1.0)
-                
-            is_fraud = prediction > 0.5
+            token = admission_controller.admit(queue_delay_ms(request.headers.get('X-Request-Start'), arrival_time))
+            if token is None:
+                check_models([model_name])
+                result = score_with_rules([request_data], explain, similarity)[0]
+            else:
+                try:
+                    result = score_transaction(request_data, explain, model_name, similarity, screen=False)
+                finally:
+                    admission_controller.done(token)
         
-        # Determine risk level
-        risk_level = get_risk_level(prediction)
+        if audit_log is not None:
+            audit_decisions('/predict', [request_data], [result], arrival_time)
+        return jsonify(result)
+    except UnknownModelError as e:
+        return jsonify({"error": str(e)}), 400
+    except ModelLoadError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": f"Prediction error: {str(e)}"}), 500
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Score many transactions in one vectorized call"""
+    arrival_time = time.time()
+    try:
+        request_data = request.get_json()
         
-        return jsonify({
-            "is_fraud": is_fraud,
-            "confidence": float(prediction),  # Convert numpy types to Python float if needed
-            "risk_level": risk_level.value  # Need to extract string value from enum
-        })
+        # Accept either a bare list or {"transactions": [...]}
+        transactions = request_data.get('transactions') if isinstance(request_data, dict) else request_data
+        if not isinstance(transactions, list) or not transactions:
+            return jsonify({"error": "Invalid request data"}), 400
+        invalid = [i for i, t in enumerate(transactions) if not isinstance(t, dict) or 'amount' not in t]
+        if invalid:
+            return jsonify({"error": "Invalid request data", "invalid_indices": invalid[:100]}), 400
+        
+        results = score_requests(transactions, wants_explanation(request_data), requested_model(request_data),
+                                 wants_similarity(request_data))
+        if audit_log is not None:
+            audit_decisions('/predict/batch', transactions, results, arrival_time)
+        return jsonify({"results": results})
+    except UnknownModelError as e:
+        return jsonify({"error": str(e)}), 400
+    except ModelLoadError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": f"Prediction error: {str(e)}"}), 500
 
+def iter_ndjson(stream):
+    """
+    Read NDJSON transactions from `stream` one line at a time.
+    Yields (line_number, transaction) for valid lines and (line_number, error message) otherwise.
+    """
+    line_number = 0
+    while True:
+        line = stream.readline(MAX_STREAM_LINE_BYTES + 1)
+        if not line:
+            return
+        line_number += 1
+        if len(line) > MAX_STREAM_LINE_BYTES and not line.endswith(b"\n"):
+            # Discard the rest of an overlong line without buffering it
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(MAX_STREAM_LINE_BYTES + 1)
+            yield line_number, f"Line exceeds {MAX_STREAM_LINE_BYTES} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            transaction = json.loads(line)
+        except ValueError:
+            yield line_number, "Invalid JSON"
+            continue
+        if not isinstance(transaction, dict) or 'amount' not in transaction:
+            yield line_number, "Invalid request data"
+            continue
+        yield line_number, transaction
+
+def score_stream_batch(batch, explain=False, model_name=None, similarity=False, endpoint='/predict/stream'):
+    """
+    Score one micro-batch of (line_number, transaction or error) items into NDJSON output lines.
+    """
+    started = time.time()
+    transactions = [item for _, item in batch if isinstance(item, dict)]
+    try:
+        results = score_requests(transactions, explain, model_name, similarity) if transactions else []
+    except Exception:
+        # Score one by one so a single bad transaction doesn't fail its whole micro-batch
+        results = []
+        for transaction in transactions:
+            try:
+                results.append(score_transaction(transaction, explain, model_name, similarity))
+            except Exception as e:
+                results.append({"error": f"Prediction error: {str(e)}"})
+    if audit_log is not None:
+        audit_decisions(endpoint, transactions, results, started)
+    
+    results = iter(results)
+    lines = []
+    for line_number, item in batch:
+        result = next(results) if isinstance(item, dict) else {"error": item}
+        if "error" in result:
+            result = dict(result, line=line_number)
+        lines.append(json.dumps(result))
+    return "\n".join(lines) + "\n"
+
+def request_body_stream():
+    """
+    The request body as a buffered binary stream that can be read line by line.
+    """
+    stream = request.stream
+    if isinstance(stream, io.RawIOBase):
+        # Werkzeug's input streams are unbuffered, so readline() would read one byte per call
+        stream = io.BufferedReader(stream, MAX_STREAM_LINE_BYTES)
+    return stream
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    Score an NDJSON body (one transaction per line) and stream NDJSON results back.
+    
+    Input is read and scored in micro-batches only as fast as the client consumes the
+    output, so memory stays bounded no matter how large the upload is.
+    """
+    explain = wants_explanation(None)
+    model_name = requested_model()
+    similarity = wants_similarity(None)
+    stream = request_body_stream()
+    
+    def generate():
+        batch = []
+        for item in iter_ndjson(stream):
+            batch.append(item)
+            if len(batch) >= STREAM_BATCH_SIZE:
+                yield score_stream_batch(batch, explain, model_name, similarity)
+                batch = []
+        if batch:
+            yield score_stream_batch(batch, explain, model_name, similarity)
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def score_job_chunk(data, first_line, options):
+    """
+    Score one chunk of a /jobs input: NDJSON bytes whose first line has number `first_line`.
+    """
+    batch = [(first_line + line_number - 1, item) for line_number, item in iter_ndjson(io.BytesIO(data))]
+    if not batch:
+        return ""
+    return score_stream_batch(batch, options.get("explain", False), options.get("model"),
+                              options.get("similarity", False), endpoint='/jobs')
+
+def jobs_disabled():
+    return jsonify({"error": "Job API disabled (set JOBS_DIR)"}), 404
+
+def job_not_found(job_id):
+    return jsonify({"error": f"Job {job_id} not found"}), 404
+
+def describe_job(job):
+    if job["status"] == "done":
+        job["result_url"] = f"/jobs/{job['id']}/result"
+    return job
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a scoring job and return its id right away. Accepts an NDJSON body, a JSON list
+    (or {"transactions": [...]}), or a multipart upload of a CSV or NDJSON file as "file".
+    """
+    if job_manager is None:
+        return jobs_disabled()
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            request_data = request.form.to_dict()
+            if upload.mimetype == 'text/csv' or (upload.filename or '').lower().endswith('.csv'):
+                lines = csv_lines(io.TextIOWrapper(upload.stream, encoding='utf-8', newline=''))
+            else:
+                lines = iter_lines(upload.stream)
+        elif request.mimetype == 'application/json':
+            request_data = request.get_json()
+            transactions = request_data.get('transactions') if isinstance(request_data, dict) else request_data
+            if not isinstance(transactions, list) or not transactions:
+                return jsonify({"error": "Invalid request data"}), 400
+            lines = json_lines(transactions)
+        else:
+            request_data = None
+            lines = iter_lines(request_body_stream())
+        
+        options = {"explain": wants_explanation(request_data), "model": requested_model(request_data),
+                   "similarity": wants_similarity(request_data)}
+        check_models([options["model"]])
+        job = job_manager.submit(lines, options)
+        return jsonify(describe_job(job)), 202, {"Location": f"/jobs/{job['id']}"}
+    except UnknownModelError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Job submission error: {str(e)}"}), 500
+
+@app.route('/jobs')
+def list_jobs():
+    """Most recent jobs first"""
+    if job_manager is None:
+        return jobs_disabled()
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify({"jobs": [describe_job(job) for job in job_manager.list(limit)]})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status and progress of a job"""
+    if job_manager is None:
+        return jobs_disabled()
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    return jsonify(describe_job(job))
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Stream the NDJSON results of a finished job, in input order"""
+    if job_manager is None:
+        return jobs_disabled()
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found(job_id)
+    if job["status"] != "done":
+        return jsonify({"error": f"Job {job_id} is {job['status']}", "status": job["status"],
+                        "progress": job["progress"]}), 409
+    return Response(job_manager.iter_result(job_id), mimetype="application/x-ndjson",
+                    headers={"Content-Disposition": f"attachment; filename=job-{job_id}.ndjson"})
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Cancel a job and delete its input and results"""
+    if job_manager is None:
+        return jobs_disabled()
+    if not job_manager.delete(job_id):
+        return job_not_found(job_id)
+    return jsonify({"id": job_id, "status": "deleted"})
+
+def memory_components():
+    """
+    Long-lived objects whose size is reported by /debug/memory, largest consumers first.
+    """
+    bundle_extras = {k: v for k, v in (model_data or {}).items()
+                     if k not in ('model', 'scaler', 'selected_features', 'fraud_index')}
+    return {
+        "model": model,
+        "scaler": scaler,
+        "score_table": score_table,
+        "explainer": explainer,
+        "drift_monitor": drift_monitor,
+        "bundle_extras": bundle_extras,
+        "fraud_index": fraud_index,
+        "ip_blocklist": ip_blocklist,
+        "health_cache": health_cache,
+        "model_registry": model_registry,
+    }
+
+if DEBUG_ENDPOINTS:
+    @app.route('/debug/memory')
+    def debug_memory():
+        """Per-component sizes, process RSS and tracemalloc status"""
+        sizes = component_sizes(memory_components())
+        return jsonify({
+            "components_bytes": sizes,
+            "components_total_bytes": sum(sizes.values()),
+            "process": process_memory(),
+            # Upper bound on what one /predict/stream request buffers before scoring a micro-batch
+            "stream_batch_limit_bytes": STREAM_BATCH_SIZE * MAX_STREAM_LINE_BYTES,
+            "tracemalloc": allocation_tracker.status(),
+            "timestamp": datetime.now().isoformat(),
+        })
+
+    @app.route('/debug/memory/snapshot', methods=['POST'])
+    def debug_memory_snapshot():
+        """Start tracemalloc on the first call; later calls return the top allocation changes since the last one"""
+        try:
+            top = int(request.args.get('top', 20))
+        except ValueError:
+            return jsonify({"error": "top must be an integer"}), 400
+        return jsonify(allocation_tracker.snapshot(top))
+
+    @app.route('/debug/memory/stop', methods=['POST'])
+    def debug_memory_stop():
+        """Stop tracemalloc and drop the stored snapshot"""
+        return jsonify(allocation_tracker.stop())
+
+if DEBUG_TOKEN:
+    @app.before_request
+    def require_debug_token():
+        if request.path.startswith('/debug/'):
+            provided = request.headers.get('Authorization') or request.headers.get('X-Debug-Token')
+            if not debug_token_matches(provided, DEBUG_TOKEN):
+                return jsonify({"error": "Unauthorized"}), 401
+
+    @app.route('/debug/profile')
+    def debug_profile():
+        """Sample all request and background threads for ?seconds=N and return collapsed stacks"""
+        try:
+            seconds = float(request.args.get('seconds', 10))
+        except ValueError:
+            return jsonify({"error": "seconds must be a number"}), 400
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            return jsonify({"error": f"seconds must be between 0 and {MAX_PROFILE_SECONDS}"}), 400
+        
+        result = sample_stacks(seconds)
+        if result is None:
+            return jsonify({"error": "A profile is already running in this worker"}), 409
+        stacks, rounds = result
+        return Response(collapsed_text(stacks), mimetype="text/plain",
+                        headers={"X-Profile-Seconds": str(seconds), "X-Profile-Samples": str(rounds)})
+
+# Warm up and run the first self-test before serving, then keep re-checking in the background
+try:
+    warm_up()
+except Exception as e:
+    # Keep serving so /health can report the failure; /ready stays 503
+    warm_up_error = f"{type(e).__name__}: {e}"
+    print(f"Warm-up failed: {warm_up_error}")
+run_self_test()
+threading.Thread(target=self_test_loop, name="health-self-test", daemon=True).start()
+
+# Job workers start once the model is warm; jobs left unfinished by a previous run resume
+if JOBS_DIR and SERVING_PROCESS:
+    job_manager = JobManager(JOBS_DIR, score_job_chunk, workers=int(os.getenv("JOB_WORKERS", 2)),
+                             chunk_rows=int(os.getenv("JOB_CHUNK_ROWS", 5000)),
+                             lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", 60)),
+                             retention_seconds=float(os.getenv("JOB_RETENTION_HOURS", 24)) * 3600).start()
+    print(f"Job API: {JOBS_DIR} ({job_manager.workers} workers)")
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8001))
+    
+    # Optional Unix domain socket listener for co-located clients, opened by the serving process only
+    socket_path = os.getenv("MODEL_SOCKET_PATH")
+    if socket_path and SERVING_PROCESS:
+        from socket_server import start_socket_server
+        start_socket_server(socket_path, score_socket_transaction)
+    
     app.run(host="0.0.0.0", port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for the Flask API with per-worker thread pinning.
+
+    gunicorn -c gunicorn.conf.py flask_api:app
+
+Every worker loads the model itself (no preload), so the native thread
+environment set in post_fork is in place before the worker imports NumPy.
+See inference_threads.py for the settings (INFERENCE_NATIVE_THREADS,
+INFERENCE_THREADS, LARGE_BATCH_ROWS, CPU_AFFINITY).
+"""
+import os
+
+from inference_threads import native_thread_env
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8001)}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+# Request threads per worker; scoring itself runs single-threaded for small batches
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+preload_app = False
+timeout = 60
+
+def pre_fork(server, worker):
+    # Give each worker the lowest slot not held by a live worker, so a replacement
+    # takes over the CPUs of the worker it replaces
+    used = {getattr(w, "inference_slot", None) for w in server.WORKERS.values()}
+    worker.inference_slot = next(i for i in range(len(used) + 1) if i not in used)
+
+def post_fork(server, worker):
+    os.environ.update(native_thread_env())
+    os.environ["INFERENCE_WORKER_INDEX"] = str(worker.inference_slot)
+    os.environ["INFERENCE_WORKERS"] = str(server.num_workers)
+    server.log.info(f"Worker {worker.pid} assigned inference slot {worker.inference_slot}")
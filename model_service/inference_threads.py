@@ -0,0 +1,172 @@
+"""
+Native thread pool and CPU affinity control for inference workers.
+
+With several API workers per host, every NumPy/scikit-learn call may start its
+own BLAS/OpenMP pool (and forests with n_jobs=-1 their own joblib threads), so
+N workers end up running N x cores threads and tail latency suffers. This
+module pins each worker to:
+
+- INFERENCE_NATIVE_THREADS native (BLAS/OpenMP) threads, default 1
+- optionally a set of CPUs (CPU_AFFINITY: "auto" for an even share per worker,
+  or an explicit list such as "0-3,8")
+
+and scores batches of LARGE_BATCH_ROWS rows or more by splitting them across
+INFERENCE_THREADS threads, while smaller batches stay single-threaded on the
+request thread. By default a worker pinned with CPU_AFFINITY uses its CPUs;
+an unpinned worker uses its share of them (CPUs // INFERENCE_WORKERS), so
+the workers of one host together still run one thread per core.
+
+gunicorn.conf.py sets the thread environment variables and the worker index
+before each worker imports NumPy; configure_worker() applies the rest.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Environment variables read by the native thread pools when they are first loaded
+NATIVE_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                          "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+NATIVE_THREADS = int(os.getenv("INFERENCE_NATIVE_THREADS", 1))
+LARGE_BATCH_ROWS = int(os.getenv("LARGE_BATCH_ROWS", 2048))
+
+_executor = None
+_executor_threads = 0
+# Set by configure_worker(); computed on first use in processes that never call it
+_inference_threads = None
+_executor_lock = threading.Lock()
+
+def parse_cpu_list(spec):
+    """
+    Parse a CPU list like "0-3,8" into a set of CPU ids.
+    """
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+def worker_cpus(spec, worker_index, n_workers, available):
+    """
+    CPUs for one worker: an even, contiguous share of `available` for "auto",
+    otherwise the explicit list (restricted to available CPUs).
+    """
+    available = sorted(available)
+    if spec == "auto":
+        if worker_index is None or not n_workers or n_workers > len(available):
+            return set(available)
+        share = len(available) // n_workers
+        start = (worker_index % n_workers) * share
+        return set(available[start:start + share])
+    return parse_cpu_list(spec) & set(available)
+
+def native_thread_env(threads=NATIVE_THREADS):
+    """
+    Environment variables that cap native pools at `threads` when set before NumPy is imported.
+    """
+    return {name: str(threads) for name in NATIVE_THREAD_ENV_VARS}
+
+def default_inference_threads(n_workers=None, pinned=False):
+    """
+    INFERENCE_THREADS, or the CPUs this process may run on, divided among the
+    `n_workers` workers sharing them unless the process is pinned to its own CPUs.
+    """
+    if os.getenv("INFERENCE_THREADS"):
+        return max(1, int(os.getenv("INFERENCE_THREADS")))
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    if pinned or not n_workers:
+        return cpus
+    return max(1, cpus // n_workers)
+
+def inference_threads():
+    """
+    Threads used to split large batches, as set by configure_worker().
+    """
+    global _inference_threads
+    if _inference_threads is None:
+        n_workers = os.getenv("INFERENCE_WORKERS")
+        _inference_threads = default_inference_threads(int(n_workers) if n_workers else None)
+    return _inference_threads
+
+def pin_model_threads(model):
+    """
+    Set n_jobs=1 on the model and any nested estimators so they never start their own joblib pools.
+    """
+    estimators = [model]
+    while estimators:
+        estimator = estimators.pop()
+        if hasattr(estimator, "n_jobs"):
+            estimator.n_jobs = 1
+        if hasattr(estimator, "steps"):
+            estimators.extend(step for _, step in estimator.steps)
+        for attr in ("estimator", "base_estimator", "final_estimator_"):
+            nested = getattr(estimator, attr, None)
+            if nested is not None and hasattr(nested, "get_params"):
+                estimators.append(nested)
+    return model
+
+def configure_worker(worker_index=None, n_workers=None):
+    """
+    Apply CPU affinity and native thread limits to the current process.
+
+    `worker_index` and `n_workers` default to INFERENCE_WORKER_INDEX and
+    INFERENCE_WORKERS, which gunicorn.conf.py sets for each worker.
+    Returns a description of the applied configuration.
+    """
+    if worker_index is None and os.getenv("INFERENCE_WORKER_INDEX"):
+        worker_index = int(os.getenv("INFERENCE_WORKER_INDEX"))
+    if n_workers is None and os.getenv("INFERENCE_WORKERS"):
+        n_workers = int(os.getenv("INFERENCE_WORKERS"))
+
+    global _inference_threads
+    affinity = os.getenv("CPU_AFFINITY")
+    pinned = False
+    if affinity and hasattr(os, "sched_setaffinity"):
+        cpus = worker_cpus(affinity, worker_index, n_workers, os.sched_getaffinity(0))
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+            pinned = True
+        else:
+            print(f"CPU_AFFINITY={affinity} matches no available CPU; affinity unchanged")
+    _inference_threads = default_inference_threads(n_workers, pinned)
+
+    # Native pools may already be loaded (e.g. NumPy imported before the environment was set)
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=NATIVE_THREADS)
+
+    return {
+        "worker_index": worker_index,
+        "cpus": sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None,
+        "native_threads": NATIVE_THREADS,
+        "inference_threads": inference_threads(),
+        "large_batch_rows": LARGE_BATCH_ROWS,
+    }
+
+def _get_executor(threads):
+    # Created on first use so it is never inherited across fork
+    global _executor, _executor_threads
+    with _executor_lock:
+        if _executor is None or _executor_threads != threads:
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="inference")
+            _executor_threads = threads
+        return _executor
+
+def predict_proba(model, X):
+    """
+    predict_proba that stays on the calling thread for small batches and splits batches
+    of LARGE_BATCH_ROWS rows or more across the inference threads.
+    """
+    threads = inference_threads()
+    if len(X) < LARGE_BATCH_ROWS or threads <= 1:
+        return model.predict_proba(X)
+    # Imported here so gunicorn.conf.py can import this module without loading NumPy in the master
+    import numpy as np
+    # scikit-learn releases the GIL in tree traversal and BLAS, so row chunks run in parallel
+    chunks = np.array_split(X, threads)
+    return np.concatenate(list(_get_executor(threads).map(model.predict_proba, chunks)))
@@ -0,0 +1,315 @@
+"""
+Screening of client IP addresses against a local blocklist, before any feature mapping.
+
+The blocklist file (IP_BLOCKLIST_PATH) holds one IPv4 or IPv6 address or CIDR
+block per line; `#` starts a comment and blank or unparsable lines are
+skipped. It is kept in memory in compact arrays instead of Python sets
+(about 70 bytes per entry), so lists with millions of entries stay small:
+
+- Three bitmaps with one bit per IPv4 /24 (2 MB each) mark the /24s blocked
+  entirely by a range, those partly covered by a range and those holding
+  single blocked addresses. Most traffic comes from /24s with no entry at all
+  and is answered after these bit tests.
+- CIDR blocks are merged into disjoint ranges: IPv4 ranges as two array('I')
+  of starts and ends (8 bytes per range), IPv6 ranges as sorted int lists.
+  They are searched with bisect, for IPv4 only in partly covered /24s.
+- Single IPv4 addresses (and /32 blocks) go into a sorted array('I')
+  (4 bytes each) behind a two-probe Bloom filter of at least
+  BLOOM_BITS_PER_ENTRY bits per address. Most lookups in a /24 that holds
+  listed addresses stop at the Bloom filter. Bloom positives are confirmed by
+  bisect, so a false positive never blocks an address.
+
+Hot reload: a watcher thread checks the file's mtime, size and inode every
+RELOAD_INTERVAL seconds. A change is loaded once the file has stayed the same
+for one more check, so a file still being written is not picked up half done.
+The new index is built on the side and swapped in as one reference; lookups
+read that reference once and always see a complete index. If the new file
+cannot be read, the old index stays in place. Publishing a new list by
+renaming a complete file over the old one is still the safest way to update it.
+"""
+import bisect
+import os
+import socket
+import threading
+import time
+from array import array
+
+import numpy as np
+
+RELOAD_INTERVAL = 5.0
+BLOOM_BITS_PER_ENTRY = 16
+
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_V4_MAPPED_PREFIX = 0xFFFF << 32
+
+def parse_ip(text):
+    """
+    Return (version, integer) for an IPv4 or IPv6 address string, or None if it isn't one.
+    IPv4-mapped IPv6 addresses (::ffff:a.b.c.d) are returned as IPv4.
+    """
+    if not isinstance(text, str):
+        return None
+    text = text.strip()
+    try:
+        if ':' not in text:
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, text), 'big')
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, text.split('%', 1)[0]), 'big')
+    except (OSError, ValueError):
+        return None
+    if value >> 32 == 0xFFFF:
+        return 4, value - _V4_MAPPED_PREFIX
+    return 6, value
+
+def parse_entry(line):
+    """
+    Return (version, first address, last address) for an address or CIDR block, or None.
+    """
+    address, _, prefix = line.partition('/')
+    parsed = parse_ip(address)
+    if parsed is None:
+        return None
+    version, value = parsed
+    width = 32 if version == 4 and ':' not in address else 128
+    try:
+        prefix = int(prefix) if prefix else width
+    except ValueError:
+        return None
+    if not 0 <= prefix <= width:
+        return None
+    if width == 128 and version == 4:
+        # An IPv4-mapped block such as ::ffff:10.0.0.0/104
+        if prefix < 96:
+            return None
+        prefix -= 96
+        width = 32
+    host_bits = width - prefix
+    first = value >> host_bits << host_bits
+    return version, first, first + (1 << host_bits) - 1
+
+def merge_ranges(ranges):
+    """
+    Sort (first, last) ranges and merge overlapping or adjacent ones.
+    """
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1][1] = last
+        else:
+            merged.append([first, last])
+    return merged
+
+def packed_bits(size, indices=(), spans=()):
+    """
+    Bitmap of `size` bits (little-endian within each byte) with the given bit indices
+    and [low, high) spans set.
+    """
+    bits = np.zeros(size, dtype=bool)
+    bits[np.asarray(indices, dtype=np.int64)] = True
+    for low, high in spans:
+        bits[low:high] = True
+    return bytearray(np.packbits(bits, bitorder='little'))
+
+class IPIndex:
+    """
+    Immutable lookup structure for one version of the blocklist.
+    """
+    def __init__(self, v4_addresses=(), v4_ranges=(), v6_ranges=()):
+        merged = merge_ranges(v4_ranges)
+        starts = np.array([first for first, _ in merged], dtype=np.uint32)
+        ends = np.array([last for _, last in merged], dtype=np.uint32)
+        addresses = np.unique(np.asarray(v4_addresses, dtype=np.uint32))
+        if len(starts):
+            # Addresses already covered by a range need no entry of their own
+            i = np.searchsorted(starts, addresses, side='right') - 1
+            addresses = addresses[~((i >= 0) & (addresses <= ends[np.maximum(i, 0)]))]
+        self.v4_starts = array('I', starts.tobytes())
+        self.v4_ends = array('I', ends.tobytes())
+        self.v4_addresses = array('I', addresses.tobytes())
+
+        # Per-/24 bitmaps: blocked entirely by a range, partly by a range, holding blocked addresses
+        full, partial = [], []
+        for first, last in merged:
+            low, high = (first + 255) >> 8, (last + 1) >> 8
+            full.append((low, high))
+            partial.extend(prefix for prefix in {first >> 8, last >> 8} if not low <= prefix < high)
+        self.full_prefixes = packed_bits(1 << 24, spans=full)
+        self.range_prefixes = packed_bits(1 << 24, partial)
+        self.address_prefixes = packed_bits(1 << 24, addresses >> 8)
+
+        # Two-probe Bloom filter over the addresses, at least BLOOM_BITS_PER_ENTRY bits each
+        # (rounded up to a power of two so probes are masked instead of taken modulo)
+        self.bloom_mask = (1 << max(6, int(len(addresses) * BLOOM_BITS_PER_ENTRY - 1).bit_length())) - 1
+        h = addresses.astype(np.uint64) * np.uint64(_HASH_MULTIPLIER)
+        h1, h2 = h >> np.uint64(32), (h & np.uint64(0xFFFFFFFF)) | np.uint64(1)
+        mask = np.uint64(self.bloom_mask)
+        self.bloom = packed_bits(self.bloom_mask + 1, np.concatenate([h1 & mask, (h1 + h2) & mask]))
+
+        merged = merge_ranges(v6_ranges)
+        self.v6_starts = [first for first, _ in merged]
+        self.v6_ends = [last for _, last in merged]
+
+    def contains_v4(self, ip):
+        prefix = ip >> 8
+        byte, bit = prefix >> 3, 1 << (prefix & 7)
+        # Addresses in a /24 without any entry, most of the traffic, stop after these three tests
+        if self.full_prefixes[byte] & bit:
+            return True
+        if self.range_prefixes[byte] & bit:
+            i = bisect.bisect_right(self.v4_starts, ip) - 1
+            if i >= 0 and ip <= self.v4_ends[i]:
+                return True
+        if self.address_prefixes[byte] & bit:
+            # Bloom probes inline; a function call would cost more than the probes themselves
+            h = (ip * _HASH_MULTIPLIER) & _MASK64
+            h1, mask, bloom = h >> 32, self.bloom_mask, self.bloom
+            position = h1 & mask
+            if not bloom[position >> 3] >> (position & 7) & 1:
+                return False
+            position = (h1 + ((h & 0xFFFFFFFF) | 1)) & mask
+            if not bloom[position >> 3] >> (position & 7) & 1:
+                return False
+            i = bisect.bisect_left(self.v4_addresses, ip)
+            return i < len(self.v4_addresses) and self.v4_addresses[i] == ip
+        return False
+
+    def contains_v6(self, ip):
+        i = bisect.bisect_right(self.v6_starts, ip) - 1
+        return i >= 0 and ip <= self.v6_ends[i]
+
+    def counts(self):
+        return {"ipv4_addresses": len(self.v4_addresses), "ipv4_ranges": len(self.v4_starts),
+                "ipv6_ranges": len(self.v6_starts)}
+
+def load_index(path):
+    """
+    Parse a blocklist file into an IPIndex. Returns (index, number of skipped lines).
+    """
+    addresses, v4_ranges, v6_ranges, skipped = array('I'), [], [], 0
+    to_int, pton, af_inet = int.from_bytes, socket.inet_pton, socket.AF_INET
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            try:
+                # Fast path for the common case, a bare IPv4 address
+                addresses.append(to_int(pton(af_inet, line), 'big'))
+                continue
+            except OSError:
+                pass
+            entry = parse_entry(line.split('#', 1)[0].strip())
+            if entry is None:
+                skipped += 1
+            elif entry[0] == 6:
+                v6_ranges.append(entry[1:])
+            elif entry[1] == entry[2]:
+                addresses.append(entry[1])
+            else:
+                v4_ranges.append(entry[1:])
+    return IPIndex(np.frombuffer(addresses, dtype=np.uint32), v4_ranges, v6_ranges), skipped
+
+class IPBlocklist:
+    def __init__(self, path, reload_interval=RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.index = IPIndex()
+        self.loaded_at = None
+        self.skipped_lines = 0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_error = None
+        self.blocked = 0
+        self._signature = None
+        self._pending = None
+        self._thread = None
+        self.reload()
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload(self):
+        """
+        Load the file now and swap in the new index. Returns True on success.
+        """
+        try:
+            signature = self._file_signature()
+            start = time.perf_counter()
+            index, skipped = load_index(self.path)
+        except (OSError, UnicodeDecodeError) as e:
+            self.reload_errors += 1
+            self.last_error = str(e)
+            print(f"IP blocklist reload failed, keeping the previous list: {e}")
+            return False
+        self.index = index
+        self._signature = signature
+        self.skipped_lines = skipped
+        self.loaded_at = time.time()
+        self.reloads += 1
+        counts = index.counts()
+        print(f"IP blocklist loaded from {self.path} in {time.perf_counter() - start:.2f}s: "
+              f"{counts['ipv4_addresses']} IPv4 addresses, {counts['ipv4_ranges']} IPv4 ranges, "
+              f"{counts['ipv6_ranges']} IPv6 ranges ({skipped} lines skipped)")
+        return True
+
+    def check_for_changes(self):
+        """
+        Reload if the file changed and has stayed unchanged since the previous check.
+        """
+        try:
+            signature = self._file_signature()
+        except OSError as e:
+            self.last_error = str(e)
+            return
+        if signature == self._signature:
+            self._pending = None
+        elif signature == self._pending:
+            self._pending = None
+            self.reload()
+        else:
+            self._pending = signature
+
+    def _watch(self):
+        while True:
+            time.sleep(self.reload_interval)
+            self.check_for_changes()
+
+    def start_watcher(self):
+        if self._thread is None and self.reload_interval > 0:
+            self._thread = threading.Thread(target=self._watch, name="ip-blocklist-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def contains(self, address):
+        """
+        True if `address` (an IP address string) is on the blocklist. Missing or
+        unparsable addresses are never blocked.
+        """
+        index = self.index
+        try:
+            # Fast path for plain IPv4 addresses
+            blocked = index.contains_v4(int.from_bytes(socket.inet_pton(socket.AF_INET, address), 'big'))
+        except (OSError, TypeError, ValueError):
+            parsed = parse_ip(address)
+            if parsed is None:
+                return False
+            version, ip = parsed
+            blocked = index.contains_v4(ip) if version == 4 else index.contains_v6(ip)
+        if blocked:
+            # Approximate under concurrency; only used for reporting
+            self.blocked += 1
+        return blocked
+
+    def stats(self):
+        return {
+            "path": self.path,
+            **self.index.counts(),
+            "skipped_lines": self.skipped_lines,
+            "loaded_at": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)) if self.loaded_at else None,
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+            "blocked": self.blocked,
+        }
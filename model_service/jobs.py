@@ -0,0 +1,353 @@
+"""
+Asynchronous scoring jobs for inputs too large for one HTTP request.
+
+A submitted job (NDJSON, a CSV file or a JSON list of transactions) is written
+to JOBS_DIR as NDJSON and split into chunks of JOB_CHUNK_ROWS lines, recorded
+by byte offset in a SQLite database next to it. Worker threads claim chunks one
+at a time, score them and write each chunk's results to its own file, so a job
+never has to fit in memory and its results are streamed back from disk:
+
+    JOBS_DIR/jobs.sqlite
+    JOBS_DIR/<job id>/input.ndjson
+    JOBS_DIR/<job id>/chunk-000000.ndjson, chunk-000001.ndjson, ...
+
+- Fair sharing: every claim goes to the active job that was served longest
+  ago, so jobs take turns chunk by chunk and a small job submitted behind a
+  large one finishes after a few chunks instead of waiting for the whole
+  large job.
+- Restarts: all job state lives in SQLite. A claimed chunk holds a lease of
+  JOB_LEASE_SECONDS. Chunks whose worker died (a crash or a restart) are
+  claimed again once the lease expires, and pending chunks resume right away.
+  Chunk results are written under a temporary name and renamed, so scoring a
+  chunk twice is harmless.
+- Several processes (gunicorn workers) can share one JOBS_DIR: claims are
+  SQLite transactions, so each chunk goes to one worker at a time.
+
+Finished jobs are deleted after JOB_RETENTION_HOURS.
+"""
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+CHUNK_ROWS = 5000
+LEASE_SECONDS = 60.0
+RETENTION_SECONDS = 24 * 3600
+# Claims per chunk before the job is failed (a chunk that keeps killing its worker)
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 1.0
+PURGE_INTERVAL = 60.0
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    options TEXT NOT NULL,
+    total_rows INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    last_claimed_at REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    first_line INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+def iter_lines(stream, block_size=1 << 16):
+    """
+    Yield the pieces of a binary stream split after each newline, without holding
+    more than `block_size` bytes of one overlong line at a time.
+    """
+    while True:
+        piece = stream.readline(block_size)
+        if not piece:
+            return
+        yield piece
+
+def json_lines(transactions):
+    for transaction in transactions:
+        yield (json.dumps(transaction) + "\n").encode()
+
+def csv_lines(text_stream):
+    """
+    Convert CSV rows with a header into NDJSON lines. Empty cells are left out and
+    numeric amounts are converted, so rows look like JSON requests.
+    """
+    for row in csv.DictReader(text_stream):
+        transaction = {key: value for key, value in row.items() if key and value not in (None, '')}
+        try:
+            transaction['amount'] = float(transaction['amount'])
+        except (KeyError, ValueError):
+            pass
+        yield (json.dumps(transaction) + "\n").encode()
+
+class JobManager:
+    def __init__(self, directory, score_chunk, workers=2, chunk_rows=CHUNK_ROWS, lease_seconds=LEASE_SECONDS,
+                 retention_seconds=RETENTION_SECONDS):
+        """
+        `score_chunk(data, first_line, options)` scores the NDJSON bytes of one chunk
+        (whose first line has number `first_line`) and returns its NDJSON results.
+        """
+        self.directory = directory
+        self.score_chunk = score_chunk
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.db_path = os.path.join(directory, 'jobs.sqlite')
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+        self._wake = threading.Event()
+        self._local = threading.local()
+        self._threads = []
+        self._last_purge = 0.0
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _db(self):
+        # One connection per thread; sqlite3 connections must not be shared between threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = self._connect()
+            db.row_factory = sqlite3.Row
+        return db
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def _chunk_path(self, job_id, idx):
+        return os.path.join(self._job_dir(job_id), f"chunk-{idx:06d}.ndjson")
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, lines, options=None):
+        """
+        Write the NDJSON `lines` (bytes pieces as yielded by iter_lines) to a new job,
+        split them into chunks and queue it. Returns the job's status.
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir)
+        chunks = []
+        offset = chunk_start = 0
+        line_number = chunk_first_line = 1
+        chunk_rows = 0
+        try:
+            with open(os.path.join(job_dir, 'input.ndjson'), 'wb') as f:
+                for piece in lines:
+                    f.write(piece)
+                    offset += len(piece)
+                    if not piece.endswith(b"\n"):
+                        continue
+                    line_number += 1
+                    chunk_rows += 1
+                    if chunk_rows == self.chunk_rows:
+                        chunks.append((len(chunks), chunk_start, offset - chunk_start, chunk_first_line, chunk_rows))
+                        chunk_start, chunk_first_line, chunk_rows = offset, line_number, 0
+                if offset > chunk_start:
+                    if not piece.endswith(b"\n"):
+                        # Terminate a last line without a newline so chunks always end at a line end
+                        f.write(b"\n")
+                        offset += 1
+                        chunk_rows += 1
+                    chunks.append((len(chunks), chunk_start, offset - chunk_start, chunk_first_line, chunk_rows))
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        now = time.time()
+        total_rows = sum(chunk[4] for chunk in chunks)
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("INSERT INTO jobs (id, status, options, total_rows, total_chunks, created_at, finished_at) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (job_id, 'queued' if chunks else 'done', json.dumps(options or {}), total_rows, len(chunks),
+                        now, None if chunks else now))
+            db.executemany("INSERT INTO chunks (job_id, idx, offset, length, first_line, rows) VALUES (?, ?, ?, ?, ?, ?)",
+                           [(job_id, *chunk) for chunk in chunks])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+        self._wake.set()
+        return self.get(job_id)
+
+    def _describe(self, row):
+        job = {key: row[key] for key in ('id', 'status', 'total_rows', 'rows_done', 'total_chunks', 'chunks_done',
+                                         'error', 'created_at', 'started_at', 'finished_at')}
+        job['options'] = json.loads(row['options'])
+        job['progress'] = row['chunks_done'] / row['total_chunks'] if row['total_chunks'] else 1.0
+        return job
+
+    def get(self, job_id):
+        row = self._db().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._describe(row) if row is not None else None
+
+    def list(self, limit=50):
+        rows = self._db().execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._describe(row) for row in rows]
+
+    def iter_result(self, job_id, block_size=1 << 16):
+        """
+        Yield the results of a finished job, chunk by chunk in input order.
+        """
+        total_chunks = self._db().execute("SELECT total_chunks FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        for idx in range(total_chunks):
+            with open(self._chunk_path(job_id, idx), 'rb') as f:
+                for block in iter(lambda: f.read(block_size), b''):
+                    yield block
+
+    def delete(self, job_id):
+        """
+        Cancel a job if it is still running and delete its files. Returns False for unknown jobs.
+        Chunks being scored at the time finish, but their results are discarded.
+        """
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = db.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount
+            db.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        return bool(deleted)
+
+    def _claim(self):
+        """
+        Claim the next chunk of the active job served longest ago.
+        Returns (job_id, idx, offset, length, first_line, options) or None.
+        """
+        db = self._db()
+        now = time.time()
+        expired = now - self.lease_seconds
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT j.id, j.options, c.idx, c.offset, c.length, c.first_line, c.attempts FROM jobs j "
+                "JOIN chunks c ON c.job_id = j.id AND c.idx = ("
+                "  SELECT MIN(idx) FROM chunks WHERE job_id = j.id"
+                "  AND (status = 'pending' OR (status = 'running' AND claimed_at < ?))) "
+                "WHERE j.status IN (?, ?) "
+                "ORDER BY j.last_claimed_at IS NOT NULL, j.last_claimed_at, j.created_at LIMIT 1",
+                (expired, *ACTIVE_STATUSES)).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            if row['attempts'] >= MAX_ATTEMPTS:
+                db.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                           (f"Chunk {row['idx']} was claimed {row['attempts']} times without finishing", now, row['id']))
+                db.execute("COMMIT")
+                return None
+            db.execute("UPDATE chunks SET status = 'running', claimed_at = ?, attempts = attempts + 1 "
+                       "WHERE job_id = ? AND idx = ?", (now, row['id'], row['idx']))
+            db.execute("UPDATE jobs SET status = 'running', last_claimed_at = ?, started_at = COALESCE(started_at, ?) "
+                       "WHERE id = ?", (now, now, row['id']))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return row['id'], row['idx'], row['offset'], row['length'], row['first_line'], json.loads(row['options'])
+
+    def _finish_chunk(self, job_id, idx):
+        db = self._db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # A chunk scored twice (after an expired lease) is only counted once
+            updated = db.execute("UPDATE chunks SET status = 'done' WHERE job_id = ? AND idx = ? AND status != 'done'",
+                                 (job_id, idx)).rowcount
+            if updated:
+                db.execute("UPDATE jobs SET chunks_done = chunks_done + 1, "
+                           "rows_done = rows_done + (SELECT rows FROM chunks WHERE job_id = ? AND idx = ?) "
+                           "WHERE id = ?", (job_id, idx, job_id))
+                db.execute("UPDATE jobs SET status = 'done', finished_at = ? "
+                           "WHERE id = ? AND status = 'running' AND chunks_done = total_chunks", (now, job_id))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _fail(self, job_id, error):
+        self._db().execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                           (error, time.time(), job_id, *ACTIVE_STATUSES))
+
+    def _run_chunk(self, job_id, idx, offset, length, first_line, options):
+        try:
+            with open(os.path.join(self._job_dir(job_id), 'input.ndjson'), 'rb') as f:
+                f.seek(offset)
+                data = f.read(length)
+            output = self.score_chunk(data, first_line, options)
+            path = self._chunk_path(job_id, idx)
+            with open(path + '.tmp', 'w') as f:
+                f.write(output)
+            os.replace(path + '.tmp', path)
+        except FileNotFoundError:
+            # The job was deleted while this chunk was being scored
+            return
+        except Exception as e:
+            print(f"Job {job_id} failed on chunk {idx}: {e}")
+            self._fail(job_id, f"Chunk {idx}: {e}")
+            return
+        self._finish_chunk(job_id, idx)
+
+    def _work(self):
+        while True:
+            try:
+                claim = self._claim()
+                if claim is None:
+                    self._purge_expired()
+                    self._wake.wait(POLL_INTERVAL)
+                    self._wake.clear()
+                    continue
+                self._run_chunk(*claim)
+            except Exception as e:
+                # Keep the worker alive; an unfinished claim is retried when its lease expires
+                print(f"Job worker error: {e}")
+                time.sleep(POLL_INTERVAL)
+
+    def _purge_expired(self):
+        now = time.time()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        rows = self._db().execute("SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                                  (now - self.retention_seconds,)).fetchall()
+        for row in rows:
+            self.delete(row['id'])
+
+    def stats(self):
+        counts = dict(self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"workers": self.workers, "chunk_rows": self.chunk_rows, "jobs": counts}
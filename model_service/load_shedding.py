@@ -0,0 +1,129 @@
+"""
+Admission control that degrades requests to the rule-based score before a latency SLO is missed.
+
+For every request the controller predicts its latency on the model path:
+
+    queueing delay + (requests in flight + 1) x per-request service time
+
+The queueing delay comes from an X-Request-Start header set by the proxy in
+front of the workers (nginx: `proxy_set_header X-Request-Start "t=${msec}";`).
+Without the header it is taken as 0. The service time is an exponentially
+weighted average of each model-path request's latency divided by the number
+of requests in flight when it started. Scoring holds the GIL for most of its
+time, so concurrent requests in one worker mostly run one after another.
+
+A request whose predicted latency exceeds ENTER_RATIO x SLO is degraded to
+the cheap rule path. Once shedding has started, requests are only admitted
+again below the lower EXIT_RATIO x SLO (or, with nothing in flight, below
+ENTER_RATIO x SLO), so the controller does not flap around a single
+threshold. While shedding with nothing in flight, one
+request per PROBE_INTERVAL still goes to the model. This refreshes the service
+time, which may have been inflated by the overload, so the controller recovers
+on its own once load drops.
+"""
+import threading
+import time
+
+ENTER_RATIO = 0.8
+EXIT_RATIO = 0.5
+SERVICE_TIME_ALPHA = 0.2
+# Seconds between model-path probes while shedding
+PROBE_INTERVAL = 0.25
+
+def queue_delay_ms(header_value, now=None):
+    """
+    Milliseconds since the X-Request-Start timestamp ("t=<seconds|ms|us>" or a bare number), or 0.
+    """
+    if not header_value:
+        return 0.0
+    value = header_value.strip()
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        value = float(value)
+    except ValueError:
+        return 0.0
+    # Proxies send seconds, milliseconds or microseconds since the epoch
+    if value > 1e14:
+        value /= 1e6
+    elif value > 1e11:
+        value /= 1e3
+    now = time.time() if now is None else now
+    return max(0.0, (now - value) * 1000)
+
+class AdmissionController:
+    def __init__(self, slo_ms, enter_ratio=ENTER_RATIO, exit_ratio=EXIT_RATIO, alpha=SERVICE_TIME_ALPHA,
+                 probe_interval=PROBE_INTERVAL):
+        self.slo_ms = slo_ms
+        self.enter_ms = slo_ms * enter_ratio
+        self.exit_ms = slo_ms * exit_ratio
+        self.alpha = alpha
+        self.probe_interval = probe_interval
+        self.last_probe = 0.0
+        self.service_ms = None
+        self.in_flight = 0
+        self.shedding = False
+        self.admitted = 0
+        self.degraded = 0
+        self.transitions = 0
+        self._lock = threading.Lock()
+
+    def predicted_ms(self, delay_ms=0.0):
+        # Caller holds self._lock
+        return delay_ms + (self.in_flight + 1) * (self.service_ms or 0.0)
+
+    def admit(self, delay_ms=0.0):
+        """
+        Decide whether a new request may use the model. Returns a token for done(),
+        or None if the request should be degraded to the rule path.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            predicted = self.predicted_ms(delay_ms)
+            # An idle worker may always take a request that fits the SLO on its own
+            threshold = self.exit_ms if self.shedding and self.in_flight else self.enter_ms
+            if predicted > threshold:
+                if not self.shedding:
+                    self.shedding = True
+                    self.transitions += 1
+                elif self.in_flight == 0 and now - self.last_probe >= self.probe_interval:
+                    # Probe: measure the model again without leaving the shedding state
+                    self.last_probe = now
+                    self.in_flight += 1
+                    self.admitted += 1
+                    return (now, self.in_flight, True)
+                self.degraded += 1
+                return None
+            if self.shedding:
+                self.shedding = False
+                self.transitions += 1
+            self.in_flight += 1
+            self.admitted += 1
+            return (now, self.in_flight, False)
+
+    def done(self, token):
+        """
+        Record the end of an admitted request.
+        """
+        started, concurrency, probe = token
+        service_ms = (time.perf_counter() - started) * 1000 / concurrency
+        with self._lock:
+            self.in_flight -= 1
+            # A probe replaces the estimate, which is stale from the overload that started shedding
+            if self.service_ms is None or probe:
+                self.service_ms = service_ms
+            else:
+                self.service_ms += self.alpha * (service_ms - self.service_ms)
+
+    def status(self):
+        with self._lock:
+            return {
+                "slo_ms": self.slo_ms,
+                "shedding": self.shedding,
+                "in_flight": self.in_flight,
+                "service_ms": round(self.service_ms, 3) if self.service_ms is not None else None,
+                "predicted_ms": round(self.predicted_ms(), 3),
+                "admitted": self.admitted,
+                "degraded": self.degraded,
+                "transitions": self.transitions,
+            }
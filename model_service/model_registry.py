@@ -0,0 +1,220 @@
+"""
+Registry of named, versioned model bundles served side by side by one process.
+
+Models are listed in a JSON config (MODEL_REGISTRY_PATH):
+
+    {
+      "memory_budget_mb": 512,
+      "models": {
+        "creditcard":     {"path": "credit_card_model.pkl", "schema": "creditcard", "pinned": true},
+        "creditcard-sgd": {"path": "credit_card_model_sgd.pkl", "schema": "creditcard"},
+        "dashboard":      {"path": "dashboard_model.pkl", "schema": "synthetic7", "version": "2024-06"}
+      }
+    }
+
+A model is loaded on its first request. Loaded models are kept in least
+recently used order and, when their combined size exceeds the memory budget,
+the least recently used unpinned models are evicted and reloaded on demand.
+Requests already scoring with an evicted model keep their reference, so
+eviction never interrupts them.
+
+The schema of each model names a feature builder supplied by the service,
+which turns shared per-transaction inputs into that model's feature matrix.
+A file may hold a bundle ({'model', 'scaler', 'selected_features'}) or a
+bare estimator, which gets the schema's default feature order and no scaler.
+Unless the config gives a version, it is the first 12 hex digits of the
+file's SHA-256.
+
+A model that cannot be loaded (missing file, or a pickle that needs a class
+this process doesn't have) raises ModelLoadError naming the model and the
+reason. Its status reports the error; the other models are unaffected.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+
+from debug_tools import deep_sizeof
+from explain import build_explainer
+from inference_threads import pin_model_threads, predict_proba
+
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+class ModelLoadError(RuntimeError):
+    """
+    A registry model could not be loaded.
+    """
+
+def file_version(path):
+    """
+    Short content hash of a model file.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+class FeatureSchema:
+    """
+    A feature layout: default feature order plus a builder
+    `build(feature_names, inputs, rows) -> raw feature matrix` for rows of shared batch inputs.
+    """
+    def __init__(self, name, feature_names, build):
+        self.name = name
+        self.feature_names = list(feature_names)
+        self.build = build
+
+class LoadedModel:
+    def __init__(self, name, version, schema, model, scaler, feature_names, fraud_index=None):
+        self.name = name
+        self.version = version
+        self.schema = schema
+        self.model = model
+        self.scaler = scaler
+        self.feature_names = feature_names
+        self.fraud_index = fraud_index
+        self.explainer = build_explainer(model, feature_names)
+        # Counted against the registry's memory budget
+        self.size_bytes = deep_sizeof([model, scaler, self.explainer, fraud_index])
+        self.loaded_at = time.time()
+
+    def predict(self, inputs, rows):
+        """
+        Score rows `rows` of the shared batch inputs.
+        Return (raw feature matrix, model-space feature matrix, fraud probabilities).
+        """
+        raw_matrix = self.schema.build(self.feature_names, inputs, rows)
+        feature_matrix = self.scaler.transform(raw_matrix) if self.scaler is not None else raw_matrix
+        return raw_matrix, feature_matrix, predict_proba(self.model, feature_matrix)[:, 1]
+
+class ModelRegistry:
+    def __init__(self, models, schemas, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, base_dir='.'):
+        unknown = {spec['schema'] for spec in models.values()} - set(schemas)
+        if unknown:
+            raise ValueError(f"Unknown feature schema(s) in registry config: {', '.join(sorted(unknown))}")
+        self.specs = models
+        self.schemas = schemas
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.base_dir = base_dir
+        self.loaded = OrderedDict()
+        self.stats = {name: {"loads": 0, "evictions": 0, "requests": 0, "load_errors": 0} for name in models}
+        self.load_errors = {}
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in models}
+
+    @classmethod
+    def from_config(cls, path, schemas):
+        with open(path) as f:
+            config = json.load(f)
+        budget = float(os.getenv("MODEL_MEMORY_BUDGET_MB", config.get("memory_budget_mb", DEFAULT_MEMORY_BUDGET_MB)))
+        return cls(config["models"], schemas, budget, base_dir=os.path.dirname(os.path.abspath(path)))
+
+    def __contains__(self, name):
+        return name in self.specs
+
+    def names(self):
+        return list(self.specs)
+
+    def get(self, name):
+        """
+        Return the loaded model `name`, loading it (and evicting others) if needed.
+        Raises KeyError for names not in the config.
+        """
+        if name not in self.specs:
+            raise KeyError(name)
+        with self._lock:
+            entry = self.loaded.get(name)
+            if entry is not None:
+                self.loaded.move_to_end(name)
+                self.stats[name]["requests"] += 1
+                return entry
+
+        # One loader per model; concurrent requests for it wait here instead of loading it twice
+        with self._load_locks[name]:
+            with self._lock:
+                entry = self.loaded.get(name)
+            loaded_now = entry is None
+            if loaded_now:
+                try:
+                    entry = self._load(name)
+                except Exception as e:
+                    reason = f"{type(e).__name__}: {e}"
+                    with self._lock:
+                        self.stats[name]["load_errors"] += 1
+                        self.load_errors[name] = reason
+                    raise ModelLoadError(f"Model '{name}' could not be loaded from {self.specs[name]['path']}: "
+                                         f"{reason}") from e
+            with self._lock:
+                if loaded_now:
+                    self.stats[name]["loads"] += 1
+                    self.load_errors.pop(name, None)
+                self.loaded[name] = entry
+                self.loaded.move_to_end(name)
+                self.stats[name]["requests"] += 1
+                self._evict(keep=name)
+            return entry
+
+    def _load(self, name):
+        spec = self.specs[name]
+        path = spec["path"] if os.path.isabs(spec["path"]) else os.path.join(self.base_dir, spec["path"])
+        schema = self.schemas[spec["schema"]]
+        start = time.perf_counter()
+        data = joblib.load(path)
+        fraud_index = None
+        if isinstance(data, dict) and 'model' in data:
+            model, scaler, fraud_index = data['model'], data.get('scaler'), data.get('fraud_index')
+            feature_names = list(data.get('selected_features') or schema.feature_names)
+        else:
+            model, scaler, feature_names = data, None, schema.feature_names
+        pin_model_threads(model)
+        entry = LoadedModel(name, spec.get("version") or file_version(path), schema, model, scaler, feature_names,
+                            fraud_index)
+        print(f"Registry loaded model '{name}' (version {entry.version}, schema {schema.name}, "
+              f"{entry.size_bytes / 2**20:.1f} MB) in {time.perf_counter() - start:.2f}s")
+        return entry
+
+    def _evict(self, keep):
+        # Caller holds self._lock; evict least recently used first
+        total = sum(entry.size_bytes for entry in self.loaded.values())
+        for name in list(self.loaded):
+            if total <= self.memory_budget:
+                break
+            if name == keep or self.specs[name].get("pinned"):
+                continue
+            total -= self.loaded.pop(name).size_bytes
+            self.stats[name]["evictions"] += 1
+            print(f"Registry evicted model '{name}' to stay within {self.memory_budget / 2**20:.1f} MB")
+
+    def preload(self):
+        """
+        Load every pinned model up front. Models that fail to load are reported and
+        retried on their first request.
+        """
+        for name, spec in self.specs.items():
+            if spec.get("pinned"):
+                try:
+                    self.get(name)
+                except ModelLoadError as e:
+                    print(f"Registry: {e}")
+
+    def status(self):
+        with self._lock:
+            loaded = dict(self.loaded)
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "loaded_bytes": sum(entry.size_bytes for entry in loaded.values()),
+                "models": {name: {
+                    "schema": spec["schema"],
+                    "pinned": bool(spec.get("pinned")),
+                    "loaded": name in loaded,
+                    "version": loaded[name].version if name in loaded else spec.get("version"),
+                    "size_bytes": loaded[name].size_bytes if name in loaded else None,
+                    "load_error": self.load_errors.get(name),
+                    **self.stats[name],
+                } for name, spec in self.specs.items()},
+            }
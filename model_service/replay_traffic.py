@@ -0,0 +1,229 @@
+"""
+Replay captured /predict traffic against one or two running builds of the API.
+
+Reads a capture log written with CAPTURE_PATH (see traffic_capture.py) and
+re-issues every request, with its original path and query string (so
+?model=, ?explain= and ?similarity= are kept), against --target, keeping the original inter-arrival
+times scaled by --speed (1 = real time, 10 = ten times faster, "max" = as
+fast as --concurrency allows). With --compare, the same schedule is replayed
+against a second build and the two runs are compared on latency percentiles
+and on score outputs (confidence differences, is_fraud and risk level flips).
+
+    python replay_traffic.py capture.bin --target http://127.0.0.1:8001 --speed 10
+    python replay_traffic.py capture.bin --target http://old:8001 --compare http://new:8001 --speed max
+
+Latency is measured from each request's scheduled send time, so time spent
+waiting for a free connection when the target falls behind counts against it.
+"""
+import argparse
+import http.client
+import json
+import queue
+import string
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+from traffic_capture import read_capture
+
+LATENCY_PERCENTILES = (50, 90, 99, 99.9)
+
+class ReplayClient:
+    """
+    One keep-alive HTTP connection per replay thread.
+    """
+    def __init__(self, url):
+        parsed = urllib.parse.urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.connection = None
+
+    def post(self, path, body):
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.connection.request('POST', path, body, {'Content-Type': 'application/json'})
+                response = self.connection.getresponse()
+                data = response.read()
+                if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                    self.connection.close()
+                    self.connection = None
+                return response.status, data
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # The development server closes idle connections; retry once on a fresh one
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+
+def request_target(raw_path):
+    """
+    Turn a captured raw path and query string into a request target http.client can send.
+
+    http.client only sends ASCII request lines, so non-ASCII (and other unsafe)
+    bytes are percent-encoded; the server decodes them back to the captured bytes.
+    Existing escapes are left as they are.
+    """
+    return urllib.parse.quote(raw_path, safe=string.punctuation)
+
+def load_capture(path, limit=None):
+    """
+    Return (offsets in seconds from the first request, request paths, payloads) from a capture log.
+    """
+    times, paths, payloads = [], [], []
+    for arrival_time, request_path, payload in read_capture(path):
+        times.append(arrival_time)
+        paths.append(request_target(request_path))
+        payloads.append(payload)
+        if limit and len(payloads) >= limit:
+            break
+    if not payloads:
+        return np.zeros(0), [], []
+    times = np.asarray(times)
+    # Records from several workers may be slightly out of order; replay in arrival order
+    order = np.argsort(times, kind='stable')
+    return times[order] - times[order[0]], [paths[i] for i in order], [payloads[i] for i in order]
+
+def replay(url, offsets, paths, payloads, speed, concurrency):
+    """
+    Send every payload to its path on `url` on schedule and return per-request latencies (ms) and responses.
+    """
+    latencies = np.full(len(payloads), np.nan)
+    responses = [None] * len(payloads)
+    work = queue.Queue(maxsize=concurrency * 4)
+
+    def worker():
+        client = ReplayClient(url)
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            i, scheduled = item
+            try:
+                status, body = client.post(paths[i], payloads[i])
+                responses[i] = json.loads(body) if status == 200 else {'error': f"HTTP {status}"}
+            except Exception as e:
+                responses[i] = {'error': str(e)}
+            latencies[i] = (time.perf_counter() - scheduled) * 1000
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for i, offset in enumerate(offsets):
+        if speed is None:
+            scheduled = time.perf_counter()
+        else:
+            scheduled = start + offset / speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        work.put((i, scheduled))
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return latencies, responses, elapsed
+
+def summarize_run(url, latencies, responses, elapsed):
+    ok = np.array([r is not None and 'error' not in r for r in responses])
+    valid = latencies[ok]
+    summary = {
+        'target': url,
+        'requests': len(responses),
+        'errors': int((~ok).sum()),
+        'elapsed_seconds': elapsed,
+        'throughput_rps': len(responses) / elapsed if elapsed > 0 else None,
+    }
+    for p in LATENCY_PERCENTILES:
+        summary[f'p{p:g}_ms'] = float(np.percentile(valid, p)) if len(valid) else None
+    summary['max_ms'] = float(valid.max()) if len(valid) else None
+    return summary
+
+def compare_scores(responses_a, responses_b, tolerance):
+    """
+    Compare the responses of two runs request by request.
+    """
+    diffs, fraud_flips, risk_changes, compared = [], 0, 0, 0
+    worst = []
+    for i, (a, b) in enumerate(zip(responses_a, responses_b)):
+        if not a or not b or 'error' in a or 'error' in b:
+            continue
+        compared += 1
+        diff = abs(a['confidence'] - b['confidence'])
+        diffs.append(diff)
+        fraud_flips += a['is_fraud'] != b['is_fraud']
+        risk_changes += a['risk_level'] != b['risk_level']
+        if diff > tolerance:
+            worst.append((diff, i))
+    diffs = np.asarray(diffs)
+    worst.sort(reverse=True)
+    return {
+        'compared': compared,
+        'max_abs_diff': float(diffs.max()) if compared else None,
+        'mean_abs_diff': float(diffs.mean()) if compared else None,
+        'over_tolerance': len(worst),
+        'is_fraud_flips': int(fraud_flips),
+        'risk_level_changes': int(risk_changes),
+        'worst_requests': [{'index': i, 'abs_diff': d} for d, i in worst[:10]],
+    }
+
+def print_latency_table(summaries):
+    columns = [f'p{p:g}_ms' for p in LATENCY_PERCENTILES] + ['max_ms']
+    print("{:<32} {:<8} {:<8} {:<10}".format("Target", "Reqs", "Errors", "Req/s") +
+          "".join("{:<10}".format(c.replace('_ms', '')) for c in columns))
+    print("-" * (58 + 10 * len(columns)))
+    for s in summaries:
+        print("{:<32} {:<8} {:<8} {:<10.0f}".format(s['target'][:32], s['requests'], s['errors'], s['throughput_rps'] or 0) +
+              "".join("{:<10.2f}".format(s[c]) if s[c] is not None else "{:<10}".format('-') for c in columns))
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured /predict traffic against running API builds")
+    parser.add_argument('capture', help="Capture log written with CAPTURE_PATH")
+    parser.add_argument('--target', required=True, help="Base URL of the build under test")
+    parser.add_argument('--compare', default=None, help="Base URL of a second build to compare against")
+    parser.add_argument('--speed', default='1', help="Replay speed multiplier, or 'max' for no pacing")
+    parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at most")
+    parser.add_argument('--limit', type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument('--tolerance', type=float, default=1e-9, help="Confidence difference reported as a mismatch")
+    parser.add_argument('--output', default=None, help="Optional JSON report")
+    args = parser.parse_args()
+
+    speed = None if args.speed == 'max' else float(args.speed)
+    offsets, paths, payloads = load_capture(args.capture, args.limit)
+    if not payloads:
+        parser.exit(1, "Capture log contains no requests\n")
+    duration = offsets[-1] / speed if speed else 0
+    print(f"Replaying {len(payloads)} requests captured over {offsets[-1]:.1f}s "
+          f"at {'max' if speed is None else f'{speed:g}x'} speed" +
+          (f" (~{duration:.1f}s per target)" if speed else ""))
+
+    targets = [args.target] + ([args.compare] if args.compare else [])
+    runs = []
+    for url in targets:
+        latencies, responses, elapsed = replay(url, offsets, paths, payloads, speed, args.concurrency)
+        runs.append((summarize_run(url, latencies, responses, elapsed), responses))
+
+    print_latency_table([summary for summary, _ in runs])
+    report = {'capture': args.capture, 'speed': args.speed, 'runs': [summary for summary, _ in runs]}
+
+    if args.compare:
+        comparison = compare_scores(runs[0][1], runs[1][1], args.tolerance)
+        report['score_comparison'] = comparison
+        print(f"\nScores compared on {comparison['compared']} requests: "
+              f"max |diff| {comparison['max_abs_diff']:.3g}, "
+              f"{comparison['over_tolerance']} over tolerance, "
+              f"{comparison['is_fraud_flips']} is_fraud flips, "
+              f"{comparison['risk_level_changes']} risk level changes"
+              if comparison['compared'] else "\nNo successful responses to compare")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
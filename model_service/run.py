@@ -1,33 +1,209 @@
+"""
+Process supervisor for the model service.
+
+Starts the Flask API and the Streamlit dashboard in parallel, reports each one
+ready only once its readiness endpoint answers (the API's /ready requires the
+model to be loaded, warmed up and passing its self-test), restarts children that
+crash with exponential backoff, and forwards SIGTERM/SIGINT so both shut down
+gracefully. A child that does not become ready within its readiness timeout is
+treated as failed: it is stopped and restarted with the same backoff as a crash.
+
+    python run.py              # API and dashboard
+    python run.py --api        # API only
+    python run.py --streamlit  # dashboard only
+
+    python run.py --api --ready-timeout 300  # allow a slow model load
+"""
+import argparse
 import os
+import signal
 import subprocess
 import sys
-import time
 import threading
+import time
+import urllib.error
+import urllib.request
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+API_PORT = int(os.getenv("PORT", 8001))
+STREAMLIT_PORT = int(os.getenv("STREAMLIT_PORT", 8501))
+
+# Restart backoff: doubles after every crash up to the maximum, and resets once a
+# child has stayed up for STABLE_SECONDS
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 30.0
+STABLE_SECONDS = 60.0
+
+# Seconds a child may take to report ready before it is restarted
+READY_TIMEOUT = float(os.getenv("READY_TIMEOUT", 120))
+# Seconds a child that missed its readiness deadline gets to exit after SIGTERM
+READY_KILL_GRACE = 10.0
+
+def check_ready(url, timeout=1.0):
+    """
+    Return True if `url` answers with HTTP 200.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError, TimeoutError, OSError):
+        return False
+
+class ManagedProcess:
+    """
+    A supervised child process with a readiness URL and restart backoff.
+    """
+    def __init__(self, name, command, ready_url, ready_timeout=READY_TIMEOUT):
+        self.name = name
+        self.command = command
+        self.ready_url = ready_url
+        self.ready_timeout = ready_timeout
+        self.process = None
+        self.started_at = None
+        self.ready = threading.Event()
+        self.backoff = BACKOFF_INITIAL
+        self.restart_at = None
+        self.restarts = 0
+
+    def start(self):
+        print(f"[{self.name}] starting: {' '.join(self.command)}")
+        self.ready.clear()
+        self.restart_at = None
+        self.started_at = time.monotonic()
+        # Own session/process group so signals reach any grandchildren (e.g. the
+        # Flask reloader) and a terminal Ctrl-C goes through the supervisor only
+        self.process = subprocess.Popen(self.command, cwd=SERVICE_DIR, start_new_session=True)
+        threading.Thread(target=self._wait_until_ready, args=(self.process,),
+                         name=f"{self.name}-readiness", daemon=True).start()
+
+    def _wait_until_ready(self, process):
+        deadline = self.started_at + self.ready_timeout
+        while process.poll() is None:
+            if check_ready(self.ready_url):
+                print(f"[{self.name}] ready in {time.monotonic() - self.started_at:.1f}s")
+                self.ready.set()
+                return
+            if time.monotonic() > deadline:
+                # A child stuck before readiness (hung model load, failing self-test) never
+                # serves; stop it so poll() sees the exit and restarts it with backoff
+                print(f"[{self.name}] not ready after {self.ready_timeout:.0f}s on {self.ready_url}; restarting")
+                self._kill(process, READY_KILL_GRACE)
+                return
+            time.sleep(0.25)
+
+    def _kill(self, process, grace_period):
+        self._signal(process, signal.SIGTERM)
+        try:
+            process.wait(timeout=grace_period)
+        except subprocess.TimeoutExpired:
+            print(f"[{self.name}] did not stop within {grace_period:.0f}s; killing")
+            self._signal(process, signal.SIGKILL)
+            process.wait()
 
-def run_flask_api():
-    """Run the Flask API server"""
-    print("Starting Flask API server...")
-    subprocess.run([sys.executable, "model_service/flask_api.py"])
+    @staticmethod
+    def _signal(process, signum):
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signum)
+            except ProcessLookupError:
+                pass
 
-def run_streamlit_app():
-    """Run the Streamlit dashboard"""
-    print("Starting Streamlit dashboard...")
-    subprocess.run([sys.executable, "-m", "streamlit", "run", "model_service/streamlit_app.py", 
-                    "--server.port", "8501", "--server.address", "0.0.0.0"])
+    def poll(self):
+        """
+        Check the child; schedule or perform a restart if it has exited.
+        """
+        if self.process is None:
+            return
+        if self.restart_at is not None:
+            if time.monotonic() >= self.restart_at:
+                self.restarts += 1
+                self.start()
+            return
+
+        returncode = self.process.poll()
+        if returncode is None:
+            return
+        uptime = time.monotonic() - self.started_at
+        if uptime >= STABLE_SECONDS:
+            self.backoff = BACKOFF_INITIAL
+        print(f"[{self.name}] exited with code {returncode} after {uptime:.1f}s; "
+              f"restart #{self.restarts + 1} in {self.backoff:.0f}s")
+        self.ready.clear()
+        self.restart_at = time.monotonic() + self.backoff
+        self.backoff = min(self.backoff * 2, BACKOFF_MAX)
+
+    def send_signal(self, signum):
+        if self.process is not None:
+            self._signal(self.process, signum)
+
+    def stop(self, grace_period):
+        """
+        Forward SIGTERM, wait up to `grace_period` seconds, then SIGKILL.
+        """
+        self.restart_at = None
+        if self.process is not None:
+            self._kill(self.process, grace_period)
+
+class Supervisor:
+    def __init__(self, processes, grace_period=10.0):
+        self.processes = processes
+        self.grace_period = grace_period
+        self.stopping = threading.Event()
+
+    def _handle_signal(self, signum, frame):
+        print(f"Received {signal.Signals(signum).name}, shutting down")
+        self.stopping.set()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        start = time.monotonic()
+        for managed in self.processes:
+            managed.start()
+
+        announced = False
+        while not self.stopping.is_set():
+            for managed in self.processes:
+                managed.poll()
+            if not announced and all(m.ready.is_set() for m in self.processes):
+                print(f"All services ready in {time.monotonic() - start:.1f}s")
+                announced = True
+            self.stopping.wait(0.5)
+
+        for managed in self.processes:
+            managed.stop(self.grace_period)
+        return 0
+
+def build_processes(run_api, run_streamlit, ready_timeout=READY_TIMEOUT):
+    processes = []
+    if run_api:
+        processes.append(ManagedProcess(
+            "api",
+            [sys.executable, os.path.join(SERVICE_DIR, "flask_api.py")],
+            f"http://127.0.0.1:{API_PORT}/ready", ready_timeout))
+    if run_streamlit:
+        processes.append(ManagedProcess(
+            "streamlit",
+            [sys.executable, "-m", "streamlit", "run", os.path.join(SERVICE_DIR, "streamlit_app.py"),
+             "--server.port", str(STREAMLIT_PORT), "--server.address", "0.0.0.0"],
+            f"http://127.0.0.1:{STREAMLIT_PORT}/_stcore/health", ready_timeout))
+    return processes
 
 if __name__ == "__main__":
-    # Create threads for both applications
-    flask_thread = threading.Thread(target=run_flask_api)
-    streamlit_thread = threading.Thread(target=run_streamlit_app)
-    
-    # Start both threads
-    flask_thread.start()
-    
-    # Give Flask a moment to start
-    time.sleep(2)
-    
-    streamlit_thread.start()
-    
-    # Wait for threads to complete
-    flask_thread.join()
-    streamlit_thread.join()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run and supervise the model service processes")
+    parser.add_argument("--api", action="store_true", help="Run the Flask API")
+    parser.add_argument("--streamlit", action="store_true", help="Run the Streamlit dashboard")
+    parser.add_argument("--grace-period", type=float, default=10.0, help="Seconds to wait for graceful shutdown")
+    parser.add_argument("--ready-timeout", type=float, default=READY_TIMEOUT,
+                        help="Seconds a service may take to become ready before it is restarted")
+    args = parser.parse_args()
+
+    # Keep supervisor log lines in order with the children's output when piped
+    sys.stdout.reconfigure(line_buffering=True)
+
+    # With neither flag, run both services as before
+    run_both = not args.api and not args.streamlit
+    supervisor = Supervisor(build_processes(args.api or run_both, args.streamlit or run_both,
+                                                 args.ready_timeout), args.grace_period)
+    sys.exit(supervisor.run())
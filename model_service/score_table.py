@@ -0,0 +1,176 @@
+"""
+Precomputed score lookup tables for the API's discrete feature space.
+
+Apart from Amount, every feature the API feeds the model is derived from a few
+categorical flags (card entry method, e-commerce, abnormal location, amount over
+1000, night, weekend), so there are only a few dozen distinct V-feature vectors.
+At model load each combination is scored once, and a prediction becomes a table
+lookup plus an amount term:
+
+- Linear models (LogisticRegression, SGDClassifier with log loss): the table holds
+  the logit of every combination with Amount at zero; the score is
+  sigmoid(table[combination] + amount_coef * amount).
+- Tree models (DecisionTree, RandomForest, ExtraTrees, GradientBoosting): Amount
+  only enters through split thresholds, so for a fixed combination the
+  probability is a step function of Amount. The table holds one value per
+  interval between consecutive Amount thresholds, and the score is
+  table[combination, searchsorted(thresholds, amount)].
+
+Tables are checked against the full model when they are built and discarded if
+they disagree; models without a table (e.g. HistGradientBoosting) keep full scoring.
+"""
+import itertools
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+# Largest tree table (combinations x amount intervals) built at load time
+MAX_TREE_CELLS = 2_000_000
+# Tolerance when checking a table against full scoring (linear tables differ by rounding only)
+CHECK_TOLERANCE = 1e-9
+
+class LinearScoreTable:
+    kind = "linear"
+
+    def __init__(self, index, logits, amount_coef, amount_offset):
+        self.index = index
+        self.logits = logits
+        self.amount_coef = amount_coef
+        self.amount_offset = amount_offset
+
+    def score(self, flags_list, amounts):
+        rows = np.fromiter((self.index[flags] for flags in flags_list), dtype=np.intp, count=len(flags_list))
+        logits = self.logits[rows] + self.amount_coef * (np.asarray(amounts, dtype=float) - self.amount_offset)
+        return 1.0 / (1.0 + np.exp(-logits))
+
+class TreeScoreTable:
+    kind = "tree"
+
+    def __init__(self, index, thresholds, values, amount_mean, amount_scale):
+        self.index = index
+        self.thresholds = thresholds
+        self.values = values
+        self.amount_mean = amount_mean
+        self.amount_scale = amount_scale
+
+    def scale_amounts(self, amounts):
+        # Same operations as StandardScaler.transform, then the float32 cast trees apply to inputs
+        scaled = (np.asarray(amounts, dtype=float) - self.amount_mean) / self.amount_scale
+        return scaled.astype(np.float32).astype(float)
+
+    def score(self, flags_list, amounts):
+        rows = np.fromiter((self.index[flags] for flags in flags_list), dtype=np.intp, count=len(flags_list))
+        # Trees send a sample left when value <= threshold, so the interval index is
+        # the number of thresholds strictly below the value
+        columns = np.searchsorted(self.thresholds, self.scale_amounts(amounts), side='left')
+        return self.values[rows, columns]
+
+def covers(amounts):
+    """
+    True if every amount can be scored from a table (NaN/inf amounts need full scoring).
+    """
+    return bool(np.all(np.isfinite(np.asarray(amounts, dtype=float))))
+
+def _trees(model):
+    if hasattr(model, 'tree_'):
+        return [model]
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None:
+        return None
+    trees = list(np.ravel(np.asarray(estimators, dtype=object)))
+    return trees if trees and all(hasattr(tree, 'tree_') for tree in trees) else None
+
+def _is_logistic(model):
+    coef = getattr(model, 'coef_', None)
+    return (coef is not None and np.asarray(coef).shape[0] == 1 and hasattr(model, 'predict_proba')
+            and getattr(model, 'loss', 'log_loss') in ('log_loss', 'log'))
+
+def _interval_representatives(thresholds):
+    """
+    One float32 value inside every interval (thresholds[i-1], thresholds[i]], plus one above the last.
+    """
+    representatives = thresholds.astype(np.float32)
+    above = representatives.astype(float) > thresholds
+    representatives[above] = np.nextafter(representatives[above], np.float32(-np.inf))
+    last = np.float32(thresholds[-1]) if len(thresholds) else np.float32(0)
+    if len(thresholds) and float(last) <= thresholds[-1]:
+        last = np.nextafter(last, np.float32(np.inf))
+    return np.append(representatives, last).astype(float)
+
+def _build_linear(model, index, raw_matrix, scaler, amount_index):
+    coef = np.asarray(model.coef_, dtype=float)[0]
+    intercept = float(np.ravel(model.intercept_)[0])
+    scaled = scaler.transform(raw_matrix)
+    # Drop the amount term from the per-combination logit; it is added per request
+    scaled[:, amount_index] = 0.0
+    logits = scaled @ coef + intercept
+    amount_coef = coef[amount_index] / scaler.scale_[amount_index]
+    amount_offset = scaler.mean_[amount_index] if scaler.mean_ is not None else 0.0
+    return LinearScoreTable(index, logits, amount_coef, amount_offset)
+
+def _build_tree(model, trees, index, raw_matrix, scaler, amount_index):
+    thresholds = np.unique(np.concatenate([
+        tree.tree_.threshold[tree.tree_.feature == amount_index] for tree in trees]))
+    representatives = _interval_representatives(thresholds)
+    n_combinations, n_intervals = raw_matrix.shape[0], len(representatives)
+    if n_combinations * n_intervals > MAX_TREE_CELLS:
+        print(f"Score table skipped: {n_combinations} x {n_intervals} cells exceeds {MAX_TREE_CELLS}")
+        return None
+
+    scaled = scaler.transform(raw_matrix)
+    grid = np.repeat(scaled, n_intervals, axis=0)
+    grid[:, amount_index] = np.tile(representatives, n_combinations)
+    values = model.predict_proba(grid)[:, 1].reshape(n_combinations, n_intervals)
+    amount_mean = scaler.mean_[amount_index] if scaler.mean_ is not None else 0.0
+    return TreeScoreTable(index, thresholds, values, amount_mean, scaler.scale_[amount_index])
+
+def _check(table, model, scaler, selected_features, flag_space, features_from_flags, seed=0):
+    """
+    Largest difference between table scores and full scoring on random transactions.
+    """
+    rng = np.random.default_rng(seed)
+    flags_list = [flag_space[i] for i in rng.integers(len(flag_space), size=2000)]
+    amounts = np.round(rng.exponential(500, size=len(flags_list)), 2)
+    raw = np.array([[features[f] for f in selected_features]
+                    for features in (features_from_flags(flags, amount) for flags, amount in zip(flags_list, amounts))])
+    expected = model.predict_proba(scaler.transform(raw))[:, 1]
+    return float(np.max(np.abs(table.score(flags_list, amounts) - expected)))
+
+def build_score_table(model, scaler, selected_features, flag_space, features_from_flags):
+    """
+    Tabulate `model` over every combination in `flag_space`.
+
+    `features_from_flags(flags, amount)` must return the feature dict for a
+    combination; every feature except Amount may depend on the flags only.
+    Returns a LinearScoreTable or TreeScoreTable, or None if the model,
+    scaler or features cannot be tabulated.
+    """
+    if (model is None or not isinstance(scaler, StandardScaler) or scaler.scale_ is None
+            or 'Amount' not in selected_features):
+        return None
+    amount_index = list(selected_features).index('Amount')
+    flag_space = list(flag_space)
+    index = {flags: i for i, flags in enumerate(flag_space)}
+    raw_matrix = np.array([[features_from_flags(flags, 0.0)[f] for f in selected_features] for flags in flag_space])
+
+    trees = _trees(model)
+    if _is_logistic(model):
+        table = _build_linear(model, index, raw_matrix, scaler, amount_index)
+    elif trees is not None:
+        table = _build_tree(model, trees, index, raw_matrix, scaler, amount_index)
+    else:
+        return None
+    if table is None:
+        return None
+
+    error = _check(table, model, scaler, selected_features, flag_space, features_from_flags)
+    if error > CHECK_TOLERANCE:
+        print(f"Score table disagrees with the model (max error {error:.2e}); using full scoring")
+        return None
+    return table
+
+def flag_combinations(*flag_values):
+    """
+    Every combination of the given per-flag value tuples.
+    """
+    return list(itertools.product(*flag_values))
@@ -0,0 +1,36 @@
+"""
+Distance from transactions to the nearest known frauds, as an extra signal next to the model score.
+
+At training time create_cc_model.py builds a KD-tree over the scaled feature
+vectors of the training frauds and stores it in the model bundle as
+'fraud_index'. At scoring time the scaled feature matrix of a batch is
+queried in one call. With a few hundred to a few thousand 8-dimensional
+points, a k-nearest query costs tens of microseconds per row, which is about
+the same as the model call itself. Distances are Euclidean in the scaled
+feature space: the smaller they are, the more the transaction resembles
+known fraud.
+"""
+import numpy as np
+from sklearn.neighbors import KDTree
+
+DEFAULT_K = 5
+# Frauds indexed at most; more are sampled down so the index stays small and fast
+MAX_INDEXED_FRAUDS = 100000
+
+def build_fraud_index(fraud_vectors, leaf_size=40, random_state=42):
+    """
+    KD-tree over the scaled feature vectors of known frauds.
+    """
+    fraud_vectors = np.asarray(fraud_vectors, dtype=float)
+    if len(fraud_vectors) > MAX_INDEXED_FRAUDS:
+        rng = np.random.default_rng(random_state)
+        fraud_vectors = fraud_vectors[rng.choice(len(fraud_vectors), MAX_INDEXED_FRAUDS, replace=False)]
+    return KDTree(fraud_vectors, leaf_size=leaf_size)
+
+def nearest_fraud_distances(index, feature_matrix, k=DEFAULT_K):
+    """
+    Distances from each row of a scaled feature matrix to its k nearest indexed frauds, nearest first.
+    """
+    k = min(k, index.get_arrays()[0].shape[0])
+    distances, _ = index.query(np.asarray(feature_matrix, dtype=float), k=k)
+    return distances
@@ -0,0 +1,231 @@
+"""
+Unix domain socket transport for co-located scoring clients.
+
+Skips loopback TCP, HTTP parsing and JSON by exchanging fixed binary frames
+over persistent connections. Every frame is a 4-byte big-endian payload length
+followed by the payload:
+
+    request:  <IdBBBH  request id, amount, card entry method code,
+                       merchant category code, location code, timestamp length
+              followed by the UTF-8 ISO-8601 timestamp (may be empty),
+              then <H ipAddress length and the ASCII ipAddress (may be empty)
+    response: <IBdBB   request id, status (0 ok, 1 error), confidence,
+                       is_fraud, risk level code
+
+Categorical fields are encoded as indexes into the tables below; 0 (empty
+string) stands for any value not in the table, which scores the same as an
+unrecognised string over HTTP. The ipAddress is screened against the IP
+blocklist as on /predict; frames from older clients that end after the
+timestamp are accepted and not screened. Clients may pipeline: send many requests
+without waiting, then read the responses, which come back in request order
+and carry the request id.
+
+Started by flask_api.py when MODEL_SOCKET_PATH is set, or standalone:
+
+    MODEL_SOCKET_PATH=/tmp/fraud-model.sock python socket_server.py
+"""
+import os
+import socket
+import socketserver
+import struct
+import threading
+
+CARD_ENTRY_METHODS = ('', 'chip', 'online', 'manual', 'contactless', 'swipe')
+MERCHANT_CATEGORIES = ('', 'retail', 'ecommerce', 'travel', 'restaurant', 'entertainment',
+                       'electronics', 'food_beverage', 'fuel', 'luxury')
+LOCATIONS = ('', 'normal', 'abnormal')
+RISK_LEVELS = ('low', 'medium', 'high')
+
+FRAME_HEADER = struct.Struct('>I')
+REQUEST = struct.Struct('<IdBBBH')
+FIELD_LENGTH = struct.Struct('<H')
+RESPONSE = struct.Struct('<IBdBB')
+MAX_FRAME_SIZE = 64 * 1024
+
+def _code(table, value):
+    try:
+        return table.index(value or '')
+    except ValueError:
+        return 0
+
+def _value(table, code):
+    return table[code] if code < len(table) else ''
+
+def encode_request(request_id, transaction):
+    """
+    Encode a transaction dict (the /predict JSON body) as a framed request.
+    """
+    timestamp = (transaction.get('timestamp') or '').encode('utf-8')
+    ip_address = (transaction.get('ipAddress') or '').encode('utf-8')
+    payload = REQUEST.pack(
+        request_id,
+        float(transaction['amount']),
+        _code(CARD_ENTRY_METHODS, transaction.get('cardEntryMethod')),
+        _code(MERCHANT_CATEGORIES, transaction.get('merchantCategory')),
+        _code(LOCATIONS, transaction.get('location')),
+        len(timestamp)) + timestamp + FIELD_LENGTH.pack(len(ip_address)) + ip_address
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def decode_request(payload):
+    """
+    Decode a request payload into (request_id, transaction dict).
+    """
+    request_id, amount, entry, merchant, location, ts_length = REQUEST.unpack_from(payload)
+    offset = REQUEST.size + ts_length
+    if len(payload) < offset:
+        raise struct.error("truncated timestamp")
+    timestamp = payload[REQUEST.size:offset].decode('utf-8')
+    ip_address = ''
+    if len(payload) > offset:
+        (ip_length,) = FIELD_LENGTH.unpack_from(payload, offset)
+        offset += FIELD_LENGTH.size
+        if len(payload) < offset + ip_length:
+            raise struct.error("truncated ipAddress")
+        ip_address = payload[offset:offset + ip_length].decode('utf-8')
+    transaction = {
+        'amount': amount,
+        'cardEntryMethod': _value(CARD_ENTRY_METHODS, entry),
+        'merchantCategory': _value(MERCHANT_CATEGORIES, merchant),
+        'location': _value(LOCATIONS, location),
+        'timestamp': timestamp or None,
+        'ipAddress': ip_address or None,
+    }
+    return request_id, transaction
+
+def encode_response(request_id, result=None):
+    if result is None:
+        payload = RESPONSE.pack(request_id, 1, 0.0, 0, 0)
+    else:
+        payload = RESPONSE.pack(request_id, 0, result['confidence'], int(result['is_fraud']),
+                                RISK_LEVELS.index(result['risk_level']))
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+def decode_response(payload):
+    """
+    Decode a response payload into (request_id, result dict or None on error).
+    """
+    request_id, status, confidence, is_fraud, risk = RESPONSE.unpack(payload)
+    if status != 0:
+        return request_id, None
+    return request_id, {'is_fraud': bool(is_fraud), 'confidence': confidence, 'risk_level': RISK_LEVELS[risk]}
+
+def split_frames(buffer):
+    """
+    Split complete frames off the front of `buffer` (a bytearray, consumed in place).
+    """
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= FRAME_HEADER.size:
+        (length,) = FRAME_HEADER.unpack_from(buffer, offset)
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+        end = offset + FRAME_HEADER.size + length
+        if len(buffer) < end:
+            break
+        frames.append(bytes(buffer[offset + FRAME_HEADER.size:end]))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+class ScoringHandler(socketserver.BaseRequestHandler):
+    """
+    Serves one persistent connection. Every frame that arrived in the same read is
+    scored before the responses are written back with a single send.
+    """
+    def handle(self):
+        buffer = bytearray()
+        while True:
+            data = self.request.recv(65536)
+            if not data:
+                return
+            buffer.extend(data)
+            try:
+                frames = split_frames(buffer)
+            except ValueError as e:
+                print(f"Closing scoring connection: {e}")
+                return
+
+            responses = []
+            for payload in frames:
+                try:
+                    request_id, transaction = decode_request(payload)
+                except (struct.error, UnicodeDecodeError):
+                    # Without a request id the stream cannot be resynchronised
+                    print("Closing scoring connection: malformed request frame")
+                    return
+                try:
+                    responses.append(encode_response(request_id, self.server.score(transaction)))
+                except Exception as e:
+                    print(f"Socket prediction error: {e}")
+                    responses.append(encode_response(request_id))
+            if responses:
+                self.request.sendall(b''.join(responses))
+
+class ScoringSocketServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, score):
+        self.score = score
+        # Remove a stale socket left behind by a previous process
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, ScoringHandler)
+
+def start_socket_server(path, score):
+    """
+    Start listening on `path` in a background thread; `score` maps a transaction dict to a result dict.
+    """
+    server = ScoringSocketServer(path, score)
+    thread = threading.Thread(target=server.serve_forever, name="socket-scoring", daemon=True)
+    thread.start()
+    print(f"Scoring socket listening on {path}")
+    return server
+
+class SocketScoringClient:
+    """
+    Minimal blocking client with pipelining, used by bench_transport.py and for testing.
+    """
+    def __init__(self, path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.buffer = bytearray()
+        self.next_id = 0
+
+    def _read_responses(self, count):
+        results = []
+        while len(results) < count:
+            for payload in split_frames(self.buffer):
+                results.append(decode_response(payload)[1])
+            if len(results) < count:
+                data = self.sock.recv(65536)
+                if not data:
+                    raise ConnectionError("Scoring socket closed")
+                self.buffer.extend(data)
+        return results
+
+    def score_many(self, transactions, window=256):
+        """
+        Pipeline transactions in windows of `window` requests, reading each window's
+        responses before sending the next so neither side's socket buffer fills up.
+        """
+        results = []
+        for start in range(0, len(transactions), window):
+            frames = []
+            for transaction in transactions[start:start + window]:
+                self.next_id = (self.next_id + 1) & 0xFFFFFFFF
+                frames.append(encode_request(self.next_id, transaction))
+            self.sock.sendall(b''.join(frames))
+            results.extend(self._read_responses(len(frames)))
+        return results
+
+    def score(self, transaction):
+        return self.score_many([transaction])[0]
+
+    def close(self):
+        self.sock.close()
+
+if __name__ == "__main__":
+    import flask_api
+    server = ScoringSocketServer(os.getenv("MODEL_SOCKET_PATH", "/tmp/fraud-model.sock"), flask_api.score_socket_transaction)
+    print(f"Scoring socket listening on {server.server_address}")
+    server.serve_forever()
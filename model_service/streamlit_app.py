@@ -3,8 +3,22 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
-from sklearn.metrics import confusion_matrix, classification_report
+import hashlib
+import threading
+from sklearn.metrics import average_precision_score, confusion_matrix, classification_report
 import altair as alt
+from explain import build_explainer, top_contributions
+from dataset_eval import (DEFAULT_CACHE_DIR, LABEL_COLUMNS, EvaluationJob, bundle_scorer, cache_path,
+                          check_columns, data_sha256, load_cached_scores)
+
+MODEL_PATH = os.getenv("MODEL_PATH", "fraud_model.pkl")
+FEATURE_COLUMNS = ['amount', 'is_online', 'is_manual', 'is_ecommerce', 'hour_of_day', 'is_weekend', 'location_mismatch']
+EVAL_SAMPLE_SIZE = int(os.getenv("EVAL_SAMPLE_SIZE", 1000))
+# Full evaluation mode: the model it scores (a creditcard.csv bundle, separate from the
+# dashboard's 7-feature model), the labeled dataset, and where the scores are cached
+EVAL_MODEL_PATH = os.getenv("EVAL_MODEL_PATH", "credit_card_model.pkl")
+EVAL_DATA_PATH = os.getenv("EVAL_DATA_PATH", "../data/creditcard.csv")
+EVAL_CACHE_DIR = os.getenv("EVAL_CACHE_DIR", DEFAULT_CACHE_DIR)
 
 # Page Configuration
 st.set_page_config(
@@ -24,10 +38,28 @@ for testing predictions with custom inputs.
 st.sidebar.title("Navigation")
 page = st.sidebar.radio("Select a page", ["Model Overview", "Test Prediction", "Model Performance"])
 
+@st.cache_data(show_spinner=False)
+def _file_sha256(path, mtime, size):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def model_file_hash(model_path=MODEL_PATH):
+    """
+    Content hash of the model file, used to key cached evaluation results.
+    The hash itself is cached by path, mtime and size so reruns don't re-read the file.
+    """
+    if not os.path.exists(model_path):
+        return "demo"
+    stat = os.stat(model_path)
+    return _file_sha256(model_path, stat.st_mtime, stat.st_size)
+
 # Load model
 @st.cache_resource
-def load_model():
-    model_path = os.getenv("MODEL_PATH", "fraud_model.pkl")
+def load_model(model_hash):
+    model_path = MODEL_PATH
     if os.path.exists(model_path):
         try:
             model = joblib.load(model_path)
@@ -39,7 +71,14 @@ def load_model():
         st.warning(f"Model file not found at {model_path}. Using demo mode.")
         return None, False
 
-model, model_loaded = load_model()
+@st.cache_resource
+def load_explainer(model_hash, _model):
+    # None for models without an exact cheap explanation; the page then falls back to rules
+    return build_explainer(_model, FEATURE_COLUMNS) if _model is not None else None
+
+model_hash = model_file_hash()
+model, model_loaded = load_model(model_hash)
+explainer = load_explainer(model_hash, model if model_loaded else None)
 
 # Generate sample data for demonstration
 @st.cache_data
@@ -55,30 +94,230 @@ def generate_sample_data(n_samples=1000):
         'location_mismatch': np.random.choice([0, 1], size=n_samples, p=[0.9, 0.1]),
     }
     
-    # Generate labels with some relationship to features
-    labels = np.zeros(n_samples)
-    for i in range(n_samples):
-        prob = 0.05  # Base fraud probability
-        if data['amount'][i] > 1000:
-            prob += 0.2
-        if data['is_manual'][i] == 1:
-            prob += 0.1
-        if data['location_mismatch'][i] == 1:
-            prob += 0.3
-        if 0 <= data['hour_of_day'][i] <= 5:  # Late night/early morning
-            prob += 0.05
-        if data['is_weekend'][i] == 1:
-            prob += 0.05
-        
-        # Cap at 0.9 to avoid certainty
-        prob = min(prob, 0.9)
-        
-        labels[i] = np.random.choice([0, 1], p=[1-prob, prob])
+    # Generate labels with some relationship to features (vectorized so large
+    # evaluation sets are generated in one pass)
+    prob = np.full(n_samples, 0.05)  # Base fraud probability
+    prob += 0.2 * (data['amount'] > 1000)
+    prob += 0.1 * (data['is_manual'] == 1)
+    prob += 0.3 * (data['location_mismatch'] == 1)
+    prob += 0.05 * (data['hour_of_day'] <= 5)  # Late night/early morning
+    prob += 0.05 * (data['is_weekend'] == 1)
+    
+    # Cap at 0.9 to avoid certainty
+    prob = np.minimum(prob, 0.9)
+    
+    labels = (np.random.random(n_samples) < prob).astype(float)
     
     data['is_fraud'] = labels
     return pd.DataFrame(data)
 
-sample_data = generate_sample_data()
+def histogram_frame(values, bins=30, value_range=None):
+    """
+    Bin values server-side so charts receive one row per bin instead of one per record.
+    """
+    counts, edges = np.histogram(np.asarray(values, dtype=float), bins=bins, range=value_range)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:], 'count': counts})
+
+def downsample_curve(df, max_points=200):
+    """
+    Keep at most `max_points` evenly spaced points of a curve, always including both ends.
+    """
+    if len(df) <= max_points:
+        return df
+    idx = np.unique(np.linspace(0, len(df) - 1, max_points).round().astype(int))
+    return df.iloc[idx].reset_index(drop=True)
+
+@st.cache_data(show_spinner=False)
+def amount_histogram(n_samples, bins=30):
+    return histogram_frame(generate_sample_data(n_samples)['amount'], bins=bins)
+
+@st.cache_data(show_spinner=False)
+def fraud_distribution(n_samples):
+    fraud_counts = generate_sample_data(n_samples)['is_fraud'].value_counts().reset_index()
+    fraud_counts.columns = ['Fraud', 'Count']
+    fraud_counts['Fraud'] = fraud_counts['Fraud'].map({0: 'Legitimate', 1: 'Fraud'})
+    return fraud_counts
+
+def demo_fraud_probability(data):
+    """
+    Rule-based fraud probabilities used when no model is loaded.
+    """
+    prob = np.full(len(data), 0.05)  # Base fraud probability
+    prob += 0.2 * (data['amount'].to_numpy() > 1000)  # Amount-based risk
+    prob += 0.1 * (data['is_manual'].to_numpy() == 1)  # Card entry risk
+    prob += 0.08 * (data['is_ecommerce'].to_numpy() == 1)  # E-commerce risk
+    prob += 0.3 * (data['location_mismatch'].to_numpy() == 1)  # Location risk (highest impact)
+    hour = data['hour_of_day'].to_numpy()
+    prob += 0.05 * ((hour < 6) | (hour > 22))  # Time-based risk
+    prob += 0.05 * (data['is_weekend'].to_numpy() == 1)  # Weekend risk
+    return np.minimum(prob, 0.95)  # Cap at 0.95 for demo
+
+def roc_points(y_true, y_prob, n_thresholds=100):
+    """
+    TPR/FPR at evenly spaced thresholds, computed from sorted scores instead of
+    one confusion matrix per threshold.
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    thresholds = np.linspace(0, 1, n_thresholds)
+    pos_scores = np.sort(np.asarray(y_prob)[y_true])
+    neg_scores = np.sort(np.asarray(y_prob)[~y_true])
+    # Number of scores >= threshold in each class
+    tp = len(pos_scores) - np.searchsorted(pos_scores, thresholds, side='left')
+    fp = len(neg_scores) - np.searchsorted(neg_scores, thresholds, side='left')
+    tpr = tp / len(pos_scores) if len(pos_scores) else np.zeros(n_thresholds)
+    fpr = fp / len(neg_scores) if len(neg_scores) else np.zeros(n_thresholds)
+    return pd.DataFrame({
+        'False Positive Rate': fpr,
+        'True Positive Rate': tpr,
+        'Threshold': thresholds
+    })
+
+@st.cache_data(show_spinner=False)
+def evaluate_model(model_hash, n_samples, _model):
+    """
+    Score the evaluation set and compute everything the Model Performance page shows.
+    Cached on the model file hash and dataset parameters; `_model` is not hashed.
+    """
+    data = generate_sample_data(n_samples)
+    X = data[FEATURE_COLUMNS]
+    y_true = data['is_fraud'].astype(int)
+    
+    if _model is not None:
+        y_prob = _model.predict_proba(X)[:, 1]
+        y_pred = _model.predict(X)
+    else:
+        # Demo mode - generate predictions with more sophisticated rules
+        y_prob = demo_fraud_probability(data)
+        y_pred = (y_prob > 0.5).astype(int)
+    
+    return score_metrics(y_true, y_prob, y_pred)
+
+def score_metrics(y_true, y_prob, y_pred):
+    """
+    Confusion matrix, metrics, ROC curve and score histograms for scored labeled data.
+    """
+    # Calculate confusion matrix and basic metrics
+    conf_matrix = confusion_matrix(y_true, y_pred, labels=[0, 1])
+    tn, fp, fn, tp = conf_matrix.ravel()
+    accuracy = (tn + tp) / (tn + fp + fn + tp)
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+    f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
+    
+    # Score distribution per class, pre-binned over [0, 1]
+    y_prob = np.asarray(y_prob)
+    is_fraud = np.asarray(y_true) == 1
+    score_hist = pd.concat([
+        histogram_frame(y_prob[~is_fraud], bins=20, value_range=(0, 1)).assign(Actual='Legitimate'),
+        histogram_frame(y_prob[is_fraud], bins=20, value_range=(0, 1)).assign(Actual='Fraud'),
+    ], ignore_index=True)
+    
+    return {
+        'conf_matrix': conf_matrix,
+        'metrics': {'Accuracy': accuracy, 'Precision': precision, 'Recall': recall, 'F1 Score': f1,
+                    # Unlike accuracy, not dominated by the legitimate majority on imbalanced data
+                    'PR-AUC': average_precision_score(y_true, y_prob) if is_fraud.any() else 0.0},
+        'roc': downsample_curve(roc_points(y_true, y_prob)),
+        'score_hist': score_hist,
+    }
+
+@st.cache_resource
+def start_background_evaluation(model_hash, n_samples):
+    """
+    Warm the evaluation cache in a background thread once per model and dataset,
+    so the Model Performance page is ready by the time it is opened.
+    """
+    thread = threading.Thread(
+        target=evaluate_model,
+        args=(model_hash, n_samples, model if model_loaded else None),
+        name="evaluation-warmup",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+evaluation_thread = start_background_evaluation(model_hash, EVAL_SAMPLE_SIZE)
+
+@st.cache_resource(show_spinner=False)
+def load_evaluation_model(model_path, model_hash):
+    # A bundle ({'model', 'scaler', 'selected_features'}) or a bare estimator
+    return joblib.load(model_path)
+
+def dataset_scorer():
+    """
+    Name, hash, feature columns and score function of the model evaluated on a dataset:
+    EVAL_MODEL_PATH, or the dashboard's model (or the demo rules) if that file doesn't exist.
+    """
+    if os.path.exists(EVAL_MODEL_PATH):
+        eval_hash = model_file_hash(EVAL_MODEL_PATH)
+        features, score = bundle_scorer(load_evaluation_model(EVAL_MODEL_PATH, eval_hash), FEATURE_COLUMNS)
+        return os.path.basename(EVAL_MODEL_PATH), eval_hash, features, score
+    if not model_loaded:
+        return "demo rules", model_hash, FEATURE_COLUMNS, demo_fraud_probability
+    features, score = bundle_scorer(model, FEATURE_COLUMNS)
+    return os.path.basename(MODEL_PATH), model_hash, features, score
+
+@st.cache_resource(show_spinner=False)
+def start_dataset_evaluation(model_hash, data_hash, _data, features, label, _score):
+    """
+    Start scoring a dataset once per model and data; sessions opening the page meanwhile share the job.
+    """
+    return EvaluationJob(_data, features, label, _score, cache_path(model_hash, data_hash, EVAL_CACHE_DIR)).start()
+
+@st.cache_data(show_spinner=False)
+def full_dataset_metrics(model_hash, data_hash, _y_true, _y_prob):
+    return score_metrics(_y_true, _y_prob, (_y_prob > 0.5).astype(int))
+
+def full_dataset_evaluation():
+    """
+    Evaluate EVAL_MODEL_PATH on EVAL_DATA_PATH or an uploaded labeled CSV. Scores come from
+    the disk cache, or from a background job shown with a progress bar. Returns None if the
+    data cannot be evaluated.
+    """
+    upload = st.file_uploader("Labeled CSV (optional; defaults to the full dataset)", type="csv")
+    if upload is not None:
+        data, data_name = upload.getvalue(), upload.name
+        data_hash = data_sha256(data)
+    elif os.path.exists(EVAL_DATA_PATH):
+        stat = os.stat(EVAL_DATA_PATH)
+        data, data_name = EVAL_DATA_PATH, os.path.basename(EVAL_DATA_PATH)
+        data_hash = _file_sha256(EVAL_DATA_PATH, stat.st_mtime, stat.st_size)
+    else:
+        st.info(f"Dataset not found at {EVAL_DATA_PATH}. Set EVAL_DATA_PATH or upload a labeled CSV.")
+        return None
+    
+    try:
+        eval_name, eval_hash, features, score = dataset_scorer()
+    except Exception as e:
+        st.error(f"Error loading evaluation model {EVAL_MODEL_PATH}: {e}")
+        return None
+    missing, label = check_columns(data, features)
+    if missing or label is None:
+        problems = [f"missing feature columns {', '.join(missing)}"] if missing else []
+        if label is None:
+            problems.append(f"no label column ({' or '.join(LABEL_COLUMNS)})")
+        st.error(f"{data_name} cannot be evaluated with {eval_name}: {'; '.join(problems)}.")
+        return None
+    
+    scores = load_cached_scores(cache_path(eval_hash, data_hash, EVAL_CACHE_DIR))
+    if scores is None:
+        job = start_dataset_evaluation(eval_hash, data_hash, data, features, label, score)
+        if not job.done.is_set():
+            # Scoring continues in the background if the page is left; returning shows its progress again
+            progress = st.progress(job.progress, text=f"Scoring {data_name}...")
+            while not job.done.wait(0.25):
+                progress.progress(job.progress, text=f"Scored {job.rows:,} rows of {data_name}")
+            progress.empty()
+        if job.error:
+            # Forget the failed job so the next visit retries
+            start_dataset_evaluation.clear()
+            st.error(f"Evaluation of {data_name} failed: {job.error}")
+            return None
+        scores = job.result
+    
+    y_true, y_prob = scores
+    st.caption(f"{eval_name} evaluated on all {len(y_true):,} rows of {data_name} ({int(y_true.sum()):,} frauds)")
+    return full_dataset_metrics(eval_hash, data_hash, y_true, y_prob)
 
 # Function to get risk level
 def get_risk_level(confidence):
@@ -124,17 +363,16 @@ if page == "Model Overview":
     
     with col1:
         st.write("Transaction Amount Distribution")
-        chart = alt.Chart(sample_data).mark_bar().encode(
-            alt.X('amount:Q', bin=True),
-            y='count()'
+        chart = alt.Chart(amount_histogram(EVAL_SAMPLE_SIZE)).mark_bar().encode(
+            alt.X('bin_start:Q', title='amount'),
+            alt.X2('bin_end:Q'),
+            alt.Y('count:Q', title='Count of Records')
         ).properties(height=300)
         st.altair_chart(chart, use_container_width=True)
     
     with col2:
         st.write("Fraud Distribution")
-        fraud_counts = sample_data['is_fraud'].value_counts().reset_index()
-        fraud_counts.columns = ['Fraud', 'Count']
-        fraud_counts['Fraud'] = fraud_counts['Fraud'].map({0: 'Legitimate', 1: 'Fraud'})
+        fraud_counts = fraud_distribution(EVAL_SAMPLE_SIZE)
         
         chart = alt.Chart(fraud_counts).mark_bar().encode(
             x='Fraud:N',
@@ -259,25 +497,37 @@ elif page == "Test Prediction":
         st.subheader("Explanation")
         
         explanation = []
-        if amount > 2000:
-            explanation.append("• High transaction amount significantly increases fraud risk.")
-        elif amount > 1000:
-            explanation.append("• Moderate-high transaction amount increases fraud risk.")
+        if explainer is not None:
+            result = top_contributions(explainer, feature_array, feature_array, top_k=5)[0]
+            for item in result['contributions']:
+                if item['contribution'] == 0:
+                    continue
+                direction = "increases" if item['contribution'] > 0 else "decreases"
+                if result['space'] == "probability":
+                    size = f"{abs(item['contribution']):.1%}"
+                else:
+                    size = f"{abs(item['contribution']):.2f} log-odds"
+                explanation.append(f"• {item['feature']} = {item['value']:g} {direction} fraud risk by {size}.")
+        else:
+            if amount > 2000:
+                explanation.append("• High transaction amount significantly increases fraud risk.")
+            elif amount > 1000:
+                explanation.append("• Moderate-high transaction amount increases fraud risk.")
             
-        if card_entry == "manual":
-            explanation.append("• Manual card entry method increases risk.")
+            if card_entry == "manual":
+                explanation.append("• Manual card entry method increases risk.")
             
-        if merchant_category == "ecommerce":
-            explanation.append("• E-commerce transactions have elevated risk.")
+            if merchant_category == "ecommerce":
+                explanation.append("• E-commerce transactions have elevated risk.")
             
-        if location_mismatch:
-            explanation.append("• Abnormal transaction location is a major risk factor.")
+            if location_mismatch:
+                explanation.append("• Abnormal transaction location is a major risk factor.")
             
-        if is_weekend:
-            explanation.append("• Weekend transactions have slightly higher risk.")
+            if is_weekend:
+                explanation.append("• Weekend transactions have slightly higher risk.")
             
-        if hour_of_day < 6 or hour_of_day > 22:
-            explanation.append(f"• Time of transaction ({hour_of_day}:00) outside business hours increases risk.")
+            if hour_of_day < 6 or hour_of_day > 22:
+                explanation.append(f"• Time of transaction ({hour_of_day}:00) outside business hours increases risk.")
         
         if not explanation:
             explanation.append("• This transaction has normal risk patterns.")
@@ -289,138 +539,79 @@ elif page == "Test Prediction":
 elif page == "Model Performance":
     st.header("Model Performance Metrics")
     
-    # Generate predictions on sample data using all 7 features
-    X = sample_data[['amount', 'is_online', 'is_manual', 'is_ecommerce', 'hour_of_day', 'is_weekend', 'location_mismatch']]
-    y_true = sample_data['is_fraud']
+    mode = st.radio("Evaluation data", ["Synthetic sample", "Full dataset"], horizontal=True)
     
-    if model_loaded:
-        y_pred = model.predict(X)
-        y_prob = model.predict_proba(X)[:, 1]
+    if mode == "Synthetic sample":
+        # Wait for the background warm-up, then read the cached evaluation
+        if evaluation_thread.is_alive():
+            with st.spinner("Evaluating model..."):
+                evaluation_thread.join()
+        evaluation = evaluate_model(model_hash, EVAL_SAMPLE_SIZE, model if model_loaded else None)
     else:
-        # Demo mode - generate predictions with more sophisticated rules
-        y_prob = np.zeros(len(sample_data))
-        for i, row in sample_data.iterrows():
-            prob = 0.05  # Base fraud probability
-            
-            # Amount-based risk
-            if row['amount'] > 1000:
-                prob += 0.2
-                
-            # Card entry risk
-            if row['is_manual'] == 1:
-                prob += 0.1
-                
-            # E-commerce risk
-            if row['is_ecommerce'] == 1:
-                prob += 0.08
-                
-            # Location risk (highest impact)
-            if row['location_mismatch'] == 1:
-                prob += 0.3
-                
-            # Time-based risk
-            if row['hour_of_day'] < 6 or row['hour_of_day'] > 22:
-                prob += 0.05
-                
-            # Weekend risk
-            if row['is_weekend'] == 1:
-                prob += 0.05
-                
-            # Cap at 0.95 for demo
-            prob = min(prob, 0.95)
-            y_prob[i] = prob
-            
-        y_pred = (y_prob > 0.5).astype(int)
-    
-    # Calculate confusion matrix
-    conf_matrix = confusion_matrix(y_true, y_pred)
+        evaluation = full_dataset_evaluation()
     
-    # Display metrics
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("Confusion Matrix")
-        
-        # Create DataFrame for confusion matrix
-        conf_df = pd.DataFrame(
-            conf_matrix, 
-            index=['Actual: Legitimate', 'Actual: Fraud'], 
-            columns=['Predicted: Legitimate', 'Predicted: Fraud']
-        )
-        
-        st.dataframe(conf_df)
-        
-        # Calculate basic metrics
-        tn, fp, fn, tp = conf_matrix.ravel()
-        accuracy = (tn + tp) / (tn + fp + fn + tp)
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-        f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0
+    if evaluation is not None:
+        conf_matrix = evaluation['conf_matrix']
         
         # Display metrics
-        st.subheader("Performance Metrics")
-        metrics_df = pd.DataFrame({
-            'Metric': ['Accuracy', 'Precision', 'Recall', 'F1 Score'],
-            'Value': [accuracy, precision, recall, f1]
-        })
-        
-        for i, row in metrics_df.iterrows():
-            st.metric(row['Metric'], f"{row['Value']:.4f}")
-    
-    with col2:
-        st.subheader("ROC Curve")
-        
-        # Calculate and plot ROC curve (simplified)
-        thresholds = np.linspace(0, 1, 100)
-        tpr = []
-        fpr = []
+        col1, col2 = st.columns(2)
         
-        for threshold in thresholds:
-            y_pred_thresh = (y_prob >= threshold).astype(int)
-            tn, fp, fn, tp = confusion_matrix(y_true, y_pred_thresh).ravel()
+        with col1:
+            st.subheader("Confusion Matrix")
             
-            tpr.append(tp / (tp + fn) if (tp + fn) > 0 else 0)
-            fpr.append(fp / (fp + tn) if (fp + tn) > 0 else 0)
-        
-        roc_df = pd.DataFrame({
-            'False Positive Rate': fpr,
-            'True Positive Rate': tpr,
-            'Threshold': thresholds
-        })
-        
-        # Plot ROC curve
-        roc_chart = alt.Chart(roc_df).mark_line().encode(
-            x='False Positive Rate:Q',
-            y='True Positive Rate:Q'
-        ).properties(
-            height=300
-        )
-        
-        # Add diagonal reference line
-        diagonal = alt.Chart(pd.DataFrame({'x': [0, 1], 'y': [0, 1]})).mark_line(
-            strokeDash=[4, 4],
-            color='gray'
-        ).encode(
-            x='x:Q',
-            y='y:Q'
-        )
-        
-        st.altair_chart(roc_chart + diagonal, use_container_width=True)
-        
-        # Display prediction distribution
-        st.subheader("Prediction Distribution")
-        pred_df = pd.DataFrame({
-            'Fraud Probability': y_prob,
-            'Actual': y_true.map({0: 'Legitimate', 1: 'Fraud'})
-        })
-        
-        hist = alt.Chart(pred_df).mark_bar().encode(
-            alt.X('Fraud Probability:Q', bin=alt.Bin(maxbins=20)),
-            alt.Y('count():Q'),
-            alt.Color('Actual:N')
-        ).properties(height=300)
+            # Create DataFrame for confusion matrix
+            conf_df = pd.DataFrame(
+                conf_matrix, 
+                index=['Actual: Legitimate', 'Actual: Fraud'], 
+                columns=['Predicted: Legitimate', 'Predicted: Fraud']
+            )
+            
+            st.dataframe(conf_df)
+            
+            # Display metrics
+            st.subheader("Performance Metrics")
+            metrics_df = pd.DataFrame({
+                'Metric': list(evaluation['metrics'].keys()),
+                'Value': list(evaluation['metrics'].values())
+            })
+            
+            for i, row in metrics_df.iterrows():
+                st.metric(row['Metric'], f"{row['Value']:.4f}")
         
-        st.altair_chart(hist, use_container_width=True)
+        with col2:
+            st.subheader("ROC Curve")
+            
+            roc_df = evaluation['roc']
+            
+            # Plot ROC curve
+            roc_chart = alt.Chart(roc_df).mark_line().encode(
+                x='False Positive Rate:Q',
+                y='True Positive Rate:Q'
+            ).properties(
+                height=300
+            )
+            
+            # Add diagonal reference line
+            diagonal = alt.Chart(pd.DataFrame({'x': [0, 1], 'y': [0, 1]})).mark_line(
+                strokeDash=[4, 4],
+                color='gray'
+            ).encode(
+                x='x:Q',
+                y='y:Q'
+            )
+            
+            st.altair_chart(roc_chart + diagonal, use_container_width=True)
+            
+            # Display prediction distribution
+            st.subheader("Prediction Distribution")
+            hist = alt.Chart(evaluation['score_hist']).mark_bar().encode(
+                alt.X('bin_start:Q', title='Fraud Probability'),
+                alt.X2('bin_end:Q'),
+                alt.Y('count:Q', title='Count of Records'),
+                alt.Color('Actual:N')
+            ).properties(height=300)
+            
+            st.altair_chart(hist, use_container_width=True)
 
 # Footer
 st.markdown("---")
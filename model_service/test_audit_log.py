@@ -0,0 +1,93 @@
+"""
+Checks for the audit log: batching, segment rotation, dropping when full and crash-safe reading.
+
+Run with pytest:
+
+    python -m pytest test_audit_log.py
+"""
+import glob
+import gzip
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from audit_log import AuditLog, read_audit_log
+
+def describe(record):
+    return {"i": record[0]}
+
+def segment_files(directory):
+    return sorted(glob.glob(os.path.join(directory, "audit-*.jsonl.gz")))
+
+def test_records_round_trip(tmp_path):
+    directory = str(tmp_path / "audit")
+    # A long flush interval: everything is written by close(), in batches of 10
+    audit = AuditLog(directory, describe, flush_interval=60, batch_size=10)
+    for i in range(35):
+        assert audit.record(i)
+    audit.close()
+
+    stats = audit.stats()
+    assert (stats["written"], stats["batches"], stats["segments"], stats["queued"]) == (35, 4, 1, 0)
+    assert not stats["writer_alive"]
+    assert [r["i"] for r in read_audit_log(os.path.join(directory, "*.jsonl.gz"))] == list(range(35))
+    # Concatenated gzip members read as one file with standard tools
+    with gzip.open(segment_files(directory)[0], "rt") as f:
+        assert len(f.read().splitlines()) == 35
+
+@pytest.mark.parametrize("limits", [{"segment_bytes": 1}, {"segment_seconds": 0}])
+def test_segments_rotate(tmp_path, limits):
+    directory = str(tmp_path / "audit")
+    audit = AuditLog(directory, describe, flush_interval=60, batch_size=10, **limits)
+    for i in range(35):
+        audit.record(i)
+    audit.close()
+
+    files = segment_files(directory)
+    assert len(files) == audit.stats()["segments"] == 4
+    assert all(f"-{os.getpid()}-" in os.path.basename(path) for path in files)
+    assert [r["i"] for r in read_audit_log(files)] == list(range(35))
+    assert audit.stats()["current_segment"] == os.path.basename(files[-1])
+
+def test_full_queue_drops_records(tmp_path):
+    audit = AuditLog(str(tmp_path / "audit"), describe, max_queue=5, flush_interval=60)
+    accepted = [audit.record(i) for i in range(8)]
+    assert accepted == [True] * 5 + [False] * 3
+    assert audit.stats()["dropped"] == 3
+    audit.close()
+    assert audit.stats()["written"] == 5
+
+def test_unserializable_records_are_counted(tmp_path):
+    def failing_describe(record):
+        if record[0] % 2:
+            raise ValueError("bad record")
+        return {"i": record[0]}
+
+    directory = str(tmp_path / "audit")
+    audit = AuditLog(directory, failing_describe, flush_interval=60)
+    for i in range(6):
+        audit.record(i)
+    audit.close()
+
+    stats = audit.stats()
+    assert (stats["written"], stats["write_errors"], stats["last_error"]) == (3, 3, "bad record")
+    assert [r["i"] for r in read_audit_log(segment_files(directory))] == [0, 2, 4]
+
+def test_truncated_batch_is_skipped(tmp_path):
+    directory = str(tmp_path / "audit")
+    audit = AuditLog(directory, describe, flush_interval=60, batch_size=10)
+    for i in range(20):
+        audit.record(i)
+    audit.close()
+
+    path = segment_files(directory)[0]
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 5)
+    assert [r["i"] for r in read_audit_log(path)] == list(range(10))
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
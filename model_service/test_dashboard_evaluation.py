@@ -0,0 +1,89 @@
+"""
+End-to-end check of the dashboard's full-dataset evaluation with the default model settings.
+
+MODEL_PATH and EVAL_MODEL_PATH are left at their defaults; only the dataset is
+a small generated file in creditcard.csv format. Run with pytest:
+
+    python -m pytest test_dashboard_evaluation.py
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def write_creditcard_csv(path, rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame(rng.normal(size=(rows, 28)), columns=[f"V{i}" for i in range(1, 29)])
+    data.insert(0, "Time", np.arange(rows, dtype=float))
+    data["Class"] = (rng.random(rows) < 0.05).astype(int)
+    # Frauds shifted along the components the bundled model relies on
+    data.loc[data["Class"] == 1, ["V4", "V11"]] += 3.0
+    data.loc[data["Class"] == 1, ["V10", "V14"]] -= 3.0
+    data["Amount"] = rng.exponential(80.0, rows).round(2)
+    data.to_csv(path, index=False)
+    return data
+
+def test_default_evaluation_model_scores_creditcard(tmp_path):
+    import joblib
+    from dataset_eval import EvaluationJob, bundle_scorer, check_columns
+
+    data_path = str(tmp_path / "creditcard.csv")
+    data = write_creditcard_csv(data_path)
+    features, score = bundle_scorer(joblib.load(os.path.join(HERE, "credit_card_model.pkl")), [])
+    assert check_columns(data_path, features) == ([], "Class")
+
+    job = EvaluationJob(data_path, features, "Class", score, str(tmp_path / "cache" / "scores.npz"),
+                        chunk_rows=1000).start()
+    assert job.done.wait(60)
+    assert job.error is None
+    y_true, y_prob = job.result
+    assert len(y_true) == len(data)
+    assert y_prob[y_true == 1].mean() > y_prob[y_true == 0].mean()
+
+class ArrayOnlyEstimator:
+    """
+    Bare estimator that, like the row-splitting path of predict_proba, only accepts arrays.
+    """
+    def predict_proba(self, X):
+        assert isinstance(X, np.ndarray), type(X)
+        p = 1 / (1 + np.exp(-X[:, 0]))
+        return np.column_stack([1 - p, p])
+
+def test_bare_estimator_is_scored_on_arrays():
+    from dataset_eval import bundle_scorer
+    from inference_threads import LARGE_BATCH_ROWS
+
+    features, score = bundle_scorer(ArrayOnlyEstimator(), ["amount", "is_online"])
+    frame = pd.DataFrame({"amount": np.linspace(-3, 3, LARGE_BATCH_ROWS * 2), "is_online": 0})
+    probabilities = score(frame[features])
+    assert probabilities.shape == (len(frame),)
+    assert probabilities[0] < 0.5 < probabilities[-1]
+
+def test_dashboard_full_dataset_default_config(tmp_path, monkeypatch):
+    testing = pytest.importorskip("streamlit.testing.v1", reason="AppTest needs streamlit >= 1.28")
+
+    data_path = str(tmp_path / "creditcard.csv")
+    write_creditcard_csv(data_path)
+    monkeypatch.chdir(HERE)
+    for name in ("MODEL_PATH", "EVAL_MODEL_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("EVAL_DATA_PATH", data_path)
+    monkeypatch.setenv("EVAL_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("EVAL_SAMPLE_SIZE", "200")
+
+    app = testing.AppTest.from_file(os.path.join(HERE, "streamlit_app.py"), default_timeout=120)
+    app.run()
+    app.sidebar.radio[0].set_value("Model Performance").run()
+    next(radio for radio in app.radio if radio.label == "Evaluation data").set_value("Full dataset").run()
+
+    assert not app.exception
+    assert not [error.value for error in app.error if "evaluat" in error.value]
+    assert any(caption.value.startswith("credit_card_model.pkl evaluated on all 3,000 rows")
+               for caption in app.caption)
+    assert os.listdir(tmp_path / "cache")
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,100 @@
+"""
+Checks for the dashboard's Model Performance page: evaluation results cached by model
+file hash, and charts that receive pre-aggregated data.
+
+Runs streamlit_app.py with AppTest against a small model written to a temporary
+file. Run with pytest:
+
+    python -m pytest test_dashboard_performance.py
+"""
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pyarrow as pa
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class CountingModel:
+    """
+    Logistic score on the amount that counts how often it is evaluated.
+    """
+    calls = 0
+
+    def __init__(self, slope):
+        self.slope = slope
+
+    def predict_proba(self, X):
+        CountingModel.calls += 1
+        p = 1 / (1 + np.exp(-self.slope * (X["amount"].to_numpy() - 500) / 500))
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+@pytest.fixture
+def dashboard(tmp_path, monkeypatch):
+    testing = pytest.importorskip("streamlit.testing.v1", reason="AppTest needs streamlit >= 1.28")
+    model_path = str(tmp_path / "model.pkl")
+    monkeypatch.chdir(HERE)
+    monkeypatch.setenv("MODEL_PATH", model_path)
+    monkeypatch.setenv("EVAL_SAMPLE_SIZE", "3000")
+
+    def render(page="Model Performance"):
+        app = testing.AppTest.from_file(os.path.join(HERE, "streamlit_app.py"), default_timeout=120)
+        app.run()
+        app.sidebar.radio[0].set_value(page).run()
+        assert not app.exception
+        return app
+    return model_path, render
+
+def performance_metrics(app):
+    return {metric.label: metric.value for metric in app.metric}
+
+def chart_rows(app):
+    """
+    Number of data rows sent to the browser for each chart, largest dataset per chart.
+    """
+    return [max(pa.ipc.open_stream(dataset.data.data).read_all().num_rows for dataset in chart.proto.datasets)
+            for chart in app.get("vega_lite_chart")]
+
+def test_evaluation_is_cached_by_model_hash(dashboard, tmp_path):
+    model_path, render = dashboard
+    # A slope no other test uses, so the model hash is new to this process's caches
+    joblib.dump(CountingModel(slope=3.25), model_path)
+    first = performance_metrics(render())
+    evaluations = CountingModel.calls
+    assert first and evaluations > 0
+
+    # Reruns and new sessions reuse the cached evaluation
+    assert performance_metrics(render()) == first
+    assert CountingModel.calls == evaluations
+
+    # A different model file is evaluated again...
+    saved = str(tmp_path / "saved.pkl")
+    shutil.copy(model_path, saved)
+    joblib.dump(CountingModel(slope=-3.25), model_path)
+    assert performance_metrics(render()) != first
+    assert CountingModel.calls > evaluations
+
+    # ...while restoring the earlier content (new mtime, same hash) hits the cache again
+    evaluations = CountingModel.calls
+    shutil.copy(saved, model_path)
+    assert performance_metrics(render()) == first
+    assert CountingModel.calls == evaluations
+
+def test_charts_receive_aggregated_data(dashboard, monkeypatch):
+    model_path, render = dashboard
+    joblib.dump(CountingModel(slope=2.75), model_path)
+    for sample_size in ("3000", "20000"):
+        monkeypatch.setenv("EVAL_SAMPLE_SIZE", sample_size)
+        # Amount histogram (30 bins) and fraud counts (2 classes)
+        assert chart_rows(render("Model Overview")) == [30, 2]
+        # ROC curve (at most 200 points) and per-class score histograms (2 x 20 bins)
+        roc, score_hist = chart_rows(render())
+        assert roc <= 200 and score_hist == 40
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,108 @@
+"""
+Checks for the sampling profiler behind /debug/profile: token checks, collapsed
+stacks, one profile at a time, and the token-protected endpoint.
+
+Run with pytest:
+
+    python -m pytest test_debug_profile.py
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+from collections import Counter
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import debug_tools
+from debug_tools import collapsed_text, debug_token_matches, sample_stacks
+
+def busy_scoring_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_scoring_loop, args=(stop,), name="Thread-42 (process_request_thread)")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+def test_debug_token_matches():
+    assert debug_token_matches("s3cret", "s3cret")
+    assert debug_token_matches("Bearer s3cret ", "s3cret")
+    assert not debug_token_matches("Bearer other", "s3cret")
+    assert not debug_token_matches("s3cret", None)
+    assert not debug_token_matches(None, "s3cret")
+    assert not debug_token_matches("", "")
+
+def test_samples_other_threads_as_collapsed_stacks(busy_thread):
+    stacks, rounds = sample_stacks(0.3, interval=0.01)
+    assert rounds > 5
+
+    busy = [stack for stack in stacks if "busy_scoring_loop" in stack]
+    # Every round after the thread entered its target caught it there
+    assert busy and sum(stacks[stack] for stack in busy) >= rounds - 1
+    # Rooted at the thread name without its counter, outermost frame first
+    root, *frames = busy[0].split(";")
+    assert root == "Thread (process_request_thread)"
+    assert frames[0].startswith("_bootstrap (threading.py:")
+    assert any(frame.startswith("busy_scoring_loop (test_debug_profile.py:") for frame in frames)
+    # The sampling thread itself is not profiled
+    assert not any("sample_stacks" in stack for stack in stacks)
+
+def test_one_profile_at_a_time(busy_thread):
+    results = []
+    profiler = threading.Thread(target=lambda: results.append(sample_stacks(0.5)))
+    profiler.start()
+    while not debug_tools._profile_lock.locked():
+        pass
+    assert sample_stacks(0.1) is None
+    profiler.join()
+    assert results[0] is not None
+    assert sample_stacks(0.05) is not None
+
+def test_collapsed_text_lists_hottest_first():
+    stacks = Counter({"main;a;b": 2, "main;a;c": 7, "worker;d": 1})
+    assert collapsed_text(stacks) == "main;a;c 7\nmain;a;b 2\nworker;d 1\n"
+    assert collapsed_text(Counter()) == ""
+
+def test_profile_endpoint_requires_the_token():
+    # The /debug routes are registered at import time, so the API runs in its own process
+    script = """if True:
+        import json, flask_api
+        client = flask_api.app.test_client()
+        profile = client.get('/debug/profile?seconds=0.2', headers={'Authorization': 'Bearer s3cret'})
+        print(json.dumps({
+            'missing': client.get('/debug/profile?seconds=0.2').status_code,
+            'wrong': client.get('/debug/profile', headers={'X-Debug-Token': 'guess'}).status_code,
+            'too_long': client.get('/debug/profile?seconds=31', headers={'X-Debug-Token': 's3cret'}).status_code,
+            'not_a_number': client.get('/debug/profile?seconds=x', headers={'X-Debug-Token': 's3cret'}).status_code,
+            'status': profile.status_code,
+            'mimetype': profile.mimetype,
+            'samples': int(profile.headers['X-Profile-Samples']),
+            'body': profile.get_data(as_text=True),
+        }))
+    """
+    env = dict(os.environ, DEBUG_TOKEN="s3cret", DEBUG_ENDPOINTS="false",
+               MODEL_PATH=os.path.join(HERE, "credit_card_model.pkl"))
+    output = subprocess.run([sys.executable, "-c", script], cwd=HERE, env=env, capture_output=True,
+                            text=True, timeout=120, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert (result["missing"], result["wrong"]) == (401, 401)
+    assert (result["too_long"], result["not_a_number"]) == (400, 400)
+    assert (result["status"], result["mimetype"]) == (200, "text/plain")
+    assert result["samples"] > 0
+    # The background self-test thread is always running
+    assert "health-self-test;" in result["body"]
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in result["body"].splitlines())
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
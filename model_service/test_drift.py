@@ -0,0 +1,79 @@
+"""
+Checks for drift monitoring: P-square quantiles, reference histograms, PSI/KS and the monitor.
+
+Run with pytest:
+
+    python -m pytest test_drift.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from drift import (DriftMonitor, P2Quantile, binned_ks_statistic, build_reference,
+                   build_reference_distributions, population_stability_index)
+
+@pytest.mark.parametrize("p", [0.05, 0.5, 0.95])
+def test_p2_quantile_tracks_exact_quantile(p):
+    values = np.random.default_rng(0).normal(size=20000)
+    sketch = P2Quantile(p)
+    for value in values:
+        sketch.add(value)
+    assert sketch.value() == pytest.approx(np.quantile(values, p), abs=0.05)
+
+def test_p2_quantile_with_few_values():
+    sketch = P2Quantile(0.5)
+    assert sketch.value() is None
+    for value in (3.0, 1.0, 2.0):
+        sketch.add(value)
+    assert sketch.value() == 2.0
+
+def test_reference_uses_decile_edges():
+    values = np.arange(1000, dtype=float)
+    reference = build_reference(np.append(values, np.nan))
+    assert len(reference["edges"]) == 9
+    assert reference["counts"] == [100] * 10
+    assert reference["quantiles"]["0.5"] == pytest.approx(499.5)
+
+def test_psi_and_ks():
+    counts = [100] * 10
+    assert population_stability_index(counts, counts) == pytest.approx(0.0)
+    assert binned_ks_statistic(counts, counts) == pytest.approx(0.0)
+
+    shifted = [0] * 5 + [200] * 5
+    assert population_stability_index(counts, shifted) > 0.25
+    assert binned_ks_statistic(counts, shifted) == pytest.approx(0.5)
+    assert binned_ks_statistic(counts, [0] * 10) == 0.0
+
+def test_monitor_flags_shifted_feature():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(5000, 2))
+    monitor = DriftMonitor(build_reference_distributions(X, ["stable", "shifted"], scores=rng.random(5000)))
+
+    live = rng.normal(size=(5000, 2))
+    live[:, 1] += 1.0
+    # Quantile sketches see a strided sample of each batch, so feed several batches
+    for batch in np.array_split(live, 50):
+        monitor.observe_batch({"stable": batch[:, 0], "shifted": batch[:, 1], "unknown": batch[:, 0]})
+    monitor.observe({"stable": 0.0, "shifted": 1.0, "confidence": 0.5})
+
+    report = monitor.report()
+    assert report["observations"] == 5001
+    variables = report["variables"]
+    assert variables["stable"]["status"] == "stable"
+    assert variables["shifted"]["status"] == "significant"
+    assert variables["shifted"]["count"] == 5001
+    assert variables["confidence"]["count"] == 1
+    assert variables["shifted"]["quantiles"]["0.5"] == pytest.approx(1.0, abs=0.15)
+
+    monitor.reset()
+    report = monitor.report()
+    assert report["observations"] == 0
+    assert report["variables"]["stable"]["status"] == "no_data"
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
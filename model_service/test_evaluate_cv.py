@@ -0,0 +1,106 @@
+"""
+Checks for the cross-validation script: dataset and fold caches, per-fold metrics and summaries.
+
+Run with pytest:
+
+    python -m pytest test_evaluate_cv.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+from threadpoolctl import threadpool_limits
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import evaluate_cv
+from evaluate_cv import load_folds, parse_candidate, prepare_dataset, recall_at_fpr, summarize
+
+FEATURES = ["V1", "V2", "Amount"]
+
+@pytest.fixture
+def dataset(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1000
+    y = np.zeros(n, dtype=int)
+    y[rng.choice(n, 50, replace=False)] = 1
+    data = pd.DataFrame({
+        "Time": np.arange(n),
+        "V1": rng.normal(size=n) + 2 * y,
+        "V2": rng.normal(size=n),
+        "Amount": rng.exponential(80, size=n),
+        "Class": y,
+    })
+    data_path = str(tmp_path / "creditcard.csv")
+    data.to_csv(data_path, index=False)
+    return data_path, data
+
+def test_dataset_is_cached_per_file_version(dataset, tmp_path):
+    data_path, data = dataset
+    cache_dir = str(tmp_path / "cache")
+    dataset_dir = prepare_dataset(data_path, FEATURES, cache_dir)
+    X = np.load(os.path.join(dataset_dir, "X.npy"), mmap_mode="r")
+    np.testing.assert_allclose(X, data[FEATURES].to_numpy())
+    assert np.load(os.path.join(dataset_dir, "y.npy")).sum() == 50
+    assert not [name for name in os.listdir(dataset_dir) if ".tmp" in name]
+
+    assert prepare_dataset(data_path, FEATURES, cache_dir) == dataset_dir
+    # Other features or a rewritten file get their own cache
+    assert prepare_dataset(data_path, FEATURES[:2], cache_dir) != dataset_dir
+    data.head(500).to_csv(data_path, index=False)
+    assert prepare_dataset(data_path, FEATURES, cache_dir) != dataset_dir
+
+def test_folds_are_stratified_and_cached(dataset, tmp_path):
+    data_path, _ = dataset
+    dataset_dir = prepare_dataset(data_path, FEATURES, str(tmp_path / "cache"))
+    y = np.load(os.path.join(dataset_dir, "y.npy"))
+    folds = load_folds(dataset_dir, 5, seed=1)
+
+    np.testing.assert_array_equal(np.sort(np.concatenate(folds)), np.arange(len(y)))
+    assert [len(fold) for fold in folds] == [200] * 5
+    assert [int(y[fold].sum()) for fold in folds] == [10] * 5
+
+    assert os.path.exists(os.path.join(dataset_dir, "folds_k5_seed1.npz"))
+    for cached, fold in zip(load_folds(dataset_dir, 5, seed=1), folds):
+        np.testing.assert_array_equal(cached, fold)
+    assert not np.array_equal(load_folds(dataset_dir, 5, seed=2)[0], folds[0])
+
+def test_recall_at_fpr():
+    y_true = np.array([0] * 100 + [1] * 4)
+    # One negative outscores two of the positives
+    y_prob = np.concatenate([np.linspace(0, 0.5, 99), [0.85], [0.95, 0.9, 0.8, 0.3]])
+    assert recall_at_fpr(y_true, y_prob, (0.0, 0.01, 0.5)) == {"0.0": 0.5, "0.01": 0.75, "0.5": 1.0}
+
+def test_parse_candidate():
+    name, estimator = parse_candidate('logistic_regression:{"C": 0.1}')
+    assert name == 'logistic_regression:{"C": 0.1}'
+    assert estimator.C == 0.1
+    assert parse_candidate("random_forest")[1].n_jobs == 1
+    with pytest.raises(ValueError, match="Unknown model family"):
+        parse_candidate("svm")
+
+def test_folds_evaluate_and_summarize(dataset, tmp_path, monkeypatch):
+    data_path, _ = dataset
+    dataset_dir = prepare_dataset(data_path, FEATURES, str(tmp_path / "cache"))
+    monkeypatch.setattr(evaluate_cv, "_worker_data", {})
+    # Run the worker code in this process, restoring the native thread limits it sets
+    with threadpool_limits(limits=None):
+        evaluate_cv._init_worker(dataset_dir, 3, 0)
+
+    fold_results = [evaluate_cv._evaluate_fold((name, estimator, fold, (0.01,)))
+                    for name, estimator in [parse_candidate("logistic_regression")]
+                    for fold in range(3)]
+    assert [r["fold"] for r in fold_results] == [0, 1, 2]
+    assert all(0.5 < r["pr_auc"] <= 1.0 and set(r["recall_at_fpr"]) == {"0.01"} for r in fold_results)
+
+    summary = summarize(fold_results, (0.01,))["logistic_regression"]
+    assert summary["folds"] == 3
+    assert set(summary) == {"pr_auc", "fit_seconds", "rows_per_second", "recall_at_fpr_0.01", "folds"}
+    pr_aucs = [r["pr_auc"] for r in fold_results]
+    assert summary["pr_auc"] == {"mean": pytest.approx(np.mean(pr_aucs)), "std": pytest.approx(np.std(pr_aucs))}
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
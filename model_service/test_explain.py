@@ -0,0 +1,86 @@
+"""
+Checks for per-prediction explanations: contributions add up to the model output.
+
+Run with pytest:
+
+    python -m pytest test_explain.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from explain import LinearExplainer, PipelineExplainer, TreeExplainer, build_explainer, top_contributions
+
+FEATURES = ["V1", "V2", "V3", "Amount"]
+
+def training_data(rows=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, len(FEATURES)))
+    y = (X[:, 0] - 2 * X[:, 2] + rng.normal(scale=0.5, size=rows) > 1).astype(int)
+    return X, y
+
+def test_linear_contributions_add_up_to_decision_function():
+    X, y = training_data()
+    model = LogisticRegression().fit(X, y)
+    explainer = build_explainer(model, FEATURES)
+    assert isinstance(explainer, LinearExplainer)
+
+    total = explainer.contributions(X[:50]).sum(axis=1) + explainer.base_value
+    assert np.allclose(total, model.decision_function(X[:50]))
+
+@pytest.mark.parametrize("model", [
+    DecisionTreeClassifier(max_depth=5, random_state=0),
+    RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0),
+    ExtraTreesClassifier(n_estimators=10, max_depth=5, random_state=0),
+])
+def test_tree_contributions_add_up_to_probability(model):
+    X, y = training_data()
+    model.fit(X, y)
+    explainer = build_explainer(model, FEATURES)
+    assert isinstance(explainer, TreeExplainer)
+
+    total = explainer.contributions(X[:50]).sum(axis=1) + explainer.base_value
+    assert np.allclose(total, model.predict_proba(X[:50])[:, 1])
+
+def test_pipeline_is_explained_after_preprocessing():
+    X, y = training_data()
+    pipeline = Pipeline([("scaler", StandardScaler()), ("classifier", LogisticRegression())]).fit(X * 100, y)
+    explainer = build_explainer(pipeline, FEATURES)
+    assert isinstance(explainer, PipelineExplainer)
+
+    total = explainer.contributions(X[:20] * 100).sum(axis=1) + explainer.base_value
+    assert np.allclose(total, pipeline.decision_function(X[:20] * 100))
+
+def test_models_without_exact_explainer():
+    X, y = training_data()
+    assert build_explainer(HistGradientBoostingClassifier(max_iter=5).fit(X, y), FEATURES) is None
+    assert build_explainer(object(), FEATURES) is None
+
+def test_top_contributions_are_sorted_by_magnitude():
+    X, y = training_data()
+    explainer = build_explainer(LogisticRegression().fit(X, y), FEATURES)
+    raw = X[:3] * 10
+    explanations = top_contributions(explainer, X[:3], raw, top_k=2)
+
+    assert len(explanations) == 3
+    for row, explanation in enumerate(explanations):
+        assert explanation["method"] == "linear" and explanation["space"] == "log_odds"
+        items = explanation["contributions"]
+        assert len(items) == 2
+        magnitudes = [abs(item["contribution"]) for item in items]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+        assert magnitudes[0] == pytest.approx(np.max(np.abs(explainer.contributions(X[row:row + 1]))))
+        assert items[0]["value"] == pytest.approx(raw[row, FEATURES.index(items[0]["feature"])])
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
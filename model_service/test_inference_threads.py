@@ -0,0 +1,104 @@
+"""
+Checks for inference thread control: CPU lists and shares, thread counts, model
+pinning and splitting of large batches.
+
+Run with pytest:
+
+    python -m pytest test_inference_threads.py
+"""
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import inference_threads
+from inference_threads import default_inference_threads, parse_cpu_list, pin_model_threads, worker_cpus
+
+class ThreadRecordingModel:
+    """
+    Scores each row by its first feature and records the threads that scored it.
+    """
+    def __init__(self):
+        self.threads = set()
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.threads.add(threading.get_ident())
+        self.calls += 1
+        p = np.asarray(X)[:, 0]
+        return np.column_stack([1 - p, p])
+
+def test_parse_cpu_list():
+    assert parse_cpu_list("0-3,8") == {0, 1, 2, 3, 8}
+    assert parse_cpu_list(" 2 , 4-5 ,") == {2, 4, 5}
+    assert parse_cpu_list("") == set()
+
+def test_worker_cpus_share_available_cpus():
+    available = {0, 1, 2, 3, 4, 5, 6, 7}
+    shares = [worker_cpus("auto", i, 4, available) for i in range(4)]
+    assert shares == [{0, 1}, {2, 3}, {4, 5}, {6, 7}]
+    # Worker indices beyond the pool size wrap around
+    assert worker_cpus("auto", 5, 4, available) == {2, 3}
+    # More workers than CPUs, or no worker index: no pinning within the available set
+    assert worker_cpus("auto", 0, 16, available) == available
+    assert worker_cpus("auto", None, 4, available) == available
+    assert worker_cpus("2-3,12", 0, 4, available) == {2, 3}
+
+def test_default_inference_threads(monkeypatch):
+    monkeypatch.delenv("INFERENCE_THREADS", raising=False)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    assert default_inference_threads() == 8
+    assert default_inference_threads(n_workers=3) == 2
+    assert default_inference_threads(n_workers=16) == 1
+    # A pinned worker owns its CPUs
+    assert default_inference_threads(n_workers=3, pinned=True) == 8
+
+    monkeypatch.setenv("INFERENCE_THREADS", "5")
+    assert default_inference_threads(n_workers=3) == 5
+    monkeypatch.setenv("INFERENCE_THREADS", "0")
+    assert default_inference_threads() == 1
+
+def test_pin_model_threads_reaches_nested_estimators():
+    from sklearn.ensemble import BaggingClassifier, RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    forest = RandomForestClassifier(n_jobs=-1)
+    bagging = BaggingClassifier(estimator=RandomForestClassifier(n_jobs=-1), n_jobs=-1)
+    model = Pipeline([("scale", StandardScaler()), ("forest", forest), ("bagging", bagging)])
+    assert pin_model_threads(model) is model
+    assert forest.n_jobs == bagging.n_jobs == bagging.estimator.n_jobs == 1
+
+def test_small_batches_stay_on_the_calling_thread(monkeypatch):
+    monkeypatch.setattr(inference_threads, "_inference_threads", 4)
+    monkeypatch.setattr(inference_threads, "LARGE_BATCH_ROWS", 100)
+    model = ThreadRecordingModel()
+    X = np.random.default_rng(0).random((99, 3))
+
+    np.testing.assert_array_equal(inference_threads.predict_proba(model, X)[:, 1], X[:, 0])
+    assert model.threads == {threading.get_ident()}
+    assert model.calls == 1
+
+def test_large_batches_are_split_in_order(monkeypatch):
+    monkeypatch.setattr(inference_threads, "_inference_threads", 4)
+    monkeypatch.setattr(inference_threads, "LARGE_BATCH_ROWS", 100)
+    model = ThreadRecordingModel()
+    X = np.random.default_rng(0).random((1001, 3))
+
+    np.testing.assert_array_equal(inference_threads.predict_proba(model, X)[:, 1], X[:, 0])
+    assert model.calls == 4
+    assert threading.get_ident() not in model.threads
+
+    # A single inference thread never splits
+    monkeypatch.setattr(inference_threads, "_inference_threads", 1)
+    model = ThreadRecordingModel()
+    inference_threads.predict_proba(model, X)
+    assert model.calls == 1
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,114 @@
+"""
+Checks for IP blocklist screening: entry parsing, range merging, lookups and hot reload.
+
+Run with pytest:
+
+    python -m pytest test_ip_screen.py
+"""
+import ipaddress
+import os
+import sys
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from ip_screen import IPBlocklist, IPIndex, merge_ranges, parse_entry, parse_ip
+
+def write_blocklist(path, lines):
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def test_parse_entries():
+    assert parse_entry("192.0.2.0/24") == (4, 0xC0000200, 0xC00002FF)
+    assert parse_entry("192.0.2.77/24") == (4, 0xC0000200, 0xC00002FF)
+    assert parse_entry("192.0.2.1") == (4, 0xC0000201, 0xC0000201)
+    assert parse_entry("2001:db8::/32")[1:] == (0x20010DB8 << 96, (0x20010DB9 << 96) - 1)
+    # IPv4-mapped blocks are stored as IPv4
+    assert parse_entry("::ffff:10.0.0.0/104") == (4, 0x0A000000, 0x0AFFFFFF)
+    for invalid in ("10.0.0.0/33", "::ffff:10.0.0.0/90", "10.0.0.0/x", "not-an-ip", ""):
+        assert parse_entry(invalid) is None
+    assert parse_ip("::ffff:203.0.113.17") == (4, 0xCB007111)
+    assert parse_ip(None) is None
+
+def test_merge_ranges():
+    assert merge_ranges([(10, 20), (0, 5), (6, 8), (15, 30), (40, 50)]) == [[0, 8], [10, 30], [40, 50]]
+    assert merge_ranges([(0, 100), (10, 20)]) == [[0, 100]]
+    assert merge_ranges([]) == []
+
+def test_index_matches_reference_lookups():
+    rng = np.random.default_rng(0)
+    # Addresses concentrated in a few /24s, so lookups there reach the Bloom filter and bisect
+    prefixes = rng.integers(0, 1 << 24, size=20, dtype=np.int64) << 8
+    addresses = np.unique(prefixes[rng.integers(0, 20, size=2000)] + rng.integers(0, 256, size=2000))
+    networks = [ipaddress.ip_network(f"{ipaddress.IPv4Address(int(first))}/{prefix}", strict=False)
+                for first, prefix in zip(rng.integers(0, 1 << 32, size=50, dtype=np.int64),
+                                         rng.integers(8, 31, size=50))]
+    index = IPIndex(addresses, [(int(n.network_address), int(n.broadcast_address)) for n in networks])
+
+    listed = set(addresses.tolist())
+    queries = np.concatenate([
+        addresses[:500],
+        prefixes[rng.integers(0, 20, size=3000)] + rng.integers(0, 256, size=3000),
+        [int(n.network_address) for n in networks] + [int(n.broadcast_address) + 1 for n in networks],
+        rng.integers(0, 1 << 32, size=3000, dtype=np.int64),
+    ])
+    for ip in queries.tolist():
+        address = ipaddress.IPv4Address(ip % (1 << 32))
+        expected = int(address) in listed or any(address in n for n in networks)
+        assert index.contains_v4(int(address)) == expected, address
+
+def test_blocklist_file(tmp_path):
+    path = str(tmp_path / "blocklist.txt")
+    write_blocklist(path, [
+        "# known bad",
+        "203.0.113.17",
+        "198.51.100.0/24  # scanner range",
+        "2001:db8:bad::/48",
+        "::ffff:192.0.2.0/120",
+        "not an address",
+        "",
+    ])
+    blocklist = IPBlocklist(path, reload_interval=0)
+
+    assert blocklist.contains("203.0.113.17")
+    assert blocklist.contains("::ffff:203.0.113.17")
+    assert blocklist.contains("198.51.100.255")
+    assert blocklist.contains("192.0.2.9")
+    assert blocklist.contains("2001:db8:bad:1::5")
+    assert not blocklist.contains("203.0.113.18")
+    assert not blocklist.contains("2001:db8:bae::1")
+    for missing in (None, "", "garbage", 42):
+        assert not blocklist.contains(missing)
+
+    stats = blocklist.stats()
+    assert (stats["ipv4_addresses"], stats["ipv4_ranges"], stats["ipv6_ranges"]) == (1, 2, 1)
+    assert stats["skipped_lines"] == 1
+    assert stats["blocked"] == 5
+
+def test_hot_reload_waits_for_a_stable_file(tmp_path):
+    path = str(tmp_path / "blocklist.txt")
+    write_blocklist(path, ["203.0.113.17"])
+    blocklist = IPBlocklist(path, reload_interval=0)
+
+    write_blocklist(path, ["203.0.113.17", "198.51.100.0/24"])
+    blocklist.check_for_changes()
+    assert not blocklist.contains("198.51.100.1")
+    blocklist.check_for_changes()
+    assert blocklist.contains("198.51.100.1")
+    assert blocklist.reloads == 2
+
+    # A file that cannot be read keeps the previous list
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfe not text\n")
+    assert not blocklist.reload()
+    os.remove(path)
+    blocklist.check_for_changes()
+    assert blocklist.contains("198.51.100.1")
+    assert blocklist.reload_errors == 1
+    assert blocklist.stats()["last_error"]
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
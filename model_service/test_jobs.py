@@ -0,0 +1,130 @@
+"""
+Checks for the batch job API's job manager: chunking, fair claiming, leases and results.
+
+Run with pytest:
+
+    python -m pytest test_jobs.py
+"""
+import io
+import json
+import os
+import sys
+import time
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from jobs import MAX_ATTEMPTS, JobManager, csv_lines, iter_lines, json_lines
+
+def echo_lines(data, first_line, options):
+    """
+    Score each input line as {"line": <line number>, "amount": <amount>}.
+    """
+    return "".join(json.dumps({"line": first_line + i, "amount": json.loads(line)["amount"]}) + "\n"
+                   for i, line in enumerate(data.splitlines()))
+
+def transactions(n):
+    return json_lines({"amount": float(i)} for i in range(n))
+
+def claim_job_ids(manager, n):
+    """
+    Claim and score `n` chunks in the calling thread; return the job id of each.
+    """
+    served = []
+    for _ in range(n):
+        claim = manager._claim()
+        manager._run_chunk(*claim)
+        served.append(claim[0])
+    return served
+
+def wait_for(manager, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while manager.get(job_id)["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline, manager.get(job_id)
+        time.sleep(0.02)
+    return manager.get(job_id)
+
+def test_submit_splits_into_chunks(tmp_path):
+    manager = JobManager(str(tmp_path), echo_lines, chunk_rows=10)
+    data = b"".join(transactions(25)).rstrip(b"\n")
+    job = manager.submit(iter_lines(io.BytesIO(data), block_size=7))
+    assert (job["status"], job["total_rows"], job["total_chunks"]) == ("queued", 25, 3)
+
+    empty = manager.submit(iter([]))
+    assert (empty["status"], empty["total_chunks"], empty["progress"]) == ("done", 0, 1.0)
+    assert list(manager.iter_result(empty["id"])) == []
+
+def test_csv_rows_become_requests():
+    rows = list(csv_lines(["amount,location,note\n", "12.5,normal,\n", "n/a,abroad,x\n"]))
+    assert [json.loads(row) for row in rows] == [
+        {"amount": 12.5, "location": "normal"},
+        {"amount": "n/a", "location": "abroad", "note": "x"},
+    ]
+
+def test_jobs_take_turns(tmp_path):
+    manager = JobManager(str(tmp_path), echo_lines, chunk_rows=10)
+    large = manager.submit(transactions(60))["id"]
+    assert claim_job_ids(manager, 2) == [large, large]
+
+    # A job submitted behind a large one is served next and then alternates with it
+    small = manager.submit(transactions(30))["id"]
+    assert claim_job_ids(manager, 6) == [small, large, small, large, small, large]
+    assert manager.get(small)["status"] == "done"
+    assert manager.get(large)["chunks_done"] == 5
+
+def test_expired_leases_are_claimed_again(tmp_path):
+    manager = JobManager(str(tmp_path), echo_lines, chunk_rows=10, lease_seconds=60)
+    job_id = manager.submit(transactions(20))["id"]
+
+    # A worker claims chunk 0 and dies; while its lease holds, others move on to chunk 1
+    assert manager._claim()[1] == 0
+    assert manager._claim()[1] == 1
+    assert manager._claim() is None
+
+    manager._db().execute("UPDATE chunks SET claimed_at = claimed_at - 61 WHERE idx = 0")
+    claim = manager._claim()
+    assert claim[1] == 0
+    manager._run_chunk(*claim)
+    # The dead worker's claim of chunk 0 finishing late is counted once
+    manager._finish_chunk(job_id, 0)
+    assert manager.get(job_id)["chunks_done"] == 1
+
+def test_chunk_that_never_finishes_fails_the_job(tmp_path):
+    manager = JobManager(str(tmp_path), echo_lines, chunk_rows=10, lease_seconds=60)
+    job_id = manager.submit(transactions(10))["id"]
+    for _ in range(MAX_ATTEMPTS):
+        assert manager._claim() is not None
+        manager._db().execute("UPDATE chunks SET claimed_at = claimed_at - 61")
+    assert manager._claim() is None
+
+    job = manager.get(job_id)
+    assert job["status"] == "failed"
+    assert f"claimed {MAX_ATTEMPTS} times" in job["error"]
+
+def test_workers_stream_results_in_order(tmp_path):
+    manager = JobManager(str(tmp_path), echo_lines, workers=2, chunk_rows=7).start()
+    job = wait_for(manager, manager.submit(transactions(50), {"explain": True})["id"])
+    assert (job["status"], job["rows_done"], job["options"]) == ("done", 50, {"explain": True})
+
+    results = [json.loads(line) for line in b"".join(manager.iter_result(job["id"])).splitlines()]
+    assert results == [{"line": i + 1, "amount": float(i)} for i in range(50)]
+
+    assert manager.delete(job["id"])
+    assert manager.get(job["id"]) is None
+    assert not os.path.exists(tmp_path / job["id"])
+    assert not manager.delete(job["id"])
+
+def test_scoring_error_fails_the_job(tmp_path):
+    def broken(data, first_line, options):
+        raise RuntimeError("model unavailable")
+
+    manager = JobManager(str(tmp_path), broken, workers=1, chunk_rows=10).start()
+    job = wait_for(manager, manager.submit(transactions(20))["id"])
+    assert job["status"] == "failed"
+    assert job["error"] == "Chunk 0: model unavailable"
+    assert manager.stats()["jobs"] == {"failed": 1}
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
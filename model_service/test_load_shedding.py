@@ -0,0 +1,125 @@
+"""
+Checks for load shedding: queueing delay parsing, hysteresis and recovery probes.
+
+Run with pytest:
+
+    python -m pytest test_load_shedding.py
+"""
+import os
+import sys
+import time
+import types
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ.setdefault("MODEL_PATH", os.path.join(HERE, "credit_card_model.pkl"))
+
+import load_shedding
+from load_shedding import AdmissionController, queue_delay_ms
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def perf_counter(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(load_shedding, "time", types.SimpleNamespace(perf_counter=clock.perf_counter, time=time.time))
+    return clock
+
+def test_queue_delay_units():
+    now = 1_700_000_000.0
+    for header in ("t=1699999999.95", "t=1699999999950", "1699999999950000"):
+        assert queue_delay_ms(header, now) == pytest.approx(50.0, abs=0.01)
+    assert queue_delay_ms("t=1700000001.0", now) == 0.0
+    for header in (None, "", "t=soon"):
+        assert queue_delay_ms(header, now) == 0.0
+
+def test_shedding_uses_hysteresis(clock):
+    controller = AdmissionController(slo_ms=100)
+    controller.service_ms = 30.0
+
+    first, second = controller.admit(), controller.admit()
+    assert first is not None and second is not None
+    # Three in flight would take 90 ms, above 0.8 x SLO
+    assert controller.admit() is None
+    assert controller.shedding and controller.transitions == 1
+
+    clock.advance(0.03)
+    controller.done(first)
+    # 60 ms predicted: under the entry threshold, but not under the exit threshold yet
+    assert controller.admit() is None
+    clock.advance(0.03)
+    controller.done(second)
+    assert controller.service_ms == pytest.approx(30.0)
+
+    token = controller.admit()
+    assert token is not None
+    assert not controller.shedding and controller.transitions == 2
+    controller.done(token)
+
+    status = controller.status()
+    assert (status["admitted"], status["degraded"], status["in_flight"]) == (3, 2, 0)
+
+def test_queueing_delay_counts_against_the_slo(clock):
+    controller = AdmissionController(slo_ms=100)
+    controller.service_ms = 5.0
+    assert controller.admit(delay_ms=90.0) is None
+    assert controller.admit(delay_ms=10.0) is not None
+
+def test_probe_replaces_a_stale_service_time(clock):
+    controller = AdmissionController(slo_ms=100, probe_interval=0.25)
+    # Inflated by an overload that has since passed
+    controller.service_ms = 120.0
+    assert controller.admit() is None
+
+    probe = controller.admit()
+    assert probe is not None and probe[2]
+    assert controller.shedding
+    clock.advance(0.01)
+    controller.done(probe)
+    assert controller.service_ms == pytest.approx(10.0)
+
+    token = controller.admit()
+    assert token is not None and not token[2]
+    assert not controller.shedding
+
+def test_probes_are_rate_limited(clock):
+    controller = AdmissionController(slo_ms=100, probe_interval=0.25)
+    controller.service_ms = 120.0
+    assert controller.admit() is None
+    probe = controller.admit()
+    clock.advance(0.1)
+    controller.done(probe)
+    controller.service_ms = 120.0
+
+    assert controller.admit() is None
+    clock.advance(0.2)
+    assert controller.admit() is not None
+
+def test_api_degrades_to_rules_while_shedding(monkeypatch):
+    import flask_api
+
+    controller = AdmissionController(slo_ms=100)
+    monkeypatch.setattr(flask_api, "admission_controller", controller)
+    client = flask_api.app.test_client()
+    transaction = {"amount": 120.5, "cardEntryMethod": "online", "merchantCategory": "electronics",
+                   "location": "normal", "timestamp": "2025-04-02T03:15:00Z"}
+
+    assert "degraded" not in client.post("/predict", json=transaction).get_json()
+    controller.service_ms = 1000.0
+    result = client.post("/predict?similarity=true", json=transaction).get_json()
+    assert result["degraded"] is True
+    assert result["similarity"]["unavailable"] == flask_api.SHED_NO_SIMILARITY
+    assert controller.status()["degraded"] == 1
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
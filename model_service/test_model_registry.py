@@ -0,0 +1,67 @@
+"""
+Tests for the model registry: lazy loading, LRU eviction within the memory budget,
+pinning and per-model load errors.
+"""
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from model_registry import FeatureSchema, ModelLoadError, ModelRegistry
+
+FEATURES = ['a', 'b']
+
+def build(feature_names, inputs, rows):
+    return np.asarray(inputs)[rows][:, :len(feature_names)]
+
+SCHEMAS = {"two": FeatureSchema("two", FEATURES, build)}
+
+@pytest.fixture
+def model_file(tmp_path):
+    X = np.array([[0.0, 0.0], [1.0, 1.0], [0.0, 1.0], [1.0, 0.0]])
+    path = tmp_path / "model.pkl"
+    joblib.dump(LogisticRegression().fit(X, [0, 1, 0, 1]), path)
+    return str(path)
+
+def test_models_load_on_first_request(model_file):
+    registry = ModelRegistry({"m": {"path": model_file, "schema": "two"}}, SCHEMAS)
+    assert not registry.status()["models"]["m"]["loaded"]
+    entry = registry.get("m")
+    assert registry.get("m") is entry
+    _, _, probabilities = entry.predict([[0.0, 0.0], [1.0, 1.0]], [0, 1])
+    assert probabilities[0] < probabilities[1]
+    stats = registry.status()["models"]["m"]
+    assert (stats["loaded"], stats["loads"], stats["requests"]) == (True, 1, 2)
+    assert len(stats["version"]) == 12
+
+def test_least_recently_used_unpinned_model_is_evicted(model_file):
+    specs = {name: {"path": model_file, "schema": "two"} for name in ("a", "b", "c")}
+    specs["a"]["pinned"] = True
+    size = ModelRegistry(specs, SCHEMAS).get("b").size_bytes
+    # Room for two models: loading a third evicts the least recently used unpinned one
+    registry = ModelRegistry(specs, SCHEMAS, memory_budget_mb=2.5 * size / 2**20)
+    registry.preload()
+    registry.get("b")
+    registry.get("c")
+    status = registry.status()["models"]
+    assert status["a"]["loaded"] and status["c"]["loaded"] and not status["b"]["loaded"]
+    assert status["b"]["evictions"] == 1
+    registry.get("b")
+    assert registry.status()["models"]["b"]["loads"] == 2
+
+def test_load_errors_are_reported_per_model(model_file, tmp_path):
+    specs = {"good": {"path": model_file, "schema": "two", "pinned": True},
+             "missing": {"path": str(tmp_path / "nope.pkl"), "schema": "two", "pinned": True}}
+    registry = ModelRegistry(specs, SCHEMAS)
+    registry.preload()
+    with pytest.raises(ModelLoadError, match="Model 'missing' could not be loaded"):
+        registry.get("missing")
+    status = registry.status()["models"]
+    assert status["good"]["loaded"] and status["good"]["load_error"] is None
+    assert not status["missing"]["loaded"]
+    assert status["missing"]["load_error"].startswith("FileNotFoundError")
+    assert status["missing"]["load_errors"] == 2
+
+def test_unknown_schema_is_rejected(model_file):
+    with pytest.raises(ValueError, match="Unknown feature schema"):
+        ModelRegistry({"m": {"path": model_file, "schema": "nope"}}, SCHEMAS)
@@ -0,0 +1,67 @@
+"""
+Checks for the model search: Pareto ranking, survivor and final selection, and successive halving.
+
+Run with pytest:
+
+    python -m pytest test_model_search.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from model_search import (_rung_sizes, list_candidates, pareto_ranks, select_best, select_survivors,
+                          successive_halving)
+
+def result(name, pr_auc, latency_us):
+    return {"family": name, "pr_auc": pr_auc, "latency_us": latency_us}
+
+RESULTS = [
+    result("accurate", 0.90, 100.0),
+    result("fast", 0.85, 10.0),
+    result("balanced", 0.898, 20.0),
+    result("dominated", 0.84, 50.0),
+    result("worst", 0.80, 200.0),
+]
+
+def test_pareto_ranks():
+    assert pareto_ranks(RESULTS) == [0, 0, 0, 1, 2]
+    # Identical candidates do not dominate each other
+    assert pareto_ranks([result("a", 0.9, 10.0), result("b", 0.9, 10.0)]) == [0, 0]
+
+def test_survivors_keep_the_front_first():
+    survivors = select_survivors(RESULTS, 3)
+    assert [r["family"] for r in survivors] == ["accurate", "balanced", "fast"]
+
+def test_best_trades_negligible_quality_for_latency():
+    assert select_best(RESULTS, quality_tolerance=0.005)["family"] == "balanced"
+    assert select_best(RESULTS, quality_tolerance=0.0)["family"] == "accurate"
+    assert select_best(RESULTS, quality_tolerance=0.0, latency_budget_us=15)["family"] == "fast"
+    # Nothing meets the budget: fall back to the fastest
+    assert select_best(RESULTS, latency_budget_us=1)["family"] == "fast"
+
+def test_rung_sizes_grow_to_the_full_training_set():
+    assert _rung_sizes(9000, 9, eta=3, min_resource=500) == [1000, 3000, 9000]
+    assert _rung_sizes(9000, 9, eta=3, min_resource=2000) == [3000, 9000]
+    assert _rung_sizes(100, 9, eta=3, min_resource=500) == [100]
+
+def test_successive_halving_prunes_candidates():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1500, 4))
+    y = (X[:, 0] + rng.normal(scale=0.5, size=1500) > 1).astype(int)
+    candidates = list_candidates(["logistic_regression"])
+
+    results, history = successive_halving(X[:1000], y[:1000], X[1000:], y[1000:], candidates,
+                                          eta=3, min_resource=100, n_workers=1)
+    assert [len(rung) for rung in history] == [8, 3, 1]
+    assert [rung[0]["n_train"] for rung in history] == [111, 333, 1000]
+    assert len(results) == 1
+    assert 0.5 < results[0]["pr_auc"] <= 1.0
+    assert results[0]["model"].predict_proba(X[:5]).shape == (5, 2)
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,84 @@
+"""
+Checks for the NDJSON streaming endpoint: per-line results and errors, and bounded read-ahead.
+
+Run with pytest:
+
+    python -m pytest test_predict_stream.py
+"""
+import io
+import json
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ.setdefault("MODEL_PATH", os.path.join(HERE, "credit_card_model.pkl"))
+
+TRANSACTION = {
+    "amount": 120.5,
+    "cardEntryMethod": "online",
+    "merchantCategory": "electronics",
+    "location": "normal",
+    "timestamp": "2025-04-02T03:15:00Z",
+}
+
+class CountingInput(io.BytesIO):
+    """
+    Request body that records how many bytes the server has read so far.
+    """
+    @property
+    def bytes_read(self):
+        return self.tell()
+
+@pytest.fixture
+def api():
+    import flask_api
+    return flask_api
+
+def test_results_and_errors_follow_input_order(api):
+    transactions = [dict(TRANSACTION, amount=amount) for amount in (12.0, 950.0, 4999.0)]
+    body = "\n".join([
+        json.dumps(transactions[0]),
+        "{not json",
+        "",
+        json.dumps(transactions[1]),
+        json.dumps({"cardEntryMethod": "chip"}),
+        "x" * (api.MAX_STREAM_LINE_BYTES + 10),
+        json.dumps(transactions[2]),
+    ]).encode()
+
+    response = api.app.test_client().post("/predict/stream", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.splitlines()]
+
+    expected = api.app.test_client().post("/predict/batch", json=transactions).get_json()["results"]
+    # The blank third line produces no output
+    assert len(lines) == 6
+    assert [lines[0], lines[2], lines[5]] == expected
+    assert lines[1] == {"error": "Invalid JSON", "line": 2}
+    assert lines[3] == {"error": "Invalid request data", "line": 5}
+    assert lines[4] == {"error": f"Line exceeds {api.MAX_STREAM_LINE_BYTES} bytes", "line": 6}
+
+def test_input_is_read_as_output_is_consumed(api, monkeypatch):
+    monkeypatch.setattr(api, "STREAM_BATCH_SIZE", 10)
+    line = (json.dumps(TRANSACTION) + "\n").encode()
+    body = CountingInput(line * 5000)
+
+    response = api.app.test_client().post("/predict/stream", input_stream=body, buffered=False,
+                                          content_type="application/x-ndjson", content_length=len(line) * 5000)
+    chunks = iter(response.response)
+    first = next(chunks)
+    assert len(first.splitlines()) == 10
+    # Only the first micro-batch plus one read buffer has been read
+    assert body.bytes_read <= 10 * len(line) + api.MAX_STREAM_LINE_BYTES
+
+    total = len(first.splitlines()) + sum(len(chunk.splitlines()) for chunk in chunks)
+    response.close()
+    assert total == 5000
+    assert body.bytes_read == len(line) * 5000
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,81 @@
+"""
+Checks for the precomputed score tables: agreement with full scoring for linear and tree models.
+
+Run with pytest:
+
+    python -m pytest test_score_table.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from score_table import LinearScoreTable, TreeScoreTable, build_score_table, covers, flag_combinations
+
+FEATURES = ["V1", "V2", "Amount"]
+FLAG_SPACE = flag_combinations((0, 1, 2), (False, True))
+
+def features_from_flags(flags, amount):
+    method, online = flags
+    return {"V1": method * 1.5 - 1.0, "V2": 2.0 if online else -0.5, "Amount": amount}
+
+def training_data(seed=0, rows=2000):
+    rng = np.random.default_rng(seed)
+    flags_list = [FLAG_SPACE[i] for i in rng.integers(len(FLAG_SPACE), size=rows)]
+    amounts = np.round(rng.exponential(300, rows), 2)
+    X = np.array([[features_from_flags(flags, amount)[f] for f in FEATURES]
+                  for flags, amount in zip(flags_list, amounts)])
+    logit = X[:, 0] + X[:, 1] + (amounts - 300) / 200
+    y = (rng.random(rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return flags_list, amounts, X, y
+
+def full_scores(model, scaler, flags_list, amounts):
+    X = np.array([[features_from_flags(flags, amount)[f] for f in FEATURES]
+                  for flags, amount in zip(flags_list, amounts)])
+    return model.predict_proba(scaler.transform(X))[:, 1]
+
+@pytest.mark.parametrize("model, kind", [
+    (LogisticRegression(), LinearScoreTable),
+    (SGDClassifier(loss="log_loss", random_state=0), LinearScoreTable),
+    (RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0), TreeScoreTable),
+])
+def test_table_matches_full_scoring(model, kind):
+    flags_list, amounts, X, y = training_data()
+    scaler = StandardScaler().fit(X)
+    model.fit(scaler.transform(X), y)
+
+    table = build_score_table(model, scaler, FEATURES, FLAG_SPACE, features_from_flags)
+    assert isinstance(table, kind)
+
+    test_flags, test_amounts, _, _ = training_data(seed=1, rows=500)
+    # Include amounts exactly on tree split thresholds
+    if kind is TreeScoreTable:
+        boundaries = table.thresholds * table.amount_scale + table.amount_mean
+        test_flags += [FLAG_SPACE[i % len(FLAG_SPACE)] for i in range(len(boundaries))]
+        test_amounts = np.append(test_amounts, boundaries)
+    expected = full_scores(model, scaler, test_flags, test_amounts)
+    assert np.allclose(table.score(test_flags, test_amounts), expected, atol=1e-9)
+
+def test_untabulated_models_keep_full_scoring():
+    flags_list, amounts, X, y = training_data()
+    scaler = StandardScaler().fit(X)
+    model = HistGradientBoostingClassifier(max_iter=10).fit(scaler.transform(X), y)
+
+    assert build_score_table(model, scaler, FEATURES, FLAG_SPACE, features_from_flags) is None
+    assert build_score_table(None, scaler, FEATURES, FLAG_SPACE, features_from_flags) is None
+    assert build_score_table(model, scaler, ["V1", "V2"], FLAG_SPACE, features_from_flags) is None
+
+def test_covers_rejects_non_finite_amounts():
+    assert covers([0.0, 12.5, 1e6])
+    assert not covers([10.0, np.nan])
+    assert not covers([np.inf])
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,67 @@
+"""
+Checks for nearest-fraud similarity: the KD-tree index and the API's similarity field.
+
+Run with pytest:
+
+    python -m pytest test_similarity.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ.setdefault("MODEL_PATH", os.path.join(HERE, "credit_card_model.pkl"))
+
+from similarity import build_fraud_index, nearest_fraud_distances
+
+TRANSACTION = {
+    "amount": 120.5,
+    "cardEntryMethod": "online",
+    "merchantCategory": "electronics",
+    "location": "normal",
+    "timestamp": "2025-04-02T03:15:00Z",
+}
+
+def test_distances_match_brute_force():
+    rng = np.random.default_rng(0)
+    frauds, queries = rng.normal(size=(300, 8)), rng.normal(size=(20, 8))
+    distances = nearest_fraud_distances(build_fraud_index(frauds), queries, k=5)
+
+    expected = np.sort(np.linalg.norm(queries[:, None, :] - frauds[None, :, :], axis=2), axis=1)[:, :5]
+    assert np.allclose(distances, expected)
+
+def test_k_is_capped_at_index_size():
+    index = build_fraud_index(np.eye(3))
+    assert nearest_fraud_distances(index, np.zeros((2, 3)), k=10).shape == (2, 3)
+
+@pytest.fixture
+def api():
+    import flask_api
+    return flask_api
+
+def test_similarity_without_index_is_reported(api, monkeypatch):
+    monkeypatch.setattr(api, "fraud_index", None)
+    client = api.app.test_client()
+
+    result = client.post("/predict?similarity=true", json=TRANSACTION).get_json()
+    assert result["similarity"] == {"nearest_fraud_distances": None, "unavailable": api.NO_FRAUD_INDEX}
+    assert "similarity" not in client.post("/predict", json=TRANSACTION).get_json()
+
+def test_similarity_with_index(api, monkeypatch):
+    if api.model is None:
+        pytest.skip("needs the model bundle")
+    frauds = np.random.default_rng(1).normal(size=(50, len(api.selected_features)))
+    monkeypatch.setattr(api, "fraud_index", build_fraud_index(frauds))
+    client = api.app.test_client()
+
+    results = client.post("/predict/batch?similarity=true", json=[TRANSACTION, TRANSACTION]).get_json()["results"]
+    for result in results:
+        distances = result["similarity"]["nearest_fraud_distances"]
+        assert len(distances) == min(api.SIMILARITY_K, len(frauds))
+        assert distances == sorted(distances)
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
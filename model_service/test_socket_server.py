@@ -0,0 +1,107 @@
+"""
+Checks for the Unix socket transport: frame encoding, IP blocklist screening and auditing.
+
+Run with pytest or directly:
+
+    python test_socket_server.py
+"""
+import glob
+import os
+import struct
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ.setdefault("MODEL_PATH", os.path.join(HERE, "credit_card_model.pkl"))
+
+from socket_server import REQUEST, SocketScoringClient, decode_request, encode_request, start_socket_server
+
+TRANSACTION = {
+    "amount": 120.5,
+    "cardEntryMethod": "online",
+    "merchantCategory": "electronics",
+    "location": "normal",
+    "timestamp": "2025-04-02T03:15:00Z",
+}
+
+def test_frame_carries_ip_address():
+    frame = encode_request(7, dict(TRANSACTION, ipAddress="203.0.113.17"))
+    request_id, transaction = decode_request(frame[4:])
+    assert request_id == 7
+    assert transaction["ipAddress"] == "203.0.113.17"
+    assert transaction["timestamp"] == TRANSACTION["timestamp"]
+
+    # Frames from clients that predate the ipAddress field end after the timestamp
+    timestamp = TRANSACTION["timestamp"].encode()
+    old_payload = REQUEST.pack(8, 120.5, 2, 6, 1, len(timestamp)) + timestamp
+    assert decode_request(old_payload)[1]["ipAddress"] is None
+
+    truncated = frame[4:-3]
+    try:
+        decode_request(truncated)
+    except struct.error:
+        pass
+    else:
+        raise AssertionError("a truncated ipAddress must be rejected")
+
+def test_blocked_ip_over_socket():
+    import flask_api
+    from ip_screen import IPBlocklist
+
+    previous = flask_api.ip_blocklist
+    with tempfile.TemporaryDirectory() as directory:
+        blocklist_path = os.path.join(directory, "blocklist.txt")
+        with open(blocklist_path, "w") as f:
+            f.write("203.0.113.17\n198.51.100.0/24\n")
+        flask_api.ip_blocklist = IPBlocklist(blocklist_path, reload_interval=0)
+        server = start_socket_server(os.path.join(directory, "model.sock"), flask_api.score_socket_transaction)
+        client = SocketScoringClient(server.server_address)
+        try:
+            blocked, in_range, allowed, missing = client.score_many([
+                dict(TRANSACTION, ipAddress="203.0.113.17"),
+                dict(TRANSACTION, ipAddress="198.51.100.9"),
+                dict(TRANSACTION, ipAddress="192.0.2.1"),
+                TRANSACTION,
+            ])
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+            flask_api.ip_blocklist = previous
+
+    assert blocked == {"is_fraud": True, "confidence": 1.0, "risk_level": "high"}
+    assert in_range == blocked
+    assert allowed is not None and allowed["confidence"] < 1.0
+    assert missing == allowed
+
+def test_socket_decisions_are_audited():
+    import flask_api
+    from audit_log import AuditLog, read_audit_log
+
+    previous = flask_api.audit_log
+    with tempfile.TemporaryDirectory() as directory:
+        flask_api.audit_log = AuditLog(os.path.join(directory, "audit"), flask_api.describe_decision,
+                                       flush_interval=0.05)
+        server = start_socket_server(os.path.join(directory, "model.sock"), flask_api.score_socket_transaction)
+        client = SocketScoringClient(server.server_address)
+        try:
+            result = client.score(dict(TRANSACTION, ipAddress="192.0.2.1"))
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+            flask_api.audit_log.close()
+            records = list(read_audit_log(glob.glob(os.path.join(directory, "audit", "*.jsonl.gz"))))
+            flask_api.audit_log = previous
+
+    assert len(records) == 1
+    assert records[0]["endpoint"] == "/socket"
+    assert records[0]["input"]["ipAddress"] == "192.0.2.1"
+    assert abs(records[0]["confidence"] - result["confidence"]) < 1e-9
+
+if __name__ == "__main__":
+    test_frame_carries_ip_address()
+    test_blocked_ip_over_socket()
+    test_socket_decisions_are_audited()
+    print("Socket transport checks passed")
@@ -0,0 +1,108 @@
+"""
+Checks for /predict traffic capture: log round-trips, old logs, truncation and replay targets.
+
+Run with pytest:
+
+    python -m pytest test_traffic_capture.py
+"""
+import json
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+os.environ.setdefault("MODEL_PATH", os.path.join(HERE, "credit_card_model.pkl"))
+
+from traffic_capture import MAGIC_V1, MAX_PATH_BYTES, RECORD_V1, TrafficRecorder, read_capture
+
+TRANSACTION = {
+    "amount": 120.5,
+    "cardEntryMethod": "online",
+    "merchantCategory": "electronics",
+    "location": "normal",
+    "timestamp": "2025-04-02T03:15:00Z",
+}
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    recorder = TrafficRecorder(path)
+    recorder.record(100.0, b"/predict", b'{"amount": 1}')
+    recorder.record(100.5, b"/predict?model=basic&note=caf\xe9", b'{"amount": 2}')
+    recorder.record(101.0, "/predict/batch", b"[]")
+    recorder.close()
+
+    # A second recorder (another worker) appends to the same log without rewriting the header
+    other = TrafficRecorder(path)
+    other.record(102.0, b"/predict", b"")
+    other.close()
+
+    assert list(read_capture(path)) == [
+        (100.0, b"/predict", b'{"amount": 1}'),
+        (100.5, b"/predict?model=basic&note=caf\xe9", b'{"amount": 2}'),
+        (101.0, b"/predict/batch", b"[]"),
+        (102.0, b"/predict", b""),
+    ]
+
+def test_truncated_record_is_dropped(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    recorder = TrafficRecorder(path)
+    recorder.record(1.0, b"/predict", b'{"amount": 1}')
+    recorder.record(2.0, b"/predict", b'{"amount": 2}')
+    recorder.close()
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+
+    assert [record[0] for record in read_capture(path)] == [1.0]
+
+def test_version_1_logs_read_as_predict(tmp_path):
+    path = str(tmp_path / "capture_v1.bin")
+    with open(path, "wb") as f:
+        f.write(MAGIC_V1 + RECORD_V1.pack(5.0, 2) + b"{}")
+
+    assert list(read_capture(path)) == [(5.0, b"/predict", b"{}")]
+    with pytest.raises(ValueError):
+        TrafficRecorder(path)
+
+def test_oversized_path_is_rejected(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    recorder = TrafficRecorder(path)
+    with pytest.raises(ValueError):
+        recorder.record(1.0, b"/predict?q=" + b"x" * MAX_PATH_BYTES, b"{}")
+    recorder.record(2.0, b"/predict", b"{}")
+    recorder.close()
+
+    assert list(read_capture(path)) == [(2.0, b"/predict", b"{}")]
+
+def test_replay_targets_are_ascii():
+    from replay_traffic import request_target
+
+    assert request_target(b"/predict?model=basic&explain=true") == "/predict?model=basic&explain=true"
+    assert request_target(b"/predict?note=caf%C3%A9") == "/predict?note=caf%C3%A9"
+    assert request_target(b"/predict?note=caf\xe9") == "/predict?note=caf%E9"
+
+def test_api_captures_raw_query_bytes(tmp_path):
+    import flask_api
+
+    previous = flask_api.traffic_recorder
+    path = str(tmp_path / "capture.bin")
+    flask_api.traffic_recorder = TrafficRecorder(path)
+    client = flask_api.app.test_client()
+    body = json.dumps(TRANSACTION).encode()
+    try:
+        assert client.post("/predict?note=caf\xe9", data=body, content_type="application/json").status_code == 200
+        # Longer than the path field: served normally, just not captured
+        response = client.post("/predict?q=" + "x" * MAX_PATH_BYTES, data=body, content_type="application/json")
+        assert response.status_code == 200
+    finally:
+        flask_api.traffic_recorder.close()
+        flask_api.traffic_recorder = previous
+
+    records = list(read_capture(path))
+    assert len(records) == 1
+    assert records[0][1] == "/predict?note=café".encode("utf-8")
+    assert records[0][2] == body
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,91 @@
+"""
+Compact append-only capture of /predict traffic for replay testing.
+
+Enabled in flask_api.py by setting CAPTURE_PATH. The log starts with a short
+magic header followed by one record per request:
+
+    <dIH  arrival time (UNIX seconds, float64), payload length (uint32),
+          path length (uint16)
+          followed by the request path with its raw query string (e.g.
+          /predict?model=basic&explain=true) and the request body, both as
+          the bytes received (the body is JSON)
+
+Every record is written with a single append-mode write, so several worker
+processes can share one log, and a crash loses at most the record being
+written. read_capture() stops cleanly at a truncated final record. Logs from
+before the path was recorded (FSCAP1) are still read, as plain /predict calls.
+A request whose path and query exceed the 65535-byte path field is not
+captured; record() raises ValueError for it.
+replay_traffic.py re-issues captured requests against a running service.
+"""
+import os
+import struct
+
+MAGIC = b"FSCAP2\n"
+RECORD = struct.Struct('<dIH')
+# Version 1 logs: no path, every request was a plain /predict
+MAGIC_V1 = b"FSCAP1\n"
+RECORD_V1 = struct.Struct('<dI')
+DEFAULT_PATH = b'/predict'
+# Largest path plus query string the uint16 length field can describe
+MAX_PATH_BYTES = 0xFFFF
+
+class TrafficRecorder:
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            # Publish the file with its header atomically, so workers starting together
+            # never write a record before the header or write the header twice
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(MAGIC)
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+            finally:
+                os.unlink(tmp_path)
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a current traffic capture log; capture to a new file")
+        self.fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        self.records = 0
+
+    def record(self, arrival_time, request_path, payload):
+        """
+        Append one request received at `arrival_time`: its path with the query
+        string and its body (bytes). A str path is stored UTF-8 encoded.
+        """
+        if isinstance(request_path, str):
+            request_path = request_path.encode('utf-8')
+        if len(request_path) > MAX_PATH_BYTES:
+            raise ValueError(f"request path of {len(request_path)} bytes is too long to capture")
+        os.write(self.fd, RECORD.pack(arrival_time, len(payload), len(request_path)) + request_path + payload)
+        self.records += 1
+
+    def close(self):
+        os.close(self.fd)
+
+def read_capture(path):
+    """
+    Yield (arrival_time, request path bytes, payload bytes) for every complete record in a capture log.
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(len(MAGIC))
+        if magic not in (MAGIC, MAGIC_V1):
+            raise ValueError(f"{path} is not a traffic capture log")
+        record = RECORD if magic == MAGIC else RECORD_V1
+        while True:
+            header = f.read(record.size)
+            if len(header) < record.size:
+                return
+            arrival_time, length, *path_length = record.unpack(header)
+            request_path = DEFAULT_PATH
+            if path_length:
+                request_path = f.read(path_length[0])
+                if len(request_path) < path_length[0]:
+                    return
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield arrival_time, request_path, payload
@@ -1,5 +1,6 @@
 import axios from "axios";
 import type { FraudDetectionRequest, FraudDetectionResult } from "@shared/schema";
+import { ModelSocketClient } from "./modelSocketClient";
 
 // Interface for the model service
 interface IModelService {
@@ -9,13 +10,26 @@ interface IModelService {
 // Implementation that communicates with the FastAPI microservice
 class ModelServiceImpl implements IModelService {
   private readonly modelServiceUrl: string;
+  private readonly socketClient: ModelSocketClient | null;
 
   constructor() {
     // Default to localhost with fallback ports
     this.modelServiceUrl = process.env.MODEL_SERVICE_URL || "http://localhost:8001";
+    
+    // Co-located deployments can score over the model service's Unix socket instead of HTTP
+    const socketPath = process.env.MODEL_SERVICE_SOCKET;
+    this.socketClient = socketPath ? new ModelSocketClient(socketPath) : null;
   }
 
   async detectFraud(transaction: FraudDetectionRequest): Promise<FraudDetectionResult> {
+    if (this.socketClient) {
+      try {
+        return await this.socketClient.score(transaction);
+      } catch (error) {
+        console.warn("Model socket unavailable, falling back to HTTP:", error);
+      }
+    }
+    
     try {
       // Prepare transaction with extra feature fields that our model needs
       const enrichedTransaction = this.enrichTransactionWithFeatures(transaction);
@@ -0,0 +1,138 @@
+import net from "net";
+import type { FraudDetectionRequest, FraudDetectionResult } from "@shared/schema";
+
+// Code tables and frame layouts must match model_service/socket_server.py
+const CARD_ENTRY_METHODS = ["", "chip", "online", "manual", "contactless", "swipe"];
+const MERCHANT_CATEGORIES = [
+  "", "retail", "ecommerce", "travel", "restaurant", "entertainment",
+  "electronics", "food_beverage", "fuel", "luxury",
+];
+const LOCATIONS = ["", "normal", "abnormal"];
+const RISK_LEVELS = ["low", "medium", "high"] as const;
+
+const FRAME_HEADER_SIZE = 4;
+// <IdBBBH: request id, amount, card entry, merchant category, location, timestamp length
+const REQUEST_SIZE = 17;
+// <H length prefix of the ipAddress that follows the timestamp
+const FIELD_LENGTH_SIZE = 2;
+// <IBdBB: request id, status, confidence, is_fraud, risk level
+const RESPONSE_SIZE = 15;
+
+interface PendingRequest {
+  resolve: (result: FraudDetectionResult) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+function code(table: string[], value: string | undefined): number {
+  const index = table.indexOf(value ?? "");
+  return index < 0 ? 0 : index;
+}
+
+function encodeRequest(id: number, transaction: FraudDetectionRequest): Buffer {
+  const timestamp = Buffer.from(transaction.timestamp ?? "", "utf8");
+  const ipAddress = Buffer.from(transaction.ipAddress ?? "", "utf8");
+  const payloadSize = REQUEST_SIZE + timestamp.length + FIELD_LENGTH_SIZE + ipAddress.length;
+  const frame = Buffer.alloc(FRAME_HEADER_SIZE + payloadSize);
+  frame.writeUInt32BE(payloadSize, 0);
+  let offset = FRAME_HEADER_SIZE;
+  offset = frame.writeUInt32LE(id, offset);
+  offset = frame.writeDoubleLE(transaction.amount, offset);
+  offset = frame.writeUInt8(code(CARD_ENTRY_METHODS, transaction.cardEntryMethod), offset);
+  offset = frame.writeUInt8(code(MERCHANT_CATEGORIES, transaction.merchantCategory), offset);
+  offset = frame.writeUInt8(code(LOCATIONS, transaction.location), offset);
+  offset = frame.writeUInt16LE(timestamp.length, offset);
+  offset += timestamp.copy(frame, offset);
+  offset = frame.writeUInt16LE(ipAddress.length, offset);
+  ipAddress.copy(frame, offset);
+  return frame;
+}
+
+/**
+ * Client for the model service's Unix domain socket listener.
+ *
+ * Keeps one persistent connection and pipelines requests: each call writes its
+ * frame immediately and is resolved when the response with its request id arrives.
+ */
+export class ModelSocketClient {
+  private socket: net.Socket | null = null;
+  private buffer: Buffer = Buffer.alloc(0);
+  private nextId = 0;
+  private readonly pending = new Map<number, PendingRequest>();
+
+  constructor(private readonly socketPath: string, private readonly timeoutMs = 2000) {}
+
+  score(transaction: FraudDetectionRequest): Promise<FraudDetectionResult> {
+    this.nextId = (this.nextId + 1) >>> 0;
+    const id = this.nextId;
+    const frame = encodeRequest(id, transaction);
+
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error("Model socket request timed out"));
+      }, this.timeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      this.connect().write(frame);
+    });
+  }
+
+  private connect(): net.Socket {
+    if (this.socket && !this.socket.destroyed) {
+      return this.socket;
+    }
+    const socket = net.createConnection(this.socketPath);
+    this.buffer = Buffer.alloc(0);
+    socket.on("data", (chunk: Buffer) => this.onData(chunk));
+    socket.on("error", (error) => this.failAll(error));
+    socket.on("close", () => {
+      this.socket = null;
+      this.failAll(new Error("Model socket closed"));
+    });
+    this.socket = socket;
+    return socket;
+  }
+
+  private onData(chunk: Buffer) {
+    this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+    while (this.buffer.length >= FRAME_HEADER_SIZE) {
+      const length = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < FRAME_HEADER_SIZE + length) {
+        break;
+      }
+      const payload = this.buffer.subarray(FRAME_HEADER_SIZE, FRAME_HEADER_SIZE + length);
+      this.buffer = this.buffer.subarray(FRAME_HEADER_SIZE + length);
+      if (length >= RESPONSE_SIZE) {
+        this.onResponse(payload);
+      }
+    }
+  }
+
+  private onResponse(payload: Buffer) {
+    const id = payload.readUInt32LE(0);
+    const request = this.pending.get(id);
+    if (!request) {
+      return; // Already timed out
+    }
+    this.pending.delete(id);
+    clearTimeout(request.timer);
+
+    if (payload.readUInt8(4) !== 0) {
+      request.reject(new Error("Model service failed to score transaction"));
+      return;
+    }
+    request.resolve({
+      confidence: payload.readDoubleLE(5),
+      is_fraud: payload.readUInt8(13) === 1,
+      risk_level: RISK_LEVELS[payload.readUInt8(14)] ?? "low",
+    });
+  }
+
+  private failAll(error: Error) {
+    this.pending.forEach((request) => {
+      clearTimeout(request.timer);
+      request.reject(error);
+    });
+    this.pending.clear();
+  }
+}